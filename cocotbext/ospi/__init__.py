@@ -1,5 +1,21 @@
+from .ospi_arbiter import OspiArbiter
+from .ospi_backdoor import OspiBackdoor
 from .ospi_bus import OspiBus
+from .ospi_cache import OspiPrefetchCache
 from .ospi_config import OspiConfig
+from .ospi_coverage import OspiCoverage, merge_coverage
 from .ospi_flash import OspiFlash
+from .ospi_flash_model import OspiFlashModel
+from .ospi_log import LOG_BYTE, LOG_OFF, LOG_TRANSACTION
+from .ospi_monitor import OspiMonitor, OspiTraceRecord, read_trace
+from .ospi_options import OspiFlashOptions
+from .ospi_queue import OspiQueue, OspiTransaction
+from .ospi_random import OspiTrafficGenerator
+from .ospi_recorder import OspiFlightRecorder
+from .ospi_runner import OspiJob, OspiMatrixRunner, expand_matrix
+from .ospi_snapshot import OspiFlashSnapshot
+from .ospi_stats import OspiStats
+from .ospi_store import OspiPageStore
+from .ospi_timing import get_time_scale, set_time_scale
 
-__all__ = ["OspiBus", "OspiConfig", "OspiFlash"]
+__all__ = ["OspiArbiter", "OspiBackdoor", "OspiBus", "OspiConfig", "OspiCoverage", "OspiFlash", "OspiFlashModel", "OspiFlashOptions", "OspiFlashSnapshot", "OspiFlightRecorder", "OspiJob", "OspiMatrixRunner", "OspiMonitor", "OspiTraceRecord", "OspiPageStore", "OspiStats", "OspiPrefetchCache", "OspiQueue", "OspiTrafficGenerator", "OspiTransaction", "LOG_OFF", "LOG_TRANSACTION", "LOG_BYTE", "get_time_scale", "set_time_scale", "read_trace", "merge_coverage", "expand_matrix"]
@@ -0,0 +1,86 @@
+from collections import deque
+
+from cocotb.triggers import Event
+from cocotb.utils import get_sim_time
+
+
+class OspiArbiter:
+    def __init__(self, name='ospi_arbiter'):
+        """
+        Initialize the OspiArbiter object.
+
+        The arbiter time-multiplexes several devices, each with its own chip
+        select, on one shared IO bus. A device holds the bus for a whole
+        operation, including the status polling of its nested calls, and
+        waiting devices are granted the bus in request order. Ownership is
+        reentrant per device, so a device must not run operations from two
+        coroutines at once.
+
+        Parameters:
+        name -- Name of the arbiter, used in the grant events
+        """
+        self.name = name
+        self._waiting = deque()  # (device, grant event) in request order
+        self.owner = None  # Device currently holding the bus
+        self.depth = 0  # Nesting depth of the owner's claims
+        self.grants = {}  # Device -> times it was granted the bus
+        self.wait_ns = {}  # Device -> simulated ns spent waiting for the bus
+
+    async def acquire(self, device):
+        """
+        Claim the bus for a device, waiting while another device holds it.
+
+        Parameters:
+        device -- Device claiming the bus
+        """
+        if self.owner is device:
+            self.depth += 1
+            return
+        start = get_sim_time(units='ns')
+        if self.owner is None and not self._waiting:
+            self.owner = device
+            self.depth = 1
+        else:
+            granted = Event(f"{self.name}.grant")
+            self._waiting.append((device, granted))
+            await granted.wait()  # release() or abort() hands the bus over before setting the event
+        self.grants[device] = self.grants.get(device, 0) + 1
+        self.wait_ns[device] = self.wait_ns.get(device, 0) + get_sim_time(units='ns') - start
+
+    def release(self, device):
+        """
+        Drop one claim of a device; the bus is handed on when the outermost claim ends.
+
+        Parameters:
+        device -- Device releasing the bus
+        """
+        if self.owner is not device:
+            raise ValueError(f"Bus released by {device!r}, which does not hold it")
+        self.depth -= 1
+        if not self.depth:
+            self._grant_next()
+
+    def abort(self, device):
+        """
+        Drop every claim of a device whose operation was killed.
+
+        The bus is handed on if the device held it, and a pending request of
+        the device is withdrawn, so a killed coroutine never blocks the other
+        devices.
+
+        Parameters:
+        device -- Device whose claims are dropped
+        """
+        self._waiting = deque(entry for entry in self._waiting if entry[0] is not device)
+        if self.owner is device:
+            self.depth = 0
+            self._grant_next()
+
+    def _grant_next(self):
+        # Hand the bus to the longest-waiting device, or leave it free
+        if self._waiting:
+            self.owner, granted = self._waiting.popleft()
+            self.depth = 1
+            granted.set()
+        else:
+            self.owner = None
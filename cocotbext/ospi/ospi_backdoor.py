@@ -0,0 +1,203 @@
+import os
+from cocotbext.ospi.ospi_codec import mark_invalid, new_valid_bitmap
+
+# Image file formats accepted by read_image
+FORMAT_BINARY = 'binary'
+FORMAT_IHEX = 'ihex'
+FORMAT_SREC = 'srec'
+
+_EXTENSIONS = {
+    '.hex': FORMAT_IHEX, '.ihex': FORMAT_IHEX, '.ihx': FORMAT_IHEX,
+    '.srec': FORMAT_SREC, '.s19': FORMAT_SREC, '.s28': FORMAT_SREC, '.s37': FORMAT_SREC, '.mot': FORMAT_SREC,
+}
+
+
+def _coalesce(records):
+    # Merge (address, data) records that continue exactly where the previous one ended
+    segments = []
+    for address, data in records:
+        if segments and segments[-1][0] + len(segments[-1][1]) == address:
+            segments[-1][1].extend(data)
+        else:
+            segments.append((address, bytearray(data)))
+    return [(address, bytes(data)) for address, data in segments]
+
+
+def parse_ihex(text):
+    """
+    Parse Intel HEX text into contiguous segments.
+
+    Parameters:
+    text -- Contents of an Intel HEX file
+
+    Returns:
+    List of (address, bytes) tuples
+    """
+    records = []
+    base = 0  # Set by extended segment (02) and extended linear (04) address records
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith(':'):
+            raise ValueError(f"Intel HEX line {number} does not start with ':'")
+        record = bytes.fromhex(line[1:])
+        if len(record) < 5 or len(record) != record[0] + 5:
+            raise ValueError(f"Intel HEX line {number} has a bad length")
+        if sum(record) & 0xFF:
+            raise ValueError(f"Intel HEX line {number} has a bad checksum")
+        kind, data = record[3], record[4:-1]
+        if kind == 0x00:
+            records.append((base + int.from_bytes(record[1:3], 'big'), data))
+        elif kind == 0x01:
+            break  # End of file
+        elif kind == 0x02:
+            base = int.from_bytes(data, 'big') << 4
+        elif kind == 0x04:
+            base = int.from_bytes(data, 'big') << 16
+        # 03 and 05 (start address) records do not carry memory contents
+    return _coalesce(records)
+
+
+def parse_srec(text):
+    """
+    Parse Motorola S-record text into contiguous segments.
+
+    Parameters:
+    text -- Contents of an S-record file
+
+    Returns:
+    List of (address, bytes) tuples
+    """
+    records = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) < 4 or line[0] != 'S':
+            raise ValueError(f"S-record line {number} does not start with 'S'")
+        kind = line[1]
+        record = bytes.fromhex(line[2:])
+        if len(record) != record[0] + 1:
+            raise ValueError(f"S-record line {number} has a bad length")
+        if (sum(record) & 0xFF) != 0xFF:
+            raise ValueError(f"S-record line {number} has a bad checksum")
+        width = {'1': 2, '2': 3, '3': 4}.get(kind)  # Address bytes of the data records
+        if width is not None:
+            records.append((int.from_bytes(record[1:1 + width], 'big'), record[1 + width:-1]))
+        # S0 (header), S5/S6 (count) and S7-S9 (start address) records carry no memory contents
+    return _coalesce(records)
+
+
+def read_image(path, fmt=None):
+    """
+    Read an image file into contiguous segments.
+
+    Parameters:
+    path -- Image file path
+    fmt -- FORMAT_BINARY, FORMAT_IHEX or FORMAT_SREC; None picks the format from the file extension
+
+    Returns:
+    List of (address, bytes) tuples; raw binary images form one segment at address 0
+    """
+    if fmt is None:
+        fmt = _EXTENSIONS.get(os.path.splitext(str(path))[1].lower(), FORMAT_BINARY)
+    if fmt == FORMAT_BINARY:
+        with open(path, 'rb') as image_file:
+            return [(0, image_file.read())]
+    if fmt not in (FORMAT_IHEX, FORMAT_SREC):
+        raise ValueError(f"Unsupported image format: {fmt}")  # Raise error for unsupported formats
+    with open(path) as image_file:
+        text = image_file.read()
+    return parse_ihex(text) if fmt == FORMAT_IHEX else parse_srec(text)
+
+
+class OspiBackdoor:
+    def __init__(self, root, path='dut.memory', base_index=0):
+        """
+        Initialize the OspiBackdoor object.
+
+        The backdoor reads and writes a byte-wide memory array in the
+        simulated device directly through simulator handles, so no clock
+        cycles are spent. Writes take effect immediately.
+
+        Parameters:
+        root -- Handle the path is resolved from (usually the toplevel dut)
+        path -- Dot-separated hierarchical path of the memory array below root
+        base_index -- Array index holding byte address 0
+        """
+        memory = root
+        for name in path.split('.'):
+            memory = getattr(memory, name)  # Resolve the hierarchy one level at a time
+        self.memory = memory
+        self.path = path
+        self.base_index = base_index
+        self.size = len(memory)
+        self._cells = None  # Element handles, looked up once on first access
+
+    def _cell_handles(self):
+        if self._cells is None:
+            memory, base = self.memory, self.base_index
+            self._cells = [memory[base + index] for index in range(self.size)]
+        return self._cells
+
+    def _check(self, address, length):
+        if address < 0 or length < 0 or address + length > self.size:
+            raise ValueError(f"Backdoor access of {length} bytes at {address:#x} is outside {self.path}")
+
+    def write(self, address, data):
+        """
+        Write bytes into the memory array.
+
+        Parameters:
+        address -- Start address
+        data -- Data to write (bytes-like or iterable of ints)
+        """
+        data = bytes(data)
+        self._check(address, len(data))
+        cells = self._cell_handles()
+        for index, byte in enumerate(data, address):
+            cells[index].setimmediatevalue(byte)
+
+    def read(self, address, length):
+        """
+        Read bytes from the memory array.
+
+        Parameters:
+        address -- Start address
+        length -- Number of bytes to read
+
+        Returns:
+        Tuple of (bytes, validity bitmap) where cleared bitmap bits mark Z/X bytes
+        """
+        self._check(address, length)
+        cells = self._cell_handles()
+        buffer = bytearray(length)
+        valid = new_valid_bitmap(length)
+        for index in range(length):
+            value = cells[address + index].value
+            if value.is_resolvable:
+                buffer[index] = value.integer
+            else:
+                mark_invalid(valid, index)  # Uninitialised or X cell
+        return bytes(buffer), valid
+
+    def load(self, source, offset=0, fmt=None):
+        """
+        Load an image into the memory array.
+
+        Parameters:
+        source -- Bytes-like object, or a raw binary, Intel HEX or S-record file path
+        offset -- Address added to every image address
+        fmt -- Image format for file paths, None to pick it from the file extension
+
+        Returns:
+        List of (address, bytes) segments that were written
+        """
+        if isinstance(source, (str, os.PathLike)):
+            segments = [(address + offset, data) for address, data in read_image(source, fmt)]
+        else:
+            segments = [(offset, bytes(source))]
+        for address, data in segments:
+            self.write(address, data)
+        return segments
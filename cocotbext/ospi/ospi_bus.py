@@ -1,9 +1,14 @@
 import cocotb
-from cocotb.triggers import RisingEdge, Timer
 from cocotb.binary import BinaryValue
+from cocotb.clock import Clock
+from cocotbext.ospi.ospi_codec import encode, encode_byte, is_valid, mark_invalid, new_valid_bitmap, sample_lanes
+from cocotbext.ospi.ospi_config import OspiConfig
+from cocotbext.ospi.ospi_log import LOG_TRANSACTION, OspiTransactionLog
+from cocotbext.ospi.ospi_recorder import OspiFlightRecorder
+from cocotbext.ospi.ospi_stats import OspiStats
 
 class OspiBus:
-    def __init__(self, dut, clk, cs, io):
+    def __init__(self, dut, clk, cs, io, log_policy=LOG_TRANSACTION, config=None, recorder_depth=64):
         """
         Initialize the OspiBus object.
         
@@ -12,11 +17,79 @@ class OspiBus:
         clk -- Clock signal
         cs -- Chip Select signal
         io -- I/O signals
+        log_policy -- Logging policy: 'off', 'transaction' (default) or 'byte'
+        config -- OspiConfig describing the bus (defaults to OspiConfig())
+        recorder_depth -- Transactions kept by the flight recorder, 0 disables it
         """
         self.dut = dut  # Store reference to DUT
         self.clk = clk  # Store reference to clock
         self.cs = cs    # Store reference to chip select
-        self.io = io    # Store reference to I/O signals
+        self.io = io    # Store reference to I/O signals (the whole OSPI_IO vector)
+        self.release = BinaryValue('z' * 8, n_bits=8, bigEndian=False)  # Drive value that turns the lanes around
+        self.txn_log = OspiTransactionLog(dut._log, log_policy)  # Transaction-level logger
+        # Ring buffer of the last transactions, dumped on demand or when a check fails
+        self.recorder = OspiFlightRecorder(recorder_depth, log=dut._log) if recorder_depth else None
+        self.txn_log.recorder = self.recorder
+        # Counters per command, mode and phase; cheap enough to stay on, see OspiStats.enabled
+        self.stats = OspiStats()
+        self.txn_log.stats = self.stats
+        self._clock = None  # Task running the owned clock, see start_clock()
+        self.configure(config if config is not None else OspiConfig())
+
+    @classmethod
+    def from_prefix(cls, dut, prefix='OSPI', cs_name=None, **kwargs):
+        """
+        Create a bus from the <prefix>_CLK, <prefix>_CS and <prefix>_IO signals of dut.
+        
+        Parameters:
+        dut -- Device Under Test (DUT) reference
+        prefix -- Signal name prefix, e.g. 'OSPI' or 'OSPI1'
+        cs_name -- Name of another chip select on the same bus (e.g. 'OSPI_CS1' for a second die)
+        kwargs -- Remaining OspiBus arguments
+        """
+        return cls(dut, getattr(dut, f"{prefix}_CLK"), getattr(dut, cs_name or f"{prefix}_CS"),
+                   getattr(dut, f"{prefix}_IO"), **kwargs)
+
+    def configure(self, config):
+        """
+        Compile a configuration into the profile used by every transaction.
+        
+        Parameters:
+        config -- OspiConfig describing the bus
+        """
+        self.config = config
+        self.profile = config.compile(self.clk)  # Lane maps, opcodes, phase lengths, triggers and CS levels
+        self.rising_edge = self.profile.sample_edge  # Sampling edge, rising unless CPOL != CPHA
+        self.any_edge = self.profile.any_edge  # Both clock edges, used by the DTR transfers
+
+    def start_clock(self):
+        """Start driving the clock at config.sclk_freq, idling at the CPOL level (restarts a running clock)."""
+        self.stop_clock()
+        clock = Clock(self.clk, self.profile.period_ps, units='ps')
+        self._clock = cocotb.start_soon(clock.start(start_high=bool(self.profile.cpol)))
+
+    def stop_clock(self):
+        """Stop the clock started by start_clock()."""
+        if self._clock is not None:
+            self._clock.kill()
+            self._clock = None
+
+    @property
+    def log_policy(self):
+        return self.txn_log.policy
+
+    @log_policy.setter
+    def log_policy(self, policy):
+        self.txn_log.policy = policy
+
+    @property
+    def coverage(self):
+        """OspiCoverage binning every transaction, or None (the default) for no coverage."""
+        return self.txn_log.coverage
+
+    @coverage.setter
+    def coverage(self, coverage):
+        self.txn_log.coverage = coverage
 
     def assign_io_signals(self, byte, mode):
         """
@@ -26,25 +99,8 @@ class OspiBus:
         byte -- Byte value to assign to I/O signals
         mode -- Mode determining how to assign bits to I/O signals
         """
-        if mode == 0:
-            # Single IO mode - all 8 bits go to OSPI_IO
-            self.dut.OSPI_IO.value = byte  # Directly assign byte to OSPI_IO
-        elif mode == 1:
-            # Dual IO mode - 4 bits in lower half, 4 bits in upper half
-            self.dut.OSPI_IO.value = ((byte & 0xF0) >> 4) | ((byte & 0x0F) << 4)
-        elif mode == 2:
-            # Quad IO mode - 2 bits in each quarter
-            self.dut.OSPI_IO.value = (
-                ((byte & 0xC0) >> 6) |   # Top 2 bits to OSPI_IO[0]
-                ((byte & 0x30) >> 2) |   # Next 2 bits to OSPI_IO[1]
-                ((byte & 0x0C) << 2) |   # Next 2 bits to OSPI_IO[2]
-                ((byte & 0x03) << 6)     # Bottom 2 bits to OSPI_IO[3]
-            )
-        elif mode == 3:
-            # Octal IO mode - reverse the bits
-            self.dut.OSPI_IO.value = int(f"{byte:08b}"[::-1], 2)
-        else:
-            raise ValueError(f"Unsupported mode: {mode}")  # Raise error for unsupported modes
+        # Table lookup replaces the per-mode mask-and-shift chains (raises ValueError for unsupported modes)
+        self.io.value = encode_byte(byte, mode)
 
     async def send_command(self, command, mode):
         """
@@ -54,12 +110,13 @@ class OspiBus:
         command -- Command to send
         mode -- Mode for how to send the command
         """
-        lanes = self.get_lanes(mode)  # Get active lanes based on mode
-        command_bits = BinaryValue(command, n_bits=8, bigEndian=False)  # Convert command to BinaryValue
-        self.dut._log.info(f"Sending command {command_bits.binstr} on lanes {lanes} in mode {mode}")
+        if self.txn_log.byte_enabled():
+            self.dut._log.debug("Sending command %s on lanes %s in mode %d", format(command, '08b'), self.get_lanes(mode), mode)
 
-        self.assign_io_signals(command_bits.integer, mode)  # Assign command byte to IO signals
-        await RisingEdge(self.clk)  # Wait for the rising edge of the clock
+        mark = self.stats.mark()
+        self.assign_io_signals(command, mode)  # Assign command byte to IO signals
+        await self.rising_edge  # Wait for the rising edge of the clock
+        self.stats.phase('command', mark, 1)
 
     async def write(self, command, address, data, mode=0):
         """
@@ -71,10 +128,13 @@ class OspiBus:
         data -- Data to write
         mode -- Mode for how to send the data
         """
-        self.dut._log.info(f"Write operation: Command: {command}, Address: {address}, Data: {data}, Mode: {mode}")
-        await self.send_command(command, mode)  # Send the command
-        await self.send_address(address, mode)  # Send the address
-        await self.send_data(data, mode)  # Send the data
+        start = self.txn_log.begin()
+        try:
+            await self.send_command(command, mode)  # Send the command
+            await self.send_address(address, mode)  # Send the address
+            await self.send_data(data, mode)  # Send the data
+        finally:
+            self.txn_log.end(start, 'write', command, address, mode, len(data), data)
 
     async def read(self, command, address, mode, length):
         """
@@ -86,11 +146,32 @@ class OspiBus:
         mode -- Mode for how to receive the data
         length -- Length of data to read
         """
-        self.dut._log.info(f"Read operation: Command: {command}, Address: {address}, Length: {length}, Mode: {mode}")
-        await self.send_command(command, mode)  # Send the command
-        await self.send_address(address, mode)  # Send the address
-        data = await self.receive_data(mode, length)  # Receive the data
-        return data  # Return the received data
+        data, valid = await self.read_bytes(command, address, mode, length)
+        return self._to_binary_values(data, valid)  # Return the received data
+
+    async def read_bytes(self, command, address, mode, length):
+        """
+        Perform a read operation across lanes into a bytes buffer.
+        
+        Parameters:
+        command -- Command to initiate the read operation
+        address -- Address to read data from
+        mode -- Mode for how to receive the data
+        length -- Length of data to read
+
+        Returns:
+        Tuple of (bytes, validity bitmap) where cleared bitmap bits mark Z/X bytes
+        """
+        start = self.txn_log.begin()
+        data = None
+        try:
+            await self.send_command(command, mode)  # Send the command
+            await self.send_address(address, mode)  # Send the address
+            await self.send_dummy(self.profile.dummy_cycles.get(command, 0))  # Wait out the dummy cycles
+            data, valid = await self.receive_bytes(mode, length)  # Receive the data
+        finally:
+            self.txn_log.end(start, 'read', command, address, mode, length, data)
+        return data, valid
 
     async def erase(self, command, address, mode=0):
         """
@@ -101,11 +182,37 @@ class OspiBus:
         address -- Address to erase
         mode -- Mode for how to perform the erase
         """
-        self.dut._log.info(f"Erase operation: Command: {command}, Address: {address}, Mode: {mode}")
-        self.cs.value = 0  # Assert chip select
-        await self.send_command(command, mode)  # Send the command
-        await self.send_address(address, mode)  # Send the address
-        self.cs.value = 1  # Deassert chip select
+        start = self.txn_log.begin()
+        try:
+            self.cs.value = self.profile.cs_active  # Assert chip select
+            await self.send_command(command, mode)  # Send the command
+            await self.send_address(address, mode)  # Send the address
+            self.cs.value = self.profile.cs_inactive  # Deassert chip select
+        finally:
+            self.txn_log.end(start, 'erase', command, address, mode, 0)
+
+    async def read_register(self, command, mode=0, length=1):
+        """
+        Read a register such as the status register: a command phase with no address,
+        followed by data driven by the device.
+        
+        Parameters:
+        command -- Register read command (e.g. 0x05 for the status register)
+        mode -- Mode for how to send the command and receive the data
+        length -- Number of register bytes to read
+
+        Returns:
+        Tuple of (bytes, validity bitmap) where cleared bitmap bits mark Z/X bytes
+        """
+        start = self.txn_log.begin()
+        data = None
+        try:
+            await self.send_command(command, mode)  # Send the command
+            self.io.value = self.release  # Stop driving so the device can answer
+            data, valid = await self.receive_bytes(mode, length)  # Receive the register
+        finally:
+            self.txn_log.end(start, 'read_register', command, None, mode, length, data)
+        return data, valid
 
     async def send_byte(self, byte, mode):
         """
@@ -116,58 +223,208 @@ class OspiBus:
         mode -- Mode for how to send the byte
         """
         if isinstance(byte, BinaryValue):
-            byte_value = byte  # Use existing BinaryValue if provided
-        else:
-            byte_value = BinaryValue(byte, n_bits=8, bigEndian=False)  # Convert to BinaryValue if not provided
-        self.dut._log.info(f"Sending byte {byte_value.binstr} in mode {mode}")
+            byte = byte.integer  # Unwrap an existing BinaryValue if provided
+        if self.txn_log.byte_enabled():
+            self.dut._log.debug("Sending byte %s in mode %d", format(byte, '08b'), mode)
 
-        self.assign_io_signals(byte_value.integer, mode)  # Assign byte to IO signals
-        await RisingEdge(self.clk)  # Wait for the rising edge of the clock
+        self.assign_io_signals(byte, mode)  # Assign byte to IO signals
+        await self.rising_edge  # Wait for the rising edge of the clock
 
     async def send_address(self, address, mode):
         """
-        Send an address byte-by-byte.
+        Send an address byte-by-byte, config.address_bytes bytes long.
         
         Parameters:
         address -- Address to send
         mode -- Mode for how to send the address
         """
+        address_bytes = self._address_bytes(address)
+        if self.txn_log.byte_enabled():
+            self.dut._log.debug("Sending address %s in mode %d", address_bytes.hex(), mode)
+
+        mark = self.stats.mark()
+        for byte in address_bytes:  # 3 or 4 bytes, most significant first
+            await self.send_byte(byte, mode)  # Send each byte
+        self.stats.phase('address', mark, len(address_bytes))
+
+    def _address_bytes(self, address):
+        """
+        Convert an address to its big-endian wire representation of config.address_bytes bytes.
+        
+        Parameters:
+        address -- Address as an int or a list/tuple of bytes
+        """
         if isinstance(address, (list, tuple)):
             # Convert list/tuple of bytes to a single integer
-            address = int(''.join(format(x, '08b') for x in address), 2)
-        address_value = BinaryValue(address, n_bits=32, bigEndian=False)  # Convert address to BinaryValue
-        self.dut._log.info(f"Sending address {address_value.binstr} in mode {mode}")
+            address = int.from_bytes(bytes(address), 'big')
+        width = self.profile.address_bytes
+        if not 0 <= address < 1 << (8 * width):
+            raise ValueError(f"Address {address:#x} does not fit in {width} address bytes")
+        return address.to_bytes(width, 'big')
 
-        for i in range(4):  # Assuming a 32-bit address, send in 4 bytes
-            byte = (address >> (24 - 8 * i)) & 0xFF  # Extract each byte from the address
-            await self.send_byte(byte, mode)  # Send each byte
+    async def send_dummy(self, cycles):
+        """
+        Run the dummy phase: release the lanes for the bus turnaround and wait out the cycles.
+        
+        Parameters:
+        cycles -- Number of dummy clock cycles (0 skips the phase)
+        """
+        if not cycles:
+            return
+        if self.txn_log.byte_enabled():
+            self.dut._log.debug("Sending %d dummy cycles", cycles)
+        mark = self.stats.mark()
+        self.io.value = self.release  # Stop driving so the device can take the bus
+        for _ in range(cycles):
+            await self.rising_edge
+        self.stats.phase('dummy', mark, cycles)
 
     async def send_data(self, data, mode):
         """
         Send data byte-by-byte.
         
         Parameters:
-        data -- Data to send
+        data -- Data to send (bytes-like, ints or resolvable BinaryValue objects)
+        mode -- Mode for how to send the data
+        """
+        await self._send_data(data, mode, self.rising_edge)
+
+    async def _send_data(self, data, mode, edge, phase='data'):
+        """
+        Send data one lane-ordered byte per clock edge.
+        
+        Parameters:
+        data -- Data to send: bytes-like, or an iterable of ints or resolvable BinaryValue objects
         mode -- Mode for how to send the data
+        edge -- Trigger to wait for after each byte (rising edge for SDR, any edge for DTR)
+        phase -- Phase the edges are counted under
         """
-        self.dut._log.info(f"Sending data {data} in mode {mode}")
-        for byte in data:
-            await self.send_byte(byte, mode)  # Send each byte of data
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(map(int, data))  # Normalised once per buffer; Z/X items raise ValueError here
+        byte_debug = self.txn_log.byte_enabled()  # Checked once per transfer, not per byte
+        mark = self.stats.mark()
+        for byte, value in zip(data, encode(data, mode)):  # Encode the whole buffer in one call
+            if byte_debug:
+                self.dut._log.debug("Sending byte %s in mode %d", format(byte, '08b'), mode)
+            self.io.value = value  # Drive the lane-ordered byte
+            await edge  # Wait for the clock edge
+        self.stats.phase(phase, mark, len(data))
 
     async def receive_data(self, mode, length):
         """
-        Receive data byte-by-byte.
+        Receive data byte-by-byte as a list of BinaryValue objects.
+
+        This is the list-based wrapper around receive_bytes, kept for existing
+        callers. Bytes that were not driven are returned as all-'x' values.
         
         Parameters:
         mode -- Mode for how to receive the data
         length -- Length of data to receive
         """
-        self.dut._log.info(f"Receiving data of length {length} in mode {mode}")
-        data = []
-        for _ in range(length):
-            byte = await self.receive_byte(mode)  # Receive each byte
-            data.append(byte)  # Append received byte to data list
-        return data  # Return the received data
+        data, valid = await self.receive_bytes(mode, length)
+        return self._to_binary_values(data, valid)
+
+    @staticmethod
+    def _to_binary_values(data, valid):
+        """
+        Convert a received buffer and its validity bitmap into a list of BinaryValue objects.
+        
+        Parameters:
+        data -- Received bytes
+        valid -- Validity bitmap for data
+        """
+        return [
+            BinaryValue(byte, n_bits=8, bigEndian=False) if is_valid(valid, index)
+            else BinaryValue('x' * 8, n_bits=8, bigEndian=False)
+            for index, byte in enumerate(data)
+        ]
+
+    async def receive_bytes(self, mode, length):
+        """
+        Receive data into a freshly allocated buffer.
+        
+        Parameters:
+        mode -- Mode for how to receive the data
+        length -- Length of data to receive
+
+        Returns:
+        Tuple of (bytes, validity bitmap) where cleared bitmap bits mark Z/X bytes
+        """
+        return await self._receive_bytes(mode, length, self.rising_edge)
+
+    async def _receive_bytes(self, mode, length, edge):
+        """
+        Allocate a buffer for the transfer and fill it with the receive engine.
+        
+        Parameters:
+        mode -- Mode for how to receive the data
+        length -- Length of data to receive
+        edge -- Trigger to sample on (rising edge for SDR, any edge for DTR)
+        """
+        buffer = bytearray(length)  # Preallocated once for the whole transfer
+        valid = await self._receive_into(buffer, mode, edge)
+        return bytes(buffer), valid
+
+    async def receive_into(self, buffer, mode):
+        """
+        Receive len(buffer) bytes directly into a caller-supplied writable buffer.
+
+        The whole OSPI_IO vector is sampled once per rising edge and the active
+        lanes IO[lanes-1:0] are shifted in most significant bits first, so a byte
+        takes 8 / lanes edges: one in octal, two in quad, four in dual and eight
+        in single mode.
+        
+        Parameters:
+        buffer -- bytearray or writable memoryview to fill
+        mode -- Mode for how to receive the data
+
+        Returns:
+        Validity bitmap where cleared bits mark Z/X bytes
+        """
+        return await self._receive_into(buffer, mode, self.rising_edge)
+
+    async def _receive_into(self, buffer, mode, edge):
+        """
+        Receive engine shared by the SDR and DTR transfers.
+        
+        Parameters:
+        buffer -- bytearray or writable memoryview to fill
+        mode -- Mode for how to receive the data
+        edge -- Trigger to sample on (rising edge for SDR, any edge for DTR)
+        """
+        view = memoryview(buffer)
+        length = len(view)
+        lanes = len(self.get_lanes(mode))  # Number of active lanes (validates the mode)
+        beats = 8 // lanes  # Edges per byte
+        mask = (1 << lanes) - 1
+        io = self.io
+        byte_debug = self.txn_log.byte_enabled()  # Checked once per transfer, not per byte
+        if byte_debug:
+            self.dut._log.debug("Receiving data of length %d in mode %d", length, mode)
+        valid = new_valid_bitmap(length)
+        mark = self.stats.mark()
+        for index in range(length):
+            byte = 0
+            resolvable = True
+            for _ in range(beats):
+                await edge  # Wait for the sampling edge of the clock
+                sample = io.value  # One handle read for all lanes
+                if sample.is_resolvable:
+                    bits = sample.integer & mask
+                else:
+                    bits = sample_lanes(sample, lanes)  # Inactive lanes may legitimately float
+                    if bits is None:
+                        resolvable = False
+                        bits = 0
+                byte = (byte << lanes) | bits
+            if resolvable:
+                view[index] = byte
+            else:
+                mark_invalid(valid, index)  # Leave the buffer byte at 0 and flag it
+            if byte_debug:
+                self.dut._log.debug("Received byte: %s", format(byte, '08b') if resolvable else 'xxxxxxxx')
+        self.stats.phase('data', mark, length * beats)
+        return valid
 
     async def receive_byte(self, mode):
         """
@@ -176,16 +433,128 @@ class OspiBus:
         Parameters:
         mode -- Mode for how to receive the byte
         """
-        byte = BinaryValue(n_bits=8, bigEndian=False)  # Initialize BinaryValue to store received byte
-        lanes = self.get_lanes(mode)  # Get active lanes based on mode
-        for bit_position in range(8):
-            await RisingEdge(self.clk)  # Wait for the rising edge of the clock
-            bit_value = 0
-            for lane in lanes:
-                bit_value = self.io[lane].value  # Read bit value from each lane
-            byte[bit_position] = int(bit_value)  # Assign bit value to byte
-        self.dut._log.info(f"Received byte: {byte.binstr}")  # Log received byte
-        return byte  # Return the received byte
+        buffer = bytearray(1)
+        valid = await self.receive_into(buffer, mode)
+        if is_valid(valid, 0):
+            return BinaryValue(buffer[0], n_bits=8, bigEndian=False)  # Return the received byte
+        return BinaryValue('x' * 8, n_bits=8, bigEndian=False)  # Byte was not fully driven
+
+    async def send_command_dtr(self, command, mode=3):
+        """
+        Send a command on both clock edges (DTR).
+
+        As in the xSPI 8D-8D-8D protocol the opcode is followed by its inverted
+        command extension, so the command phase takes one SCLK period in octal DTR.
+        
+        Parameters:
+        command -- Command to send
+        mode -- Mode for how to send the command
+        """
+        if self.txn_log.byte_enabled():
+            self.dut._log.debug("Sending DTR command %s in mode %d", format(command, '08b'), mode)
+        await self._send_data((command, command ^ 0xFF), mode, self.any_edge, 'command')
+
+    async def send_address_dtr(self, address, mode=3):
+        """
+        Send a config.address_bytes address on both clock edges (DTR).
+        
+        Parameters:
+        address -- Address to send
+        mode -- Mode for how to send the address
+        """
+        await self._send_data(self._address_bytes(address), mode, self.any_edge, 'address')
+
+    async def send_data_dtr(self, data, mode=3):
+        """
+        Send data on both clock edges (DTR), two bytes per SCLK period.
+        
+        Parameters:
+        data -- Data to send (bytes-like, ints or resolvable BinaryValue objects)
+        mode -- Mode for how to send the data
+        """
+        await self._send_data(data, mode, self.any_edge)
+
+    async def receive_data_dtr(self, mode, length):
+        """
+        Receive data on both clock edges (DTR) as a list of BinaryValue objects.
+        
+        Parameters:
+        mode -- Mode for how to receive the data
+        length -- Length of data to receive
+        """
+        data, valid = await self.receive_bytes_dtr(mode, length)
+        return self._to_binary_values(data, valid)
+
+    async def receive_bytes_dtr(self, mode, length):
+        """
+        Receive data on both clock edges (DTR) into a freshly allocated buffer.
+        
+        Parameters:
+        mode -- Mode for how to receive the data
+        length -- Length of data to receive
+
+        Returns:
+        Tuple of (bytes, validity bitmap) where cleared bitmap bits mark Z/X bytes
+        """
+        return await self._receive_bytes(mode, length, self.any_edge)
+
+    async def receive_into_dtr(self, buffer, mode):
+        """
+        Receive len(buffer) bytes on both clock edges (DTR) into a caller-supplied buffer.
+
+        Lanes are sampled as in receive_into, but on every clock edge, so an
+        octal DTR transfer moves two bytes per SCLK period.
+        
+        Parameters:
+        buffer -- bytearray or writable memoryview to fill
+        mode -- Mode for how to receive the data
+
+        Returns:
+        Validity bitmap where cleared bits mark Z/X bytes
+        """
+        return await self._receive_into(buffer, mode, self.any_edge)
+
+    async def write_dtr(self, command, address, data, mode=3):
+        """
+        Perform a DTR write operation, using both clock edges in every phase.
+        
+        Parameters:
+        command -- Command to initiate the write operation
+        address -- Address to write data to
+        data -- Data to write
+        mode -- Mode for how to send the data
+        """
+        start = self.txn_log.begin()
+        try:
+            await self.send_command_dtr(command, mode)  # Send the command
+            await self.send_address_dtr(address, mode)  # Send the address
+            await self.send_data_dtr(data, mode)  # Send the data
+        finally:
+            self.txn_log.end(start, 'write_dtr', command, address, mode, len(data), data)
+
+    async def read_bytes_dtr(self, command, address, mode, length):
+        """
+        Perform a DTR read operation, using both clock edges in every phase.
+        
+        Parameters:
+        command -- Command to initiate the read operation
+        address -- Address to read data from
+        mode -- Mode for how to receive the data
+        length -- Length of data to read
+
+        Returns:
+        Tuple of (bytes, validity bitmap) where cleared bitmap bits mark Z/X bytes
+        """
+        start = self.txn_log.begin()
+        data = None
+        try:
+            await self.send_command_dtr(command, mode)  # Send the command
+            await self.send_address_dtr(address, mode)  # Send the address
+            await self.send_dummy(self.profile.dummy_cycles.get(command, 0))  # Wait out the dummy cycles
+            data, valid = await self.receive_bytes_dtr(mode, length)  # Receive the data
+        finally:
+            self.txn_log.end(start, 'read_dtr', command, address, mode, length, data)
+        return data, valid
 
     def get_lanes(self, mode):
         """
@@ -195,16 +564,9 @@ class OspiBus:
         mode -- Mode for how to determine active lanes
         
         Returns:
-        List of active lanes
-        """
-        if mode == 0:
-            return [0]  # Single-lane mode
-        elif mode == 1:
-            return [0, 1]  # Dual-lane mode
-        elif mode == 2:
-            return [0, 1, 2, 3]  # Quad-lane mode
-        elif mode == 3:
-            return [0, 1, 2, 3, 4, 5, 6, 7]  # Octal-lane mode
-        else:
+        Tuple of active lanes from the profile's lane map
+        """
+        if mode not in (0, 1, 2, 3):
             raise ValueError(f"Unsupported mode: {mode}")  # Raise error for unsupported modes
+        return self.profile.lanes[mode]
 
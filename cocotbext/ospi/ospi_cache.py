@@ -0,0 +1,95 @@
+from collections import OrderedDict
+
+
+class OspiPrefetchCache:
+    def __init__(self, line_size=32, lines=64, prefetch=1):
+        """
+        Initialize the OspiPrefetchCache object.
+
+        The cache holds line-aligned blocks of read data with least recently
+        used eviction. On a miss the driver fetches the missing line plus up
+        to `prefetch` following lines in one continuous read.
+
+        Parameters:
+        line_size -- Line size in bytes
+        lines -- Number of lines held before the least recently used one is evicted
+        prefetch -- Lines fetched ahead of a missing line
+        """
+        if line_size <= 0 or lines <= 0 or prefetch < 0:
+            raise ValueError("Cache line size and line count must be positive, prefetch must not be negative")
+        self.line_size = line_size
+        self.capacity = lines
+        self.prefetch = prefetch
+        self._lines = OrderedDict()  # Line address -> bytes, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __contains__(self, address):
+        return address in self._lines
+
+    @property
+    def hit_rate(self):
+        """Fraction of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset_stats(self):
+        """Clear the hit, miss and eviction counters."""
+        self.hits = self.misses = self.evictions = 0
+
+    def line_address(self, address):
+        """Return the address of the line holding `address`."""
+        return address - address % self.line_size
+
+    def lookup(self, address):
+        """
+        Return the cached line at a line-aligned address, or None on a miss.
+
+        Parameters:
+        address -- Line address
+        """
+        data = self._lines.get(address)
+        if data is None:
+            self.misses += 1
+            return None
+        self._lines.move_to_end(address)  # Most recently used
+        self.hits += 1
+        return data
+
+    def insert(self, address, data):
+        """
+        Insert a line, evicting the least recently used line when the cache is full.
+
+        Parameters:
+        address -- Line address
+        data -- line_size bytes
+        """
+        self._lines[address] = bytes(data)
+        self._lines.move_to_end(address)
+        while len(self._lines) > self.capacity:
+            self._lines.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, address=0, length=None):
+        """
+        Drop every line overlapping a region.
+
+        Parameters:
+        address -- Start address
+        length -- Number of bytes, or None to drop every line
+        """
+        if length is None:
+            self._lines.clear()
+            return
+        first = self.line_address(address)
+        end = address + length
+        if (end - first) // self.line_size > len(self._lines):
+            stale = [line for line in self._lines if first <= line < end]  # Fewer cached lines than region lines
+        else:
+            stale = range(first, end, self.line_size)
+        for line in stale:
+            self._lines.pop(line, None)
@@ -0,0 +1,206 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, batch APIs fall back to bytes.translate
+    np = None
+
+# Operating modes understood by the codec (single, dual, quad, octal)
+MODES = (0, 1, 2, 3)
+
+
+def _lane_swizzle(byte, mode):
+    """
+    Compute the lane-ordered value of a byte for the given mode.
+
+    The byte is split into one group of 8 / lanes bits per lane, most
+    significant group first, and group k is placed on OSPI_IO[k * width +: width].
+
+    Parameters:
+    byte -- Byte value to swizzle
+    mode -- Mode determining the number of lanes
+    """
+    width = 8 >> mode  # Bits carried per lane
+    mask = (1 << width) - 1
+    value = 0
+    for group in range(1 << mode):
+        bits = (byte >> (8 - width * (group + 1))) & mask  # Group k counted from the MSB
+        value |= bits << (width * group)
+    return value
+
+
+def _invert(table):
+    """
+    Build the inverse of a 256-entry permutation table.
+
+    Parameters:
+    table -- Encode table to invert
+    """
+    inverse = bytearray(256)
+    for byte, encoded in enumerate(table):
+        inverse[encoded] = byte
+    return bytes(inverse)
+
+
+def _serial_beats(byte, mode):
+    """
+    Split a byte into the beats that carry it on IO[lanes-1:0], most significant bits first.
+
+    Parameters:
+    byte -- Byte value to split
+    mode -- Mode determining the number of lanes
+    """
+    lanes = 1 << mode
+    mask = (1 << lanes) - 1
+    return tuple((byte >> (8 - lanes * (beat + 1))) & mask for beat in range(8 // lanes))
+
+
+# 256-entry lookup tables per mode, computed once at import
+ENCODE_TABLES = tuple(bytes(_lane_swizzle(byte, mode) for byte in range(256)) for mode in MODES)
+DECODE_TABLES = tuple(_invert(table) for table in ENCODE_TABLES)
+SERIAL_BEATS = tuple(tuple(_serial_beats(byte, mode) for byte in range(256)) for mode in MODES)
+
+if np is not None:
+    _NP_ENCODE_TABLES = tuple(np.frombuffer(table, dtype=np.uint8) for table in ENCODE_TABLES)
+    _NP_DECODE_TABLES = tuple(np.frombuffer(table, dtype=np.uint8) for table in DECODE_TABLES)
+else:
+    _NP_ENCODE_TABLES = _NP_DECODE_TABLES = None
+
+
+def _check_mode(mode):
+    if mode not in MODES:
+        raise ValueError(f"Unsupported mode: {mode}")  # Raise error for unsupported modes
+
+
+def encode_byte(byte, mode):
+    """
+    Return the OSPI_IO value that carries a single byte in the given mode.
+
+    Parameters:
+    byte -- Byte value to encode
+    mode -- Mode determining how bits are assigned to I/O lanes
+    """
+    _check_mode(mode)
+    return ENCODE_TABLES[mode][byte]
+
+
+def decode_byte(value, mode):
+    """
+    Return the byte carried by an OSPI_IO value in the given mode.
+
+    Parameters:
+    value -- Lane-ordered value sampled from OSPI_IO
+    mode -- Mode determining how bits were assigned to I/O lanes
+    """
+    _check_mode(mode)
+    return DECODE_TABLES[mode][value]
+
+
+def sample_lanes(sample, lanes):
+    """
+    Extract the active lanes IO[lanes-1:0] from a sampled I/O vector.
+
+    Parameters:
+    sample -- BinaryValue read from the I/O vector
+    lanes -- Number of active lanes
+
+    Returns:
+    Integer value of the active lanes, or None if any active lane is Z/X
+    """
+    if sample.is_resolvable:
+        return sample.integer & ((1 << lanes) - 1)
+    bits = sample.binstr[-lanes:]  # binstr is MSB first, active lanes are the low bits
+    if bits.strip('01'):
+        return None  # Inactive lanes may legitimately float, active ones may not
+    return int(bits, 2)
+
+
+def _translate(data, tables, np_tables, mode):
+    _check_mode(mode)
+    if np is not None and isinstance(data, np.ndarray):
+        return np_tables[mode][data]  # Vectorised table lookup, keeps the array type
+    if isinstance(data, bytearray):
+        return data.translate(tables[mode])
+    return bytes(data).translate(tables[mode])  # bytes, memoryview or an iterable of ints
+
+
+def encode(data, mode):
+    """
+    Encode a whole buffer into lane order in one call.
+
+    Parameters:
+    data -- bytes, bytearray, memoryview, iterable of ints or NumPy uint8 array
+    mode -- Mode determining how bits are assigned to I/O lanes
+
+    Returns:
+    Encoded buffer (bytearray for bytearray input, NumPy array for NumPy input, bytes otherwise)
+    """
+    return _translate(data, ENCODE_TABLES, _NP_ENCODE_TABLES, mode)
+
+
+def decode(data, mode):
+    """
+    Decode a whole lane-ordered buffer back into bytes in one call.
+
+    Parameters:
+    data -- bytes, bytearray, memoryview, iterable of ints or NumPy uint8 array
+    mode -- Mode determining how bits were assigned to I/O lanes
+
+    Returns:
+    Decoded buffer (bytearray for bytearray input, NumPy array for NumPy input, bytes otherwise)
+    """
+    return _translate(data, DECODE_TABLES, _NP_DECODE_TABLES, mode)
+
+
+def new_valid_bitmap(length):
+    """
+    Allocate a validity bitmap for a transfer with every byte marked valid.
+
+    Bit i (LSB first within each bitmap byte) is set when byte i of the
+    transfer was driven to a resolvable value, and cleared for Z/X bytes.
+
+    Parameters:
+    length -- Number of bytes covered by the bitmap
+    """
+    bitmap = bytearray(b'\xff') * ((length + 7) >> 3)
+    if length & 7:
+        bitmap[-1] = (1 << (length & 7)) - 1  # Clear bits past the end of the transfer
+    return bitmap
+
+
+def mark_invalid(bitmap, index):
+    """
+    Flag byte `index` of a transfer as Z/X in its validity bitmap.
+
+    Parameters:
+    bitmap -- Validity bitmap returned by new_valid_bitmap
+    index -- Byte position within the transfer
+    """
+    bitmap[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+
+def is_valid(bitmap, index):
+    """
+    Return True if byte `index` of a transfer was driven to a resolvable value.
+
+    Parameters:
+    bitmap -- Validity bitmap returned by new_valid_bitmap
+    index -- Byte position within the transfer
+    """
+    return bool(bitmap[index >> 3] & (1 << (index & 7)))
+
+
+def invalid_indices(bitmap, length):
+    """
+    Return the positions of all Z/X bytes recorded in a validity bitmap.
+
+    Parameters:
+    bitmap -- Validity bitmap returned by new_valid_bitmap
+    length -- Number of bytes covered by the bitmap
+    """
+    full = new_valid_bitmap(length)
+    indices = []
+    for offset, (bits, expected) in enumerate(zip(bitmap, full)):
+        if bits != expected:  # Only walk bitmap bytes that contain invalid entries
+            for bit in range(8):
+                if expected & ~bits & (1 << bit):
+                    indices.append((offset << 3) + bit)
+    return indices
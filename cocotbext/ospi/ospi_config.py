@@ -1,13 +1,120 @@
+from types import MappingProxyType
+from cocotb.triggers import Edge, FallingEdge, RisingEdge
+
+# Dummy cycles between the address and data phases, per read command
+DEFAULT_DUMMY_CYCLES = {
+    0x0B: 8,   # Fast read
+    0x3B: 8,   # Dual output fast read
+    0xBB: 4,   # Dual I/O fast read
+    0x6B: 8,   # Quad output fast read
+    0xEB: 6,   # Quad I/O fast read
+    0x8B: 8,   # Octal output fast read
+    0xCB: 16,  # Octal I/O fast read
+    0xEE: 16,  # Octal DTR read
+}
+
+# Command opcode per operation and mode (0-3: single, dual, quad, octal)
+DEFAULT_COMMANDS = {
+    'write': {0: 0x02, 1: 0xA2, 2: 0x32, 3: 0x38},      # Page program
+    'write_dtr': {3: 0x12},                             # Octal DTR page program
+    'read': {0: 0x03, 1: 0xBB, 2: 0xEB, 3: 0x0B},       # Read
+    'read_dtr': {3: 0xEE},                              # Octal DTR read
+    'fast_read': {0: 0x0B, 1: 0x3B, 2: 0x6B, 3: 0x8B},  # Fast read with single, dual, quad or octal output
+    'xip_read': {0: 0x0B, 1: 0xBB, 2: 0xEB, 3: 0xCB},   # Fast read I/O used for continuous reads
+    'erase': {0: 0x20, 1: 0xD8, 2: 0xC7},               # Sector, block and chip erase
+    'read_status': {0: 0x05, 1: 0x05, 2: 0x05, 3: 0x05},  # Read status register
+}
+
+# Mode bits sent after the address of xip_read to keep the device in continuous read mode
+XIP_MODE_BITS = 0xA5
+
+# Bus width names and the mode they select
+BUS_WIDTHS = {'single': 0, 'dual': 1, 'quad': 2, 'octal': 3}
+
+
 class OspiConfig:
-    def __init__(self, word_width, sclk_freq, cpol, cpha, cs_active_low, bus_width='octal'):
+    def __init__(self, word_width=8, sclk_freq=50e6, cpol=0, cpha=0, cs_active_low=True, bus_width='octal',
+                 address_bytes=3, dummy_cycles=None, commands=None):
+        if address_bytes not in (3, 4):
+            raise ValueError(f"Unsupported address width: {address_bytes} bytes")  # Raise error for unsupported widths
+        if bus_width not in BUS_WIDTHS:
+            raise ValueError(f"Unsupported bus width: {bus_width}")  # Raise error for unsupported widths
         self.word_width = word_width  # Data width in bits
         self.sclk_freq = sclk_freq    # Serial clock frequency
         self.cpol = cpol              # Clock polarity
         self.cpha = cpha              # Clock phase
         self.cs_active_low = cs_active_low  # Chip select active low flag
         self.bus_width = bus_width    # Bus width: 'single', 'dual', 'quad', 'octal'
+        self.address_bytes = address_bytes  # Address phase length: 3 or 4 bytes
+        self.dummy_cycles = dict(DEFAULT_DUMMY_CYCLES)  # Command -> dummy cycles
+        if dummy_cycles is not None:
+            self.dummy_cycles.update(dummy_cycles)
+        self.commands = {operation: dict(opcodes) for operation, opcodes in DEFAULT_COMMANDS.items()}
+        for operation, opcodes in (commands or {}).items():
+            self.commands.setdefault(operation, {}).update(opcodes)  # Operation -> mode -> opcode
+
+    def dummy_cycles_for(self, command):
+        # Dummy cycles between the address and data phases of a command (0 if it has none)
+        return self.dummy_cycles.get(command, 0)
+
+    def compile(self, clk):
+        """
+        Compile the configuration into an immutable OspiProfile for a clock signal.
+
+        Parameters:
+        clk -- Serial clock signal the profile's edge triggers wait on
+        """
+        return OspiProfile(self, clk)
 
     def __str__(self):
         return (f'OspiConfig(word_width={self.word_width}, sclk_freq={self.sclk_freq}, '
                 f'cpol={self.cpol}, cpha={self.cpha}, cs_active_low={self.cs_active_low}, '
-                f'bus_width={self.bus_width})')
+                f'bus_width={self.bus_width}, address_bytes={self.address_bytes})')
+
+
+class OspiProfile:
+    __slots__ = ('config', 'mode', 'lanes', 'commands', 'address_bytes', 'dummy_cycles', 'sample_edge', 'any_edge',
+                 'cs_active', 'cs_inactive', 'cpol', 'period_ps')
+
+    def __init__(self, config, clk):
+        """
+        Initialize the OspiProfile object.
+
+        A profile is everything the bus needs per transaction, computed once
+        from an OspiConfig: lane maps, command opcodes per operation and mode,
+        address and dummy phase lengths, edge triggers and chip select levels.
+        Profiles are immutable; build a new one to change the configuration.
+
+        Parameters:
+        config -- OspiConfig to compile
+        clk -- Serial clock signal the edge triggers wait on
+        """
+        init = super().__setattr__  # Slots are only written here
+        init('config', config)
+        init('mode', BUS_WIDTHS[config.bus_width])  # Default mode for the configured bus width
+        init('lanes', tuple(tuple(range(1 << mode)) for mode in range(4)))  # Active lanes per mode
+        init('commands', MappingProxyType({operation: MappingProxyType(dict(opcodes))
+                                           for operation, opcodes in config.commands.items()}))
+        init('address_bytes', config.address_bytes)
+        init('dummy_cycles', MappingProxyType(dict(config.dummy_cycles)))
+        # SPI modes 0 and 3 (CPOL == CPHA) sample on the rising edge, modes 1 and 2 on the falling edge
+        init('sample_edge', RisingEdge(clk) if config.cpol == config.cpha else FallingEdge(clk))
+        init('any_edge', Edge(clk))  # Both clock edges, used by the DTR transfers
+        init('cs_active', 0 if config.cs_active_low else 1)
+        init('cs_inactive', 1 if config.cs_active_low else 0)
+        init('cpol', config.cpol)
+        init('period_ps', 2 * round(1e12 / config.sclk_freq / 2))  # Even, so both half periods are whole ps
+
+    def __setattr__(self, name, value):
+        raise AttributeError("OspiProfile is immutable")
+
+    def command(self, operation, mode):
+        """
+        Return the opcode of an operation in a mode, or None if the mode does not support it.
+
+        Parameters:
+        operation -- Operation name ('write', 'read', 'erase', ...)
+        mode -- Mode for the operation
+        """
+        opcodes = self.commands.get(operation)
+        return None if opcodes is None else opcodes.get(mode)
@@ -0,0 +1,223 @@
+import json
+import struct
+from array import array
+from bisect import bisect_right
+from cocotbext.ospi.ospi_config import OspiConfig
+from cocotbext.ospi.ospi_store import BLOCK_SIZE, SECTOR_SIZE
+
+COVERAGE_MAGIC = b'OSPC\x01'  # Coverage file header
+_HEADER_LENGTH = struct.Struct('<I')
+
+DEFAULT_REGION_BOUNDS = (SECTOR_SIZE, BLOCK_SIZE, 1 << 20)  # First sector, first block, first MB, beyond
+DEFAULT_LENGTH_BOUNDS = (1, 2, 17, 257, 4097)  # 0, 1, 2-16, 17-256, 257-4096 and longer transfers
+
+# Operations whose opcodes are coverage goals, with the transfer lengths that make sense for them
+GOAL_LENGTHS = {
+    'write': (1, 256),      # Up to one page
+    'write_dtr': (1, 256),
+    'read': (1, None),
+    'read_dtr': (1, None),
+    'erase': (0, 0),        # Erases move no data
+}
+
+
+class OspiCoverage:
+    def __init__(self, config=None, region_bounds=DEFAULT_REGION_BOUNDS, length_bounds=DEFAULT_LENGTH_BOUNDS):
+        """
+        Initialize the OspiCoverage object.
+
+        Transactions are binned by command x mode x address region x length
+        class into one preallocated array of hit counts. The command axis
+        holds every opcode of the configuration plus a last slot for unknown
+        opcodes and transactions without a command (such as xip_read). The
+        goal bins are the opcodes of GOAL_LENGTHS operations in the modes the
+        configuration defines them for, in every region and their length classes.
+
+        Parameters:
+        config -- OspiConfig the opcodes and goals come from (defaults to OspiConfig())
+        region_bounds -- Ascending addresses that start a new address region
+        length_bounds -- Ascending lengths that start a new length class
+        """
+        config = config if config is not None else OspiConfig()
+        commands = sorted({opcode for opcodes in config.commands.values() for opcode in opcodes.values()})
+        self._axes(commands, region_bounds, length_bounds)
+        self.hits = array('Q', bytes(8 * self.bins))
+        self.goals = bytearray(self.bins)  # 1 for bins that count towards closure
+        for operation, (low, high) in GOAL_LENGTHS.items():
+            for mode, opcode in config.commands.get(operation, {}).items():
+                for region in range(self._shape[2]):
+                    for length_class in range(self._shape[3]):
+                        start = self.length_bounds[length_class - 1] if length_class else 0
+                        stop = self.length_bounds[length_class] if length_class < len(self.length_bounds) else None
+                        if (high is None or start <= high) and (stop is None or stop > low):
+                            self.goals[self._index(self._command_index[opcode], mode, region, length_class)] = 1
+
+    def _axes(self, commands, region_bounds, length_bounds):
+        # Set up the bin axes and the opcode lookup table
+        self.commands = tuple(commands)
+        self.region_bounds = tuple(region_bounds)
+        self.length_bounds = tuple(length_bounds)
+        self._command_index = bytearray([len(self.commands)]) * 256  # Opcode -> axis index, unknown -> 'other'
+        for index, opcode in enumerate(self.commands):
+            self._command_index[opcode] = index
+        self._shape = (len(self.commands) + 1, 4, len(self.region_bounds) + 1, len(self.length_bounds) + 1)
+
+    @property
+    def bins(self):
+        """Total number of bins."""
+        commands, modes, regions, lengths = self._shape
+        return commands * modes * regions * lengths
+
+    def _index(self, command, mode, region, length_class):
+        _, modes, regions, lengths = self._shape
+        return ((command * modes + mode) * regions + region) * lengths + length_class
+
+    def sample(self, command, mode, address, length):
+        """
+        Count one transaction.
+
+        Parameters:
+        command -- Command opcode, or None
+        mode -- Mode the transaction ran in (the erase type for erases)
+        address -- Start address (int or list/tuple of bytes), or None for region 0
+        length -- Number of data bytes transferred
+        """
+        if isinstance(address, (list, tuple)):
+            address = int.from_bytes(bytes(address), 'big')
+        _, modes, regions, lengths = self._shape
+        index = (((len(self.commands) if command is None else self._command_index[command]) * modes + (mode or 0))
+                 * regions + (0 if address is None else bisect_right(self.region_bounds, address))) * lengths
+        self.hits[index + bisect_right(self.length_bounds, length)] += 1
+
+    def merge(self, other):
+        """
+        Add the hits of another collector with the same bins.
+
+        Parameters:
+        other -- OspiCoverage to merge into this one
+        """
+        if (other._shape, other.commands, other.region_bounds, other.length_bounds) != \
+                (self._shape, self.commands, self.region_bounds, self.length_bounds):
+            raise ValueError("Cannot merge coverage collected with different bins")
+        hits = self.hits
+        for index, count in enumerate(other.hits):
+            if count:
+                hits[index] += count
+        for index, goal in enumerate(other.goals):
+            if goal:
+                self.goals[index] = 1
+
+    def closure(self, at_least=1):
+        """
+        Return the fraction of goal bins hit at least at_least times.
+
+        Parameters:
+        at_least -- Hits a goal bin needs to count as covered
+        """
+        goals = covered = 0
+        for goal, count in zip(self.goals, self.hits):
+            if goal:
+                goals += 1
+                covered += count >= at_least
+        return covered / goals if goals else 1.0
+
+    def closed(self, target=1.0, at_least=1):
+        """Return True once the closure reaches target, so a regression can stop."""
+        return self.closure(at_least) >= target
+
+    def _label(self, index):
+        commands, modes, regions, lengths = self._shape
+        index, length_class = divmod(index, lengths)
+        index, region = divmod(index, regions)
+        command, mode = divmod(index, modes)
+        opcode = f"{self.commands[command]:#04x}" if command < len(self.commands) else 'other'
+        low = self.region_bounds[region - 1] if region else 0
+        shortest = self.length_bounds[length_class - 1] if length_class else 0
+        return f"cmd={opcode} mode={mode} region>={low:#x} len>={shortest}"
+
+    def missing(self, at_least=1):
+        """
+        Return labels of the goal bins hit fewer than at_least times.
+
+        Parameters:
+        at_least -- Hits a goal bin needs to count as covered
+        """
+        return [self._label(index) for index, (goal, count) in enumerate(zip(self.goals, self.hits))
+                if goal and count < at_least]
+
+    def report(self, at_least=1, limit=20):
+        """
+        Return a closure report: the closure and up to limit missing goal bins.
+
+        Parameters:
+        at_least -- Hits a goal bin needs to count as covered
+        limit -- Maximum number of missing bins listed
+        """
+        missing = self.missing(at_least)
+        lines = [f"OSPI coverage: {self.closure(at_least):.1%} of {sum(self.goals)} goal bins, "
+                 f"{sum(1 for count in self.hits if count)} of {self.bins} bins hit, {len(missing)} goals missing"]
+        lines.extend(f"  missing {label}" for label in missing[:limit])
+        if len(missing) > limit:
+            lines.append(f"  ... {len(missing) - limit} more")
+        return '\n'.join(lines)
+
+    def save(self, path):
+        """
+        Write the bins to a coverage file that load() and merge_coverage() read.
+
+        Parameters:
+        path -- File to write
+        """
+        header = json.dumps({
+            'commands': self.commands,
+            'region_bounds': self.region_bounds,
+            'length_bounds': self.length_bounds,
+        }).encode()
+        with open(path, 'wb') as coverage_file:
+            coverage_file.write(COVERAGE_MAGIC)
+            coverage_file.write(_HEADER_LENGTH.pack(len(header)))
+            coverage_file.write(header)
+            coverage_file.write(self.goals)
+            coverage_file.write(self.hits.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a coverage file written by save().
+
+        Parameters:
+        path -- File to read
+        """
+        with open(path, 'rb') as coverage_file:
+            if coverage_file.read(len(COVERAGE_MAGIC)) != COVERAGE_MAGIC:
+                raise ValueError(f"Not an OSPI coverage file: {path}")
+            (length,) = _HEADER_LENGTH.unpack(coverage_file.read(_HEADER_LENGTH.size))
+            header = json.loads(coverage_file.read(length))
+            coverage = cls.__new__(cls)
+            coverage._axes(header['commands'], header['region_bounds'], header['length_bounds'])
+            coverage.goals = bytearray(coverage_file.read(coverage.bins))
+            coverage.hits = array('Q')
+            coverage.hits.frombytes(coverage_file.read(8 * coverage.bins))
+        if len(coverage.goals) != coverage.bins or len(coverage.hits) != coverage.bins:
+            raise ValueError(f"Truncated OSPI coverage file: {path}")
+        return coverage
+
+
+def merge_coverage(paths):
+    """
+    Merge the coverage files written by several simulator processes.
+
+    Parameters:
+    paths -- Iterable of coverage file paths
+
+    Returns:
+    Merged OspiCoverage, or None if paths is empty
+    """
+    merged = None
+    for path in paths:
+        coverage = OspiCoverage.load(path)
+        if merged is None:
+            merged = coverage
+        else:
+            merged.merge(coverage)
+    return merged
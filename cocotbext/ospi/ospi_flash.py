@@ -1,19 +1,228 @@
 import cocotb
-from cocotb.triggers import Timer, RisingEdge
+from cocotb.triggers import Timer
+from cocotb.utils import get_sim_time
+from cocotbext.ospi.ospi_backdoor import OspiBackdoor
 from cocotbext.ospi.ospi_bus import OspiBus
+from cocotbext.ospi.ospi_cache import OspiPrefetchCache
+from cocotbext.ospi.ospi_codec import decode, invalid_indices, is_valid, mark_invalid, new_valid_bitmap
+from cocotbext.ospi.ospi_config import XIP_MODE_BITS
+from cocotbext.ospi.ospi_flash_model import STATUS_WIP
+from cocotbext.ospi.ospi_log import LOG_TRANSACTION
+from cocotbext.ospi.ospi_options import OspiFlashOptions
+from cocotbext.ospi.ospi_snapshot import OspiFlashSnapshot
+from cocotbext.ospi.ospi_store import BLOCK_SIZE, ERASED, SECTOR_SIZE, OspiPageStore
+from cocotbext.ospi.ospi_timing import BUSY_TIMEOUT_FACTOR, DEFAULT_BUSY_TIMES, scale_ns
+from cocotbext.ospi.ospi_verify import (VERIFY_DEFERRED, VERIFY_NONE, VERIFY_SAMPLED, OspiShadowModel, format_ranges,
+                                        mismatch_ranges)
+
 
 class OspiFlash:
-    def __init__(self, dut, clk, cs, io):
+    def __init__(self, dut, clk, cs, io, log_policy=LOG_TRANSACTION, config=None, options=None, start_clock=False,
+                 arbiter=None, **kwargs):
         # Initialize the OspiFlash object with DUT, clock, chip select, and IO signals.
+        # log_policy selects 'off', 'transaction' (one summary record per operation) or 'byte' logging.
+        # config is the OspiConfig describing the bus; it is compiled once into the bus profile.
+        # options is the OspiFlashOptions grouping the driver options (verification, backing store,
+        # backdoor, status polling, XIP cache, flight recorder); keyword arguments override single
+        # options, e.g. verify='none'. Leave poll_status off for devices without a status register,
+        # such as the bundled Verilog model, whose read-back would otherwise see the lanes released
+        # by the status read; program and erase then wait out busy_times, so set those to the
+        # completion times of the device.
+        # start_clock makes the bus drive clk itself at config.sclk_freq.
+        # arbiter is an OspiArbiter shared by the devices whose chip selects share one IO bus.
+        options = OspiFlashOptions(**kwargs) if options is None else options.replace(**kwargs)
+        self.options = options
         self.dut = dut  # DUT (Device Under Test) reference
         self.clk = clk  # Clock signal
         self.cs = cs    # Chip select signal
         self.io = io    # IO signals
-
-        self.data_store = {}  # Dictionary to store data (if needed)
+        self.arbiter = arbiter  # Shared-bus arbiter, None for a device with a bus of its own
+
+        # Sparse paged backing store mirroring the contents programmed through this driver;
+        # untouched pages read as erased (0xFF) and images can be loaded with load_image().
+        # It models a NOR part, where erases clear whole 4 KB sectors and 64 KB blocks, so it holds what
+        # the driver expects the device to contain. The bundled Verilog model erases a single byte and
+        # takes no program data from OSPI_IO, so check that device through the backdoor instead.
+        self.data_store = OspiPageStore(options.size)
+        self.page_size = options.page_size
+
+        # Zero-cycle access to the device memory array, resolved on first use
+        self.memory_path = options.memory_path
+        self._backdoor = None
+        self.state_paths = options.state_paths
+        self._state = None  # Device state handles, resolved on first snapshot
+
+        # Execute-in-place: the continuous read window left open by xip_read() and its prefetch cache
+        self.xip_cache = OspiPrefetchCache(options.xip_line_size, options.xip_lines, options.xip_prefetch)
+        self._xip_open = False
+        self._xip_next = None  # Address the open window continues at
+        self._xip_mode = None
 
         # Initialize OspiBus interface with DUT, clock, chip select, and IO signals
-        self.ospi = OspiBus(dut, clk, cs, io)
+        self.ospi = OspiBus(dut, clk, cs, io, log_policy, config, options.recorder_depth)
+        if start_clock:
+            self.ospi.start_clock()
+
+        # Share the bus logger so a flash operation produces a single transaction record
+        self.txn_log = self.ospi.txn_log
+        self.recorder = self.ospi.recorder  # Dumped automatically when verification fails
+        self.stats = self.ospi.stats  # Shared counters, so flash operations and their bus phases add up
+
+        # Write verification policy (the verify and verify_every properties, validated by the options)
+        # and the shadow model used by deferred verification
+        self.shadow = OspiShadowModel()
+        self._write_count = 0  # Writes seen, used by the sampled policy
+
+        # Status polling: the interval starts at poll_ns and doubles up to poll_max_ns, or up to
+        # 1/8 of the expected busy time of the operation being waited for when that is longer.
+        # Without polling, program and erase wait out their busy time instead.
+        self.poll_status = options.poll_status
+        self.poll_ns = options.poll_ns
+        self.poll_max_ns = options.poll_max_ns
+        self.busy_times = dict(DEFAULT_BUSY_TIMES)
+        if options.busy_times is not None:
+            self.busy_times.update(options.busy_times)
+
+    @classmethod
+    def from_prefix(cls, dut, prefix='OSPI', cs_name=None, **kwargs):
+        # Create a driver from the <prefix>_CLK, <prefix>_CS and <prefix>_IO signals of dut.
+        # cs_name selects another chip select on the same bus, e.g. 'OSPI_CS1' for the second die of a
+        # dual-die package; devices sharing a bus must share one OspiArbiter (arbiter=...).
+        return cls(dut, getattr(dut, f"{prefix}_CLK"), getattr(dut, cs_name or f"{prefix}_CS"),
+                   getattr(dut, f"{prefix}_IO"), **kwargs)
+
+    @property
+    def profile(self):
+        # Compiled bus profile: opcodes per operation and mode, phase lengths, triggers and CS levels
+        return self.ospi.profile
+
+    def configure(self, config):
+        # Switch to a new bus configuration; it is compiled once here, not per transaction
+        self.ospi.configure(config)
+
+    @property
+    def log_policy(self):
+        return self.txn_log.policy
+
+    @log_policy.setter
+    def log_policy(self, policy):
+        self.txn_log.policy = policy
+
+    @property
+    def verify(self):
+        return self.options.verify
+
+    @verify.setter
+    def verify(self, verify):
+        self.options.verify = verify
+
+    @property
+    def verify_every(self):
+        return self.options.verify_every
+
+    @verify_every.setter
+    def verify_every(self, verify_every):
+        self.options.verify_every = verify_every
+
+    @property
+    def coverage(self):
+        # OspiCoverage binning every flash operation, shared with the bus; None (the default) collects nothing
+        return self.txn_log.coverage
+
+    @coverage.setter
+    def coverage(self, coverage):
+        self.txn_log.coverage = coverage
+
+    @property
+    def backdoor(self):
+        if self._backdoor is None:
+            self._backdoor = OspiBackdoor(self.dut, self.memory_path)
+        return self._backdoor
+
+    def find_backdoor(self):
+        # Return the backdoor, or None when memory_path does not resolve in this bench
+        try:
+            return self.backdoor
+        except AttributeError:
+            return None
+
+    def backdoor_load(self, source, offset=0, fmt=None):
+        # Preload the device memory array from bytes or a raw binary, Intel HEX or S-record file
+        # without spending clock cycles; the loaded data is mirrored into the backing store.
+        # Returns the number of bytes loaded.
+        segments = self.backdoor.load(source, offset, fmt)
+        for address, data in segments:
+            self.data_store.write(address, data)
+            self.xip_cache.invalidate(address, len(data))
+        return sum(len(data) for _, data in segments)
+
+    def backdoor_write(self, address, data):
+        # Write bytes straight into the device memory array and mirror them into the backing store
+        self.backdoor.write(address, data)
+        self.data_store.write(address, data)
+        self.xip_cache.invalidate(address, len(data))
+
+    def backdoor_read(self, address, length):
+        # Peek at the device memory array without spending clock cycles.
+        # Returns (bytes, validity bitmap); cleared bitmap bits mark Z/X bytes.
+        return self.backdoor.read(address, length)
+
+    def _state_handles(self):
+        # Resolve the device state signals once; paths the design does not have are skipped
+        if self._state is None:
+            self._state = {}
+            for path in self.state_paths:
+                handle = self.dut
+                try:
+                    for name in path.split('.'):
+                        handle = getattr(handle, name)
+                except AttributeError:
+                    continue
+                self._state[path] = handle
+        return self._state
+
+    def snapshot(self):
+        # Capture the flash contents and device state without spending clock cycles.
+        # Contents are shared copy-on-write with the backing store at page granularity, so taking
+        # many snapshots is cheap. Returns an OspiFlashSnapshot for restore().
+        signals = {}
+        for path, handle in self._state_handles().items():
+            value = handle.value
+            signals[path] = value.integer if value.is_resolvable else None
+        return OspiFlashSnapshot(self.data_store.snapshot(), signals)
+
+    async def restore(self, snapshot):
+        # Return the flash contents and device state to a snapshot through the backdoor, without
+        # spending clock cycles. Only the pages the backing store changed since the snapshot are
+        # rewritten: pages shared copy-on-write with the snapshot are untouched, so the cost follows
+        # the dirtied pages rather than the array size. The store must therefore be authoritative;
+        # changes it did not mirror are not undone. Without a backdoor only the store and the device
+        # state are restored. The bus is claimed for the restore, so on a shared bus it waits for the
+        # current operation of another device. Pending deferred verification and the XIP cache are
+        # discarded.
+        await self._claim()
+        try:
+            self.xip_exit()
+            store = self.data_store
+            backdoor = self.find_backdoor()
+            if backdoor is not None:
+                page_size = store.page_size
+                erased = bytes([ERASED]) * page_size
+                for index in store.pages.keys() | snapshot.pages.keys():
+                    page = snapshot.pages.get(index)
+                    address = index * page_size
+                    if store.pages.get(index) is page or address >= backdoor.size:
+                        continue  # Still shared with the snapshot, or past a small device
+                    backdoor.write(address, (erased if page is None else page)[:backdoor.size - address])
+            store.restore(snapshot.pages)
+            handles = self._state_handles()
+            for path, value in snapshot.signals.items():
+                if value is not None:
+                    handles[path].setimmediatevalue(value)
+            self.shadow.clear()
+            self.xip_cache.invalidate()
+        finally:
+            self._release()
 
     async def initialize(self):
         # Initialize the flash memory by setting control signals to default values
@@ -21,7 +230,7 @@ class OspiFlash:
         await Timer(20, units='ns')  # Wait for 20 ns
         self.dut.reset_n.value = 1  # Deassert reset (active low)
         await Timer(20, units='ns')  # Wait for 20 ns
-        self.dut.OSPI_CS.value = 1  # Deactivate chip select (active low)
+        self.cs.value = self.profile.cs_inactive  # Deactivate chip select
         self.dut.write_enable.value = 0  # Set write enable to low (disabled)
         self.dut.read_enable.value = 0  # Set read enable to low (disabled)
         self.dut.erase_enable.value = 0  # Set erase enable to low (disabled)
@@ -31,159 +240,530 @@ class OspiFlash:
 
     async def write(self, address, data, mode):
         # Write data to the flash memory at the specified address and mode
-        command = {
-            0: 0x02,  # Page program command for single mode
-            1: 0xA2,  # Extended program command for dual mode
-            2: 0x32,  # Quad page program command
-            3: 0x38,  # Octal page program command
-        }.get(mode, None)  # Get the command for the specified mode
+        command = self.profile.command('write', mode)  # Opcode from the compiled profile
 
         if command is None:
             raise ValueError("Unsupported write mode: {}".format(mode))  # Raise error for unsupported mode
 
-        # Activate chip select (low)
-        self.dut.OSPI_CS.value = 0
+        await self._write(command, address, data, mode, dtr=False)
+
+    async def write_dtr(self, address, data, mode=3):
+        # Write data to the flash memory using both clock edges (octal DTR, 8D-8D-8D)
+        command = self.profile.command('write_dtr', mode)  # Opcode from the compiled profile
 
-        # Set address for write operation
-        self.dut.address.value = address
+        if command is None:
+            raise ValueError("Unsupported DTR write mode: {}".format(mode))  # Raise error for unsupported mode
+
+        await self._write(command, address, data, mode, dtr=True)
 
-        # Set write enable to high (enabled)
-        self.dut.write_enable.value = 1
-        self.dut._log.info(f"write_enable set to 1 for mode {mode}")
+    async def _write(self, command, address, data, mode, dtr):
+        # Shared program path; DTR transfers move one byte on every OSPI_CLK edge
+        edge = self.profile.any_edge if dtr else self.profile.sample_edge
+        await self._claim()
+        self.xip_exit()
+        start = self.txn_log.begin()
+        try:
+            # Activate chip select
+            self.cs.value = self.profile.cs_active
 
-        # Wait for a clock cycle to ensure signal propagation
-        await RisingEdge(self.dut.OSPI_CLK)
+            # Set address for write operation
+            self.dut.address.value = address
 
-        # Handle writing byte by byte, distributing bits across OSPI_IO based on mode
-        for byte in data:
-            self.dut.OSPI_IO.value = byte  # Set the data on OSPI_IO lines
+            # Set write enable to high (enabled)
+            self.dut.write_enable.value = 1
+            if self.txn_log.byte_enabled():
+                self.dut._log.debug("write_enable set to 1 for mode %d", mode)
 
-            # Wait for one clock cycle after setting the data
-            await RisingEdge(self.dut.OSPI_CLK)
+            # Wait for a clock cycle to ensure signal propagation
+            mark = self.stats.mark()
+            await self.profile.sample_edge
 
-        # Set write enable back to low (disabled) after the data is written
-        self.dut.write_enable.value = 0
-        self.dut._log.info("write_enable set to 0")
+            # Handle writing byte by byte, distributing bits across OSPI_IO based on mode
+            for byte in data:
+                self.io.value = byte  # Set the data on OSPI_IO lines
 
-        # Perform the actual write operation using the OspiBus interface
-        await self.ospi.write(command, address, data, mode)
+                # Wait for one clock edge (rising for SDR, either for DTR) after setting the data
+                await edge
+            self.stats.phase('data', mark, len(data) + 1)
 
-        # Deactivate chip select (high)
-        self.dut.OSPI_CS.value = 1
-        self.dut.write_enable.value = 0
+            # Set write enable back to low (disabled) after the data is written
+            self.dut.write_enable.value = 0
+            if self.txn_log.byte_enabled():
+                self.dut._log.debug("write_enable set to 0")
 
-        await Timer(100, units='ns')  # Wait for 100 ns
+            # Perform the actual write operation using the OspiBus interface
+            if dtr:
+                await self.ospi.write_dtr(command, address, data, mode)
+            else:
+                await self.ospi.write(command, address, data, mode)
+
+            # Deactivate chip select
+            self.cs.value = self.profile.cs_inactive
+            self.dut.write_enable.value = 0
+
+            # Mirror the programmed data into the backing store
+            self.data_store.write(address, data)
+            self.xip_cache.invalidate(address, len(data))
+
+            # Wait for the program to complete
+            await self._wait_busy('program')
+
+            # Verify the write operation according to the verification policy
+            await self._verify_write(address, data, mode, dtr)
+        finally:
+            self.txn_log.end(start, 'write_dtr' if dtr else 'write', command, address, mode, len(data), data)
+            self._release()
+
+    async def program_range(self, address, buffer, mode=0):
+        # Program a buffer of any length, one page program per page touched.
+        # Sectors are only erased when the new data needs a bit to go from 0 to 1; the rest of an
+        # erased sector is restored from the backing store. Page chunks that already match the
+        # stored contents (including all-0xFF chunks over erased flash) are skipped, and the page
+        # programs run back to back, separated only by the busy wait or status poll of each program.
+        # The plan is made from the backing store, not from the device, so the store must be
+        # authoritative: contents changed behind the driver (e.g. by OspiBackdoor.write rather than
+        # backdoor_write) are not seen. The bus is claimed for the whole range, so on a shared bus no
+        # other device runs between the erase of a sector and the programs that restore it.
+        # Returns the achieved throughput in bytes per simulated microsecond.
+        data = memoryview(bytes(buffer))
+        end = address + len(data)
+        start_ns = get_sim_time(units='ns')
+        await self._claim()
+        start = self.txn_log.begin()
+        try:
+            for sector in range(address - address % SECTOR_SIZE, end, SECTOR_SIZE):
+                low, high = max(address, sector), min(end, sector + SECTOR_SIZE)
+                new = data[low - address:high - address]
+                old = self.data_store.read(low, high - low)
+                if old == new:
+                    continue  # Already programmed
+                if int.from_bytes(new, 'little') & ~int.from_bytes(old, 'little'):
+                    # Some bit has to go from 0 to 1: erase the sector and reprogram what it held
+                    image = bytearray(self.data_store.read(sector, SECTOR_SIZE))
+                    image[low - sector:high - sector] = new
+                    await self.erase(sector, mode=0)
+                    await self._program_pages(sector, image, mode)
+                else:
+                    await self._program_pages(low, new, mode)
+        finally:
+            self.txn_log.end(start, 'program_range', None, address, mode, len(data), data)
+            self._release()
+        elapsed_us = (get_sim_time(units='ns') - start_ns) / 1000
+        return len(data) / elapsed_us if elapsed_us else float('inf')
+
+    async def _program_pages(self, address, data, mode):
+        # Split data on page boundaries and program every page chunk that changes the contents
+        data = memoryview(data)
+        position = 0
+        while position < len(data):
+            page_address = address + position
+            count = min(self.page_size - page_address % self.page_size, len(data) - position)
+            chunk = data[position:position + count]
+            if self.data_store.read(page_address, count) != chunk:
+                await self.write(page_address, bytes(chunk), mode)
+            position += count
+
+    async def _verify_write(self, address, data, mode, dtr):
+        # Apply the verification policy to a completed write
+        if self.verify == VERIFY_NONE:
+            return
+        if self.verify == VERIFY_DEFERRED:
+            self.shadow.record(address, data)  # Checked later by verify_pending()
+            return
+        if self.verify == VERIFY_SAMPLED:
+            self._write_count += 1
+            if self._write_count % self.verify_every:
+                return
 
         # Verify the write operation by reading back the data
-        verify_data = await self.read(address, len(data), mode)
-        assert verify_data == data, f"Verification failed: Expected {data}, got {verify_data}"  # Check if the written data matches the expected data
+        if dtr:
+            verify_data = await self.read_dtr(address, len(data), mode)
+        else:
+            verify_data = await self.read(address, len(data), mode)
+        if verify_data != list(data):
+            self._dump_recorder(f"write verification failed at {address:#x}")
+        assert verify_data == list(data), f"Verification failed: Expected {data}, got {verify_data}"  # Check if the written data matches the expected data
+
+    async def verify_pending(self, mode=0):
+        # Check every range recorded by deferred verification with one read per coalesced range.
+        # Call at checkpoints and at the end of a test; mismatches are reported as address ranges.
+        mismatches = []
+        for start, expected in self.shadow.ranges():
+            actual, valid = await self.read_bytes(start, len(expected), mode)
+            invalid = invalid_indices(valid, len(expected))
+            if actual != expected or invalid:
+                mismatches.extend(mismatch_ranges(start, expected, actual, invalid))
+        self.shadow.clear()
+        if mismatches:
+            self._dump_recorder(f"deferred verification failed at {format_ranges(mismatches)}")
+        assert not mismatches, f"Deferred verification failed at {format_ranges(mismatches)}"
+
+    def _dump_recorder(self, reason):
+        # Write out the flight recorder before a failing check raises, so the failure comes with context
+        if self.recorder is not None:
+            self.recorder.dump(reason=reason)
 
     async def read(self, address, length, mode):
-        # Read data from the flash memory at the specified address and mode
-        command = {
-            0: 0x03,  # Single mode read command
-            1: 0xBB,  # Dual mode read command
-            2: 0xEB,  # Quad mode read command
-            3: 0x0B,  # Octal mode read command
-        }.get(mode, None)  # Get the command for the specified mode
+        # Read data from the flash memory as a list of ints, with None for undriven (Z/X) bytes.
+        # This is the list-based wrapper around read_bytes, kept for existing callers.
+        data, valid = await self.read_bytes(address, length, mode)
+        return self._to_list(data, valid, length)  # Return the read data
+
+    @staticmethod
+    def _to_list(data, valid, length):
+        # Convert a read buffer and its validity bitmap into a list with None for Z/X bytes
+        read_data = list(data)
+        for index in invalid_indices(valid, length):
+            read_data[index] = None  # or any other value to represent undefined data
+        return read_data
+
+    async def read_bytes(self, address, length, mode):
+        # Read data from the flash memory into a freshly allocated buffer.
+        # Returns (bytes, validity bitmap); cleared bitmap bits mark Z/X bytes.
+        buffer = bytearray(length)  # Preallocated once for the whole transfer
+        valid = await self.read_into(address, buffer, mode)
+        return bytes(buffer), valid
+
+    async def read_into(self, address, buffer, mode):
+        # Read len(buffer) bytes from the flash memory directly into a caller-supplied
+        # bytearray or writable memoryview. Returns the validity bitmap.
+        command = self.profile.command('read', mode)  # Opcode from the compiled profile
 
         if command is None:
             raise ValueError(f"Unsupported read mode: {mode}")  # Raise error for unsupported mode
 
-        # Activate chip select (low)
-        self.dut.OSPI_CS.value = 0
-
-        # Set address for read operation
-        self.dut.address.value = address
-
-        # Enable read operation
-        self.dut.read_enable.value = 1
+        return await self._read_into(command, address, buffer, mode, dtr=False)
 
-        # Wait for a clock cycle
-        await RisingEdge(self.dut.OSPI_CLK)
+    async def read_dtr(self, address, length, mode=3):
+        # Read data using both clock edges (octal DTR) as a list of ints, with None for Z/X bytes
+        data, valid = await self.read_bytes_dtr(address, length, mode)
+        return self._to_list(data, valid, length)
 
-        read_data = []  # List to store read data
-        for _ in range(length):
-            byte = self.dut.OSPI_IO.value  # Read data from OSPI_IO lines
-            if 'z' in byte.binstr:
-                # Handle high-impedance state
-                read_data.append(None)  # or any other value to represent undefined data
-            else:
-                byte_int = byte.integer  # Convert BinaryValue to integer
-
-                if mode == 1:
-                    # Swap nibbles for dual mode
-                    byte_int = ((byte_int & 0xF0) >> 4) | ((byte_int & 0x0F) << 4)
-                elif mode == 2:
-                    # Rearrange bits for quad mode
-                    byte_int = (
-                        ((byte_int & 0xC0) >> 6) |
-                        ((byte_int & 0x30) >> 2) |
-                        ((byte_int & 0x0C) << 2) |
-                        ((byte_int & 0x03) << 6)
-                    )
-                elif mode == 3:
-                    # Reverse bits for octal mode
-                    byte_int = int(f"{byte_int:08b}"[::-1], 2)
+    async def read_bytes_dtr(self, address, length, mode=3):
+        # Read data using both clock edges (octal DTR) into a freshly allocated buffer.
+        # Returns (bytes, validity bitmap); cleared bitmap bits mark Z/X bytes.
+        buffer = bytearray(length)  # Preallocated once for the whole transfer
+        valid = await self.read_into_dtr(address, buffer, mode)
+        return bytes(buffer), valid
 
-                read_data.append(byte_int)  # Append the processed byte to read_data
+    async def read_into_dtr(self, address, buffer, mode=3):
+        # Read len(buffer) bytes using both clock edges (octal DTR) into a caller-supplied buffer.
+        # Returns the validity bitmap.
+        command = self.profile.command('read_dtr', mode)  # Opcode from the compiled profile
 
-            await RisingEdge(self.clk)  # Wait for the next clock cycle
+        if command is None:
+            raise ValueError(f"Unsupported DTR read mode: {mode}")  # Raise error for unsupported mode
+
+        return await self._read_into(command, address, buffer, mode, dtr=True)
+
+    async def _read_into(self, command, address, buffer, mode, dtr):
+        # Shared read path; DTR transfers sample one byte on every clock edge
+        edge = self.profile.any_edge if dtr else self.profile.sample_edge
+        view = memoryview(buffer)
+        length = len(view)
+        valid = new_valid_bitmap(length)
+        io = self.io  # Resolve the handle once for the whole transfer
+        await self._claim()
+        self.xip_exit()
+
+        start = self.txn_log.begin()
+        try:
+            # Activate chip select
+            self.cs.value = self.profile.cs_active
+
+            # Set address for read operation
+            self.dut.address.value = address
 
-        return read_data  # Return the read data
+            # Enable read operation
+            self.dut.read_enable.value = 1
+
+            # Wait for a clock cycle
+            mark = self.stats.mark()
+            await self.profile.sample_edge
+
+            for index in range(length):
+                byte = io.value  # Read data from OSPI_IO lines
+                if byte.is_resolvable:
+                    view[index] = byte.integer  # Store the lane-ordered byte
+                else:
+                    mark_invalid(valid, index)  # Handle high-impedance or unknown state
+
+                await edge  # Wait for the next clock edge
+            self.stats.phase('data', mark, length + 1)
+
+            # Undo the lane ordering for the whole transfer in one table lookup
+            view[:] = decode(view, mode)
+        finally:
+            # End the read cycle, so a device sharing the bus is never selected alongside this one
+            self.dut.read_enable.value = 0
+            self.cs.value = self.profile.cs_inactive
+            self.txn_log.end(start, 'read_dtr' if dtr else 'read', command, address, mode, length, view)
+            self._release()
+        return valid
 
     async def erase(self, address, mode):
         # Erase data in the flash memory at the specified address and mode
-        command = {
-            0: 0x20,  # Sector erase command
-            1: 0xD8,  # Block erase command
-            2: 0xC7,  # Chip erase command
-        }.get(mode, None)  # Get the command for the specified mode
+        command = self.profile.command('erase', mode)  # Opcode from the compiled profile
 
         if command is None:
             raise ValueError("Unsupported erase mode: {}".format(mode))  # Raise error for unsupported mode
 
-        self.dut._log.info(f"Erasing at address {address:#04x} in mode: {mode}")
-
-        # Activate chip select (low)
-        self.dut.OSPI_CS.value = 0
+        await self._claim()
+        self.xip_exit()
+        start = self.txn_log.begin()
+        try:
+            # Activate chip select
+            self.cs.value = self.profile.cs_active
 
-        # Set address for erase (if applicable)
-        if mode != 2:  # Chip erase does not need an address
-            self.dut.address.value = address
+            # Set address for erase (if applicable)
+            if mode != 2:  # Chip erase does not need an address
+                self.dut.address.value = address
         
-        # Set erase enable to high (enabled)
-        self.dut.erase_enable.value = 1
-        await RisingEdge(self.dut.OSPI_CLK)
-
-        # Send the erase command using OspiBus interface
-        await self.ospi.erase(command, address, mode)
-
-        # Deactivate chip select (high)
-        self.dut.OSPI_CS.value = 1
-
-        # Set erase enable back to low (disabled)
-        self.dut.erase_enable.value = 0
-        self.dut._log.info("erase_enable set to 0")
-
-        # Wait for the erase operation to complete
-        await Timer(1000, units='ns')
-
-        self.dut._log.info("Erase operation completed")
+            # Set erase enable to high (enabled)
+            self.dut.erase_enable.value = 1
+            mark = self.stats.mark()
+            await self.profile.sample_edge
+            self.stats.phase('command', mark, 1)
+
+            # Send the erase command using OspiBus interface
+            await self.ospi.erase(command, address, mode)
+
+            # Deactivate chip select
+            self.cs.value = self.profile.cs_inactive
+
+            # Set erase enable back to low (disabled)
+            self.dut.erase_enable.value = 0
+            if self.txn_log.byte_enabled():
+                self.dut._log.debug("erase_enable set to 0")
+
+            # Wait for the erase operation to complete
+            await self._wait_busy(('erase_sector', 'erase_block', 'erase_chip')[mode])
+
+            # Erased bytes no longer hold the recorded data; the mirror erases the whole NOR region
+            region = self._erase_region(address, mode)
+            if region is None:
+                self.shadow.clear()
+                self.data_store.erase()
+                self.xip_cache.invalidate()
+            else:
+                self.shadow.discard(*region)
+                self.data_store.erase(*region)
+                self.xip_cache.invalidate(*region)
+        finally:
+            self.txn_log.end(start, 'erase', command, address, mode, 0)
+            self._release()
+
+    @staticmethod
+    def _erase_region(address, mode):
+        # Return the (start, length) region erased by an erase mode, or None for a chip erase
+        if mode == 2:
+            return None
+        size = SECTOR_SIZE if mode == 0 else BLOCK_SIZE
+        return address - address % size, size
+
+    async def read_status(self, mode=0):
+        # Read the status register (0x05 by default) in its own chip select cycle.
+        # Returns the status byte, or None if the device did not drive it (Z/X).
+        await self._claim()
+        self.xip_exit()
+        self.cs.value = self.profile.cs_active  # Activate chip select
+        try:
+            data, valid = await self.ospi.read_register(self.profile.command('read_status', mode), mode)
+        finally:
+            self.cs.value = self.profile.cs_inactive  # Deactivate chip select
+            self._release()
+        return data[0] if is_valid(valid, 0) else None
+
+    async def _wait_busy(self, operation):
+        # Wait for a program or erase to complete: poll the status register when poll_status is set,
+        # otherwise wait out the modelled busy time of the operation, following the global time scale
+        if self.poll_status:
+            await self.wait_ready(operation)
+            return
+        busy_ns = scale_ns(self.busy_times.get(operation, 0))
+        if busy_ns:
+            mark = self.stats.mark()
+            await Timer(busy_ns, units='ns')
+            self.stats.phase('busy', mark)
+
+    async def wait_ready(self, operation=None, mode=0, timeout_ns=None):
+        # Poll the status register until the write-in-progress bit clears, backing off adaptively.
+        # operation names the busy time being waited for ('program', 'erase_sector', ...); intervals
+        # follow the global time scale. A device that does not drive the status register (such as the
+        # bundled Verilog model, which completes every operation at once) counts as ready.
+        # Without timeout_ns the device is given BUSY_TIMEOUT_FACTOR times the busy time of the
+        # operation (the longest busy time when no operation is named) plus one polling interval,
+        # so a device stuck busy raises TimeoutError instead of hanging the test.
+        # Returns the last status byte, or None if the status register was not driven.
+        if operation is None:
+            busy_ns = scale_ns(max(self.busy_times.values(), default=0))
+        else:
+            busy_ns = scale_ns(self.busy_times.get(operation, 0))
+        interval = max(scale_ns(self.poll_ns), 1)
+        max_interval = max(scale_ns(self.poll_max_ns), busy_ns // 8, interval)
+        if timeout_ns is None:
+            timeout_ns = BUSY_TIMEOUT_FACTOR * busy_ns + max_interval
+        deadline = get_sim_time(units='ns') + timeout_ns
+        while True:
+            status = await self.read_status(mode)
+            if status is None or not status & STATUS_WIP:
+                return status
+            if get_sim_time(units='ns') >= deadline:
+                raise TimeoutError(f"Device still busy after {timeout_ns} ns (status {status:#04x})")
+            mark = self.stats.mark()
+            await Timer(interval, units='ns')  # Back off before the next poll
+            self.stats.phase('busy', mark)
+            interval = min(interval * 2, max_interval)
+
+    async def xip_read(self, address, length, mode=0, keep_open=False):
+        # Execute-in-place read through the prefetch cache.
+        # Cached lines are served without bus activity. A miss fetches the missing line plus up to
+        # xip_prefetch following lines in one continuous read; a fetch that continues where the
+        # previous one ended reuses the open chip select window without a command or address phase.
+        # The window is closed (chip select deasserted) on return unless keep_open is set, in which
+        # case the caller ends it with xip_exit() or any other operation. With an arbiter the window
+        # is always closed, as another device may select next.
+        # Lines containing Z/X bytes are returned but not cached.
+        # Returns (bytes, validity bitmap); cleared bitmap bits mark Z/X bytes.
+        cache = self.xip_cache
+        line_size = cache.line_size
+        end = address + length
+        buffer = bytearray(length)
+        valid = new_valid_bitmap(length)
+        fetched = {}  # Lines fetched by this call -> (bytes, Z/X offsets), including uncacheable ones
+        await self._claim()
+        start = self.txn_log.begin()
+        try:
+            for line in range(cache.line_address(address), end, line_size):
+                data = cache.lookup(line)
+                entry = (data, ()) if data is not None else fetched.pop(line, None)
+                if entry is None:
+                    count = 1
+                    while count <= cache.prefetch and line + count * line_size not in cache:
+                        count += 1  # Extend the burst over the following uncached lines
+                    burst, burst_valid = await self._xip_fetch(line, count * line_size, mode)
+                    invalid = invalid_indices(burst_valid, len(burst))
+                    for index in range(count):
+                        low = index * line_size
+                        offsets = tuple(offset - low for offset in invalid if low <= offset < low + line_size)
+                        if not offsets:
+                            cache.insert(line + low, burst[low:low + line_size])
+                        fetched[line + low] = (burst[low:low + line_size], offsets)
+                    entry = fetched.pop(line)
+
+                # Copy the part of the line that overlaps the request
+                data, offsets = entry
+                low, high = max(address, line), min(end, line + line_size)
+                buffer[low - address:high - address] = data[low - line:high - line]
+                for offset in offsets:
+                    if low <= line + offset < high:
+                        mark_invalid(valid, line + offset - address)
+        finally:
+            if not keep_open:
+                self.xip_exit()
+            self.txn_log.end(start, 'xip_read', None, address, mode, length, buffer)
+            self._release()
+        return bytes(buffer), valid
+
+    async def _xip_fetch(self, address, length, mode):
+        # Continuous read; a fetch that continues the open window only clocks out more data
+        if not (self._xip_open and self._xip_next == address and self._xip_mode == mode):
+            command = self.profile.command('xip_read', mode)  # Opcode from the compiled profile
+
+            if command is None:
+                raise ValueError(f"Unsupported XIP read mode: {mode}")  # Raise error for unsupported mode
+
+            self.xip_exit()
+            self.cs.value = self.profile.cs_active  # Activate chip select and keep it active between fetches
+            await self.ospi.send_command(command, mode)
+            await self.ospi.send_address(address, mode)
+            mark = self.stats.mark()
+            await self.ospi.send_byte(XIP_MODE_BITS, mode)  # Performance-enhance mode bits
+            self.stats.phase('dummy', mark, 1)
+            self.io.value = self.ospi.release  # Turn the lanes around for the read data
+            # The mode bits take the first of the command's dummy cycles
+            await self.ospi.send_dummy(max(self.profile.dummy_cycles.get(command, 0) - 1, 0))
+            self._xip_open = True
+            self._xip_mode = mode
+        data, valid = await self.ospi.receive_bytes(mode, length)
+        self._xip_next = address + length
+        return data, valid
+
+    async def _claim(self):
+        # Take the shared bus for an operation (no-op without an arbiter)
+        if self.arbiter is not None:
+            await self.arbiter.acquire(self)
+
+    def _release(self):
+        # Hand the shared bus back; a continuous read window cannot stay open once another device may select
+        if self.arbiter is not None:
+            if self.arbiter.depth == 1:
+                self.xip_exit()
+            self.arbiter.release(self)
+
+    def abort(self, task=None):
+        # Clean up after an operation whose coroutine was killed part way (e.g. by OspiQueue.stop()):
+        # clear the parallel enables, release OSPI_IO, deassert chip select, drop this device's claims
+        # on the shared bus and close the transactions it left open in the log. The shared signals
+        # are left alone while another device holds the bus.
+        # task is the killed task; it is closed here, so the finally blocks of the interrupted
+        # operation run now rather than whenever the coroutine is garbage collected.
+        holding = self.arbiter is None or self.arbiter.owner is self
+        if task is not None:
+            task.close()
+        if holding:
+            self.dut.write_enable.value = 0
+            self.dut.read_enable.value = 0
+            self.dut.erase_enable.value = 0
+            self.io.value = self.ospi.release
+        self._xip_open = False
+        self._xip_next = self._xip_mode = None
+        self.cs.value = self.profile.cs_inactive
+        if self.arbiter is not None:
+            self.arbiter.abort(self)
+        self.txn_log.abort()
+
+    def xip_exit(self):
+        # Close the continuous read window left open by xip_read (no-op if none is open)
+        if self._xip_open:
+            self.cs.value = self.profile.cs_inactive  # Deactivate chip select
+            self._xip_open = False
+            self._xip_next = self._xip_mode = None
 
     async def fast_read(self, address, length, mode=0):
-        # Perform a fast read operation using the OspiBus interface
-        return await self.ospi.read(0x0B, address, mode, length)
+        # Perform a fast read operation (command, address, dummy and data phases) using the OspiBus interface.
+        # Returns a list of BinaryValue objects, all-'x' for bytes that were not driven.
+        command = self.profile.command('fast_read', mode)  # Opcode from the compiled profile
+
+        if command is None:
+            raise ValueError(f"Unsupported fast read mode: {mode}")  # Raise error for unsupported mode
+
+        await self._claim()
+        self.xip_exit()
+        start = self.txn_log.begin()
+        data = None
+        try:
+            # Activate chip select for the whole transfer
+            self.cs.value = self.profile.cs_active
+            data, valid = await self.ospi.read_bytes(command, address, mode, length)
+        finally:
+            # Deactivate chip select
+            self.cs.value = self.profile.cs_inactive
+            self.txn_log.end(start, 'fast_read', command, address, mode, length, data)
+            self._release()
+        return self.ospi._to_binary_values(data, valid)
 
     async def hold_operation(self):
         """Assert HOLD_N for hold operation."""
-        self.dut._log.info("Asserting HOLD_N (Hold Operation)")
+        if self.txn_log.byte_enabled():
+            self.dut._log.debug("Asserting HOLD_N (Hold Operation)")
         self.dut.HOLD_N.value = 0  # Assert HOLD_N (active low)
         await Timer(10, units='ns')  # Simulate hold duration
 
     async def release_hold(self):
         """Deassert HOLD_N for hold release."""
-        self.dut._log.info("Deasserting HOLD_N (Release Hold)")
+        if self.txn_log.byte_enabled():
+            self.dut._log.debug("Deasserting HOLD_N (Release Hold)")
         self.dut.HOLD_N.value = 1  # Release HOLD_N (inactive)
         await Timer(10, units='ns')  # Simulate release duration
 
@@ -0,0 +1,294 @@
+import logging
+import cocotb
+from cocotb.binary import BinaryValue
+from cocotb.triggers import FallingEdge, RisingEdge, Timer
+from cocotbext.ospi.ospi_codec import SERIAL_BEATS, sample_lanes
+from cocotbext.ospi.ospi_log import LOG_TRANSACTION, OspiTransactionLog
+from cocotbext.ospi.ospi_store import BLOCK_SIZE, SECTOR_SIZE, OspiPageStore
+from cocotbext.ospi.ospi_timing import DEFAULT_BUSY_TIMES, scale_ns
+
+# Status register bits
+STATUS_WIP = 0x01  # Write in progress
+STATUS_WEL = 0x02  # Write enable latch
+
+# Default command set: opcode -> (operation, address mode, data mode, dummy cycles).
+# Modes are 0-3 (single, dual, quad, octal); None means the phase is absent.
+DEFAULT_COMMANDS = {
+    0x03: ('read', 0, 0, 0),            # Read, 1-1-1
+    0x0B: ('read', 0, 0, 8),            # Fast read, 1-1-1
+    0x3B: ('read', 0, 1, 8),            # Dual output fast read, 1-1-2
+    0xBB: ('read', 1, 1, 4),            # Dual I/O fast read, 1-2-2
+    0x6B: ('read', 0, 2, 8),            # Quad output fast read, 1-1-4
+    0xEB: ('read', 2, 2, 6),            # Quad I/O fast read, 1-4-4
+    0x8B: ('read', 0, 3, 8),            # Octal output fast read, 1-1-8
+    0xCB: ('read', 3, 3, 16),           # Octal I/O fast read, 1-8-8
+    0x02: ('program', 0, 0, 0),         # Page program, 1-1-1
+    0xA2: ('program', 0, 1, 0),         # Dual input fast program, 1-1-2
+    0x32: ('program', 0, 2, 0),         # Quad input fast program, 1-1-4
+    0x38: ('program', 2, 2, 0),         # Quad I/O extended fast program, 1-4-4
+    0x82: ('program', 0, 3, 0),         # Octal input fast program, 1-1-8
+    0xC2: ('program', 3, 3, 0),         # Octal I/O extended fast program, 1-8-8
+    0x20: ('erase_sector', 0, None, 0),  # 4 KB sector erase
+    0xD8: ('erase_block', 0, None, 0),   # 64 KB block erase
+    0xC7: ('erase_chip', None, None, 0), # Chip erase
+    0x60: ('erase_chip', None, None, 0), # Chip erase (alternate opcode)
+    0x05: ('read_status', None, 0, 0),  # Read status register
+    0x06: ('write_enable', None, None, 0),
+    0x04: ('write_disable', None, None, 0),
+}
+
+
+class OspiFlashModel:
+    def __init__(self, clk, cs, io, io_out=None, size=None, store=None, address_bytes=3, command_mode=0,
+                 page_size=256, commands=None, log=None, log_policy=LOG_TRANSACTION, busy_times=None,
+                 time_scale=None):
+        """
+        Initialize the OspiFlashModel object.
+
+        The model is a behavioural OSPI flash device driven entirely from
+        Python. It watches chip select and the serial clock, decodes the
+        command, address and dummy phases from the I/O lanes and serves reads
+        from a sparse backing store. Lanes are sampled on the rising clock
+        edge and read data is driven on the falling edge, IO[lanes-1:0] most
+        significant bits first.
+
+        Program and erase operations set the write-in-progress status bit for
+        their modelled busy time; the device ignores further program and
+        erase commands until it clears.
+
+        Parameters:
+        clk -- Serial clock signal
+        cs -- Chip select signal (active low)
+        io -- I/O vector sampled for command, address and write data
+        io_out -- I/O vector driven with read data, defaults to io
+        size -- Device size in bytes, or None for an unbounded device; must match store.size when both are given
+        store -- OspiPageStore holding the contents, created if not given
+        address_bytes -- Address length in bytes (3 or 4)
+        command_mode -- 0 for extended SPI (1-x-x commands); 1-3 to run every phase on that many lanes (e.g. 8-8-8)
+        page_size -- Program page size; programs wrap within a page
+        commands -- Command table overriding DEFAULT_COMMANDS
+        log -- Logger for transaction records
+        log_policy -- Logging policy: 'off', 'transaction' (default) or 'byte'
+        busy_times -- Busy times in ns overriding DEFAULT_BUSY_TIMES, keyed by operation
+        time_scale -- Factor applied to the busy times, or None for the global time-scale factor
+        """
+        if store is not None and size is not None and size != store.size:
+            raise ValueError(f"Model size {size} does not match the store size {store.size}")
+        self.clk = clk
+        self.cs = cs
+        self.io = io
+        self.io_out = io if io_out is None else io_out
+        self.store = store if store is not None else OspiPageStore(size)
+        self.size = self.store.size
+        self.address_bytes = address_bytes
+        self.command_mode = command_mode
+        self.page_size = page_size
+        self.commands = dict(DEFAULT_COMMANDS if commands is None else commands)
+        self.log = log if log is not None else logging.getLogger("cocotb.ospi_flash_model")
+        self.txn_log = OspiTransactionLog(self.log, log_policy)
+        self.busy_times = dict(DEFAULT_BUSY_TIMES)
+        if busy_times is not None:
+            self.busy_times.update(busy_times)
+        self.time_scale = time_scale
+
+        self.status = 0  # Status register
+        self._task = None
+        self._busy_task = None  # Clears WIP when the current program or erase completes
+
+        # Decoded state of the current transaction, applied when chip select is deasserted
+        self._operation = None
+        self._opcode = None
+        self._address = None
+        self._data = None  # Bytes collected by a program
+        self._driven = 0  # Bytes driven by a read
+
+        # Triggers and drive values are built once and reused for every beat
+        self._rising = RisingEdge(clk)
+        self._falling = FallingEdge(clk)
+        self._release = BinaryValue('z' * 8, n_bits=8, bigEndian=False)
+        self._beat_values = tuple(
+            tuple(BinaryValue('z' * (8 - (1 << mode)) + format(beat, f'0{1 << mode}b'), n_bits=8, bigEndian=False)
+                  for beat in range(1 << (1 << mode)))
+            for mode in range(4)
+        )
+
+    @classmethod
+    def from_prefix(cls, dut, prefix='OSPI', cs_name=None, **kwargs):
+        """
+        Create a model watching the <prefix>_CLK, <prefix>_CS and <prefix>_IO signals of dut.
+
+        Parameters:
+        dut -- Handle holding the signals
+        prefix -- Signal name prefix, e.g. 'OSPI' or 'OSPI1'
+        cs_name -- Name of another chip select on the same bus (e.g. 'OSPI_CS1' for a second die)
+        kwargs -- Remaining OspiFlashModel arguments
+        """
+        return cls(getattr(dut, f"{prefix}_CLK"), getattr(dut, cs_name or f"{prefix}_CS"), getattr(dut, f"{prefix}_IO"),
+                   **kwargs)
+
+    def start(self):
+        """Start watching the bus."""
+        if self._task is None:
+            self._task = cocotb.start_soon(self._run())
+
+    def stop(self):
+        """Stop watching the bus and release the I/O lanes."""
+        if self._task is not None:
+            self._task.kill()
+            self._task = None
+        if self._busy_task is not None:
+            self._busy_task.kill()
+            self._busy_task = None
+        self.status &= ~(STATUS_WIP | STATUS_WEL)
+        self.io_out.value = self._release
+
+    @property
+    def busy(self):
+        """True while a program or erase is in progress."""
+        return bool(self.status & STATUS_WIP)
+
+    async def _run(self):
+        cs_fall = FallingEdge(self.cs)
+        cs_rise = RisingEdge(self.cs)
+        while True:
+            await cs_fall  # Chip select asserted (active low)
+            start = self.txn_log.begin()
+            self._operation = self._opcode = self._address = self._data = None
+            self._driven = 0
+            transaction = cocotb.start_soon(self._transaction())
+            await cs_rise  # Chip select deasserted ends every transaction
+            transaction.kill()
+            self.io_out.value = self._release
+            self._complete(start)
+
+    async def _shift_in(self, count, mode):
+        # Shift in `count` bytes on 1 << mode lanes and return them as a big-endian integer
+        lanes = 1 << mode
+        io = self.io
+        value = 0
+        for _ in range((count * 8) // lanes):
+            await self._rising
+            bits = sample_lanes(io.value, lanes)
+            if bits is None:
+                raise ValueError("Z/X on an active lane during the command or address phase")
+            value = (value << lanes) | bits
+        return value
+
+    async def _drive(self, data, mode):
+        # Drive bytes on 1 << mode lanes, one beat per falling edge
+        beats = SERIAL_BEATS[mode]
+        values = self._beat_values[mode]
+        io_out = self.io_out
+        for byte in data:
+            for beat in beats[byte]:
+                await self._falling
+                io_out.value = values[beat]
+            self._driven += 1
+
+    async def _transaction(self):
+        command_mode = self.command_mode
+        try:
+            opcode = await self._shift_in(1, command_mode)
+        except ValueError as exc:
+            self.log.warning("OSPI model ignoring transaction: %s", exc)
+            return
+        entry = self.commands.get(opcode)
+        if entry is None:
+            self.log.warning("OSPI model ignoring unsupported command %#04x", opcode)
+            return
+        operation, address_mode, data_mode, dummy = entry
+        if command_mode:
+            # Every phase runs on the command lanes (e.g. 8-8-8)
+            address_mode = None if address_mode is None else command_mode
+            data_mode = None if data_mode is None else command_mode
+
+        address = None
+        if address_mode is not None:
+            try:
+                address = await self._shift_in(self.address_bytes, address_mode)
+            except ValueError as exc:
+                self.log.warning("OSPI model ignoring command %#04x: %s", opcode, exc)
+                return
+            if self.size is not None:
+                address %= self.size
+        self._operation, self._opcode, self._address = operation, opcode, address
+
+        for _ in range(dummy):
+            await self._rising
+
+        if operation == 'read':
+            await self._serve_read(address, data_mode)
+        elif operation == 'read_status':
+            while True:  # Status is re-sent until chip select is deasserted
+                await self._drive((self.status,), data_mode)
+        elif operation == 'program':
+            self._data = bytearray()
+            while True:  # Collect whole bytes until chip select is deasserted
+                self._data.append(await self._shift_in(1, data_mode))
+
+    async def _serve_read(self, address, mode):
+        chunk = 256  # Bytes fetched from the store at a time
+        while True:
+            length = chunk if self.size is None else min(chunk, self.size - address)
+            await self._drive(self.store.read(address, length), mode)
+            address += length
+            if self.size is not None and address >= self.size:
+                address = 0  # Sequential reads wrap at the end of the device
+
+    def _complete(self, start):
+        # Apply the operation decoded during the transaction that just ended
+        operation, opcode, address, data = self._operation, self._opcode, self._address, self._data
+        if operation is None:
+            self.txn_log.end(start, 'unknown', opcode, None, self.command_mode, 0)
+            return
+        length = self._driven
+        if operation == 'write_enable':
+            self.status |= STATUS_WEL
+        elif operation == 'write_disable':
+            self.status &= ~STATUS_WEL
+        elif operation in ('program', 'erase_sector', 'erase_block', 'erase_chip'):
+            if self.status & STATUS_WIP:
+                self.log.warning("OSPI model ignoring %s while busy", operation)
+            elif not self.status & STATUS_WEL:
+                self.log.warning("OSPI model ignoring %s without write enable", operation)
+            elif operation == 'program' and not data:
+                # Chip select went high before a whole data byte: the program is aborted
+                self.log.warning("OSPI model ignoring program without data at %#x", address)
+            else:
+                if operation == 'program':
+                    length = len(data)
+                    self._program(address, data)
+                elif operation == 'erase_chip':
+                    self.store.erase()
+                elif address is not None:
+                    size = SECTOR_SIZE if operation == 'erase_sector' else BLOCK_SIZE
+                    self.store.erase(address - address % size, size)
+                self._start_busy(operation)
+        self.txn_log.end(start, operation, opcode, address, self.command_mode, length,
+                         data if operation == 'program' else None)
+
+    def _start_busy(self, operation):
+        # The store is updated immediately; WIP reports the modelled busy time to status polls
+        busy_ns = scale_ns(self.busy_times.get(operation, 0), self.time_scale)
+        if busy_ns <= 0:
+            self.status &= ~STATUS_WEL  # Completes at once
+            return
+        self.status |= STATUS_WIP
+        self._busy_task = cocotb.start_soon(self._busy(busy_ns))
+
+    async def _busy(self, busy_ns):
+        await Timer(busy_ns, units='ns')
+        self.status &= ~(STATUS_WIP | STATUS_WEL)  # Program and erase clear the write enable latch on completion
+        self._busy_task = None
+
+    def _program(self, address, data):
+        # Page program: data past the end of the page wraps to the start of the same page
+        page_size = self.page_size
+        if len(data) > page_size:
+            data = data[-page_size:]  # Only the last page_size bytes are retained
+        page_start = address - address % page_size
+        offset = address - page_start
+        first = min(len(data), page_size - offset)
+        self.store.program(address, data[:first])
+        if first < len(data):
+            self.store.program(page_start, data[first:])
@@ -0,0 +1,124 @@
+import logging
+import zlib
+from time import perf_counter
+from cocotb.utils import get_sim_time
+
+# Logging policies
+LOG_OFF = 'off'                  # No OSPI log records at all
+LOG_TRANSACTION = 'transaction'  # One summary record per transaction (default)
+LOG_BYTE = 'byte'                # Transaction summaries plus per-byte DEBUG records
+
+LOG_POLICIES = (LOG_OFF, LOG_TRANSACTION, LOG_BYTE)
+
+
+class OspiTransactionLog:
+    def __init__(self, log, policy=LOG_TRANSACTION):
+        """
+        Initialize the OspiTransactionLog object.
+
+        Parameters:
+        log -- Logger to emit records to (usually dut._log)
+        policy -- Logging policy: LOG_OFF, LOG_TRANSACTION or LOG_BYTE
+        """
+        self.log = log  # Store reference to the logger
+        self.policy = policy  # Validated by the property setter
+        self._depth = 0  # Nesting depth, only the outermost transaction is summarised
+        self.recorder = None  # Optional OspiFlightRecorder fed with every outermost transaction
+        self.stats = None  # Optional OspiStats counting every outermost transaction
+        self.coverage = None  # Optional OspiCoverage binning every outermost transaction
+        self._wall_start = 0.0  # Host clock at the start of the outermost transaction
+
+    @property
+    def policy(self):
+        return self._policy
+
+    @policy.setter
+    def policy(self, policy):
+        if policy not in LOG_POLICIES:
+            raise ValueError(f"Unsupported log policy: {policy}")  # Raise error for unsupported policies
+        self._policy = policy
+
+    def byte_enabled(self):
+        """
+        Return True if per-byte records should be formatted and emitted.
+
+        Callers hoist this out of their byte loops so disabled logging costs
+        one check per transaction.
+        """
+        return self._policy == LOG_BYTE and self.log.isEnabledFor(logging.DEBUG)
+
+    def summary_enabled(self):
+        """Return True if transaction summary records are emitted."""
+        return self._policy != LOG_OFF and self.log.isEnabledFor(logging.INFO)
+
+    def counting_enabled(self):
+        """Return True if transactions are counted by an enabled OspiStats."""
+        return self.stats is not None and self.stats.enabled
+
+    def begin(self):
+        """
+        Mark the start of a transaction.
+
+        Returns:
+        Start time in ns for the outermost transaction when it is logged,
+        recorded, counted or covered, None otherwise
+        """
+        self._depth += 1
+        if self._depth == 1 and (self.recorder is not None or self.coverage is not None or self.counting_enabled()
+                                 or self.summary_enabled()):
+            self._wall_start = perf_counter()
+            return get_sim_time(units='ns')
+        return None
+
+    def abort(self):
+        """Forget the transactions left open by a killed coroutine, so the next one is outermost again."""
+        self._depth = 0
+
+    def end(self, start, operation, command, address, mode, length, data=None):
+        """
+        Mark the end of a transaction, record and count it and emit its summary record.
+
+        The record carries the transaction fields in the `ospi` attribute so
+        handlers can consume them without parsing the message.
+
+        Parameters:
+        start -- Value returned by the matching begin() call
+        operation -- Operation name ('write', 'read', 'erase', ...)
+        command -- Command opcode, or None
+        address -- Start address, or None
+        mode -- Mode the transaction ran in
+        length -- Number of data bytes transferred
+        data -- Transferred data to hash, or None
+        """
+        self._depth -= 1
+        if start is None:
+            return  # Nested or disabled, nothing is formatted
+        now = get_sim_time(units='ns')
+        if self.recorder is not None:
+            self.recorder.record(start, now, operation, command, address, mode, length, data)
+        if self.counting_enabled():
+            self.stats.transaction(operation, command, mode, length, now - start, perf_counter() - self._wall_start)
+        if self.coverage is not None:
+            self.coverage.sample(command, mode, address, length)
+        if not self.summary_enabled():
+            return
+        duration = now - start
+        crc = zlib.crc32(bytes(data)) if data is not None else None
+        record = {
+            'operation': operation,
+            'command': command,
+            'address': address,
+            'length': length,
+            'mode': mode,
+            'duration_ns': duration,
+            'crc32': crc,
+        }
+        self.log.info(
+            "OSPI %s cmd=%s addr=%s len=%d mode=%d duration=%gns crc32=%s",
+            operation,
+            'None' if command is None else f"{command:#04x}",
+            f"{address:#x}" if isinstance(address, int) else str(address),
+            length, mode, duration,
+            'None' if crc is None else f"{crc:08x}",
+            extra={'ospi': record},
+        )
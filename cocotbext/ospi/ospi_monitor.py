@@ -0,0 +1,323 @@
+import struct
+import cocotb
+from cocotb.triggers import Edge, FallingEdge, RisingEdge
+from cocotb.utils import get_sim_time
+from cocotbext.ospi.ospi_codec import DECODE_TABLES, encode_byte, sample_lanes
+from cocotbext.ospi.ospi_config import XIP_MODE_BITS, OspiConfig
+
+# Trace file layout: a magic/version header, then one length-prefixed record per transaction
+TRACE_MAGIC = b'OSPT\x01'
+_LENGTH = struct.Struct('<I')
+_HEADER = struct.Struct('<QQBBBBI')  # start_ns, end_ns, flags, mode, command, name length, address
+
+# Record flags
+FLAG_DTR = 0x01      # Transaction ran on both clock edges
+FLAG_COMMAND = 0x02  # Command was recognised
+FLAG_ADDRESS = 0x04  # Address phase was decoded
+FLAG_INVALID = 0x08  # Z/X seen on an active lane; the affected bytes are stored as 0
+
+# Operations without an address phase, operations whose data is driven by the device,
+# operations whose data is driven by the host, operations without a data phase,
+# and operations followed by mode bits, as sent by OspiBus and OspiFlash
+_NO_ADDRESS = ('read_status',)
+_DEVICE_DATA = ('read', 'read_dtr', 'fast_read', 'xip_read', 'read_status')
+_HOST_DATA = ('write', 'write_dtr')
+_NO_DATA = ('erase',)
+_MODE_BITS = {'xip_read': 1}
+
+
+class OspiTraceRecord:
+    __slots__ = ('start_ns', 'end_ns', 'operation', 'mode', 'dtr', 'command', 'address', 'data', 'invalid')
+
+    def __init__(self, start_ns, end_ns, operation, mode, dtr, command, address, data, invalid=False):
+        """
+        Initialize an OspiTraceRecord.
+
+        Parameters:
+        start_ns -- Chip select assertion time in ns
+        end_ns -- Chip select deassertion time in ns
+        operation -- Operation name, 'unknown' if the command was not recognised, or 'ambiguous'
+                     if several commands match the frame
+        mode -- Mode the transaction ran in, or None if unknown
+        dtr -- True if the transaction ran on both clock edges
+        command -- Command opcode, or None if unknown
+        address -- Decoded address, or None
+        data -- Payload bytes (raw lane samples for unknown commands)
+        invalid -- True if Z/X was seen on an active lane
+        """
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.operation = operation
+        self.mode = mode
+        self.dtr = dtr
+        self.command = command
+        self.address = address
+        self.data = data
+        self.invalid = invalid
+
+    def __repr__(self):
+        return (f"OspiTraceRecord({self.operation}, cmd={'None' if self.command is None else f'{self.command:#04x}'}, "
+                f"addr={'None' if self.address is None else f'{self.address:#x}'}, mode={self.mode}, dtr={self.dtr}, "
+                f"len={len(self.data)}, start={self.start_ns}ns, end={self.end_ns}ns)")
+
+    def pack(self):
+        """Return the record in its length-prefixed binary trace form."""
+        name = self.operation.encode()
+        flags = ((FLAG_DTR if self.dtr else 0) | (FLAG_COMMAND if self.command is not None else 0)
+                 | (FLAG_ADDRESS if self.address is not None else 0) | (FLAG_INVALID if self.invalid else 0))
+        header = _HEADER.pack(int(self.start_ns), int(self.end_ns), flags, 0xFF if self.mode is None else self.mode,
+                              self.command or 0, len(name), self.address or 0)
+        body = header + name + bytes(self.data)
+        return _LENGTH.pack(len(body)) + body
+
+    @classmethod
+    def unpack(cls, body):
+        """
+        Build a record from its binary form (without the length prefix).
+
+        Parameters:
+        body -- Record bytes following the length prefix
+        """
+        start_ns, end_ns, flags, mode, command, name_length, address = _HEADER.unpack_from(body)
+        offset = _HEADER.size
+        operation = bytes(body[offset:offset + name_length]).decode()
+        return cls(start_ns, end_ns, operation, None if mode == 0xFF else mode, bool(flags & FLAG_DTR),
+                   command if flags & FLAG_COMMAND else None, address if flags & FLAG_ADDRESS else None,
+                   bytes(body[offset + name_length:]), bool(flags & FLAG_INVALID))
+
+
+def read_trace(path):
+    """
+    Iterate over the records of a binary trace file.
+
+    Parameters:
+    path -- Trace file written by OspiMonitor
+
+    Returns:
+    Iterator of OspiTraceRecord objects
+    """
+    with open(path, 'rb') as trace_file:
+        if trace_file.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise ValueError(f"{path} is not an OSPI trace file")
+        while True:
+            prefix = trace_file.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                return  # End of trace (a truncated final record is dropped)
+            length, = _LENGTH.unpack(prefix)
+            body = trace_file.read(length)
+            if len(body) < length:
+                return
+            yield OspiTraceRecord.unpack(body)
+
+
+class OspiMonitor:
+    def __init__(self, clk, cs, io, path=None, config=None, dtr=True, callback=None, buffer_size=1 << 16):
+        """
+        Initialize the OspiMonitor object.
+
+        The monitor is passive: it samples the I/O vector on the clock edges
+        while chip select is active and reconstructs each transaction
+        (command, address, mode, payload) when chip select is released. The
+        framing follows OspiBus: one lane-ordered byte per edge for commands,
+        addresses and programmed data, serial beats on IO[lanes-1:0] for data
+        driven by the device. When the first beat matches several commands
+        the following phases decide: the frame length must fit the address
+        width, dummy cycles and data bytes of the command, and only a
+        continuous read drives mode bits in its first dummy cycle. A frame
+        that fits none or more than one of them is recorded as 'ambiguous'
+        with its raw lane samples.
+
+        Parameters:
+        clk -- Serial clock signal
+        cs -- Chip select signal
+        io -- I/O vector
+        path -- Binary trace file to stream records to, or None
+        config -- OspiConfig the bus runs with (opcodes, address width, dummy cycles, CS polarity)
+        dtr -- Sample both clock edges so DTR transactions can be decoded; False halves the sampling cost
+        callback -- Called with every OspiTraceRecord, or None
+        buffer_size -- Write buffer size of the trace file in bytes
+        """
+        self.clk = clk
+        self.cs = cs
+        self.io = io
+        self.profile = (config if config is not None else OspiConfig()).compile(clk)
+        self.dtr = dtr
+        self.callback = callback
+        self.path = path
+        self.buffer_size = buffer_size
+        self.count = 0  # Transactions seen
+        self._file = None
+        self._task = None
+
+        # Lane-ordered XIP mode bits per mode, which mark a continuous read in its first dummy cycle
+        self._mode_bits = [encode_byte(XIP_MODE_BITS, mode) for mode in range(4)]
+
+        # Candidate (mode, operation, opcode) tuples per lane-ordered first beat, built once
+        self._commands = {}
+        for operation, opcodes in self.profile.commands.items():
+            for mode, opcode in sorted(opcodes.items()):
+                self._commands.setdefault(encode_byte(opcode, mode), []).append((mode, operation, opcode))
+
+    def start(self):
+        """Open the trace file and start monitoring."""
+        if self._task is None:
+            if self.path is not None and self._file is None:
+                self._file = open(self.path, 'wb', buffering=self.buffer_size)
+                self._file.write(TRACE_MAGIC)
+            self._task = cocotb.start_soon(self._run())
+
+    def stop(self):
+        """Stop monitoring and flush and close the trace file."""
+        if self._task is not None:
+            self._task.kill()
+            self._task = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def flush(self):
+        """Flush buffered records to the trace file."""
+        if self._file is not None:
+            self._file.flush()
+
+    async def _run(self):
+        active, inactive = self.profile.cs_active, self.profile.cs_inactive
+        assert_edge = FallingEdge(self.cs) if active == 0 else RisingEdge(self.cs)
+        release_edge = RisingEdge(self.cs) if active == 0 else FallingEdge(self.cs)
+        while True:
+            if self.cs.value != active:
+                await assert_edge
+            start = get_sim_time(units='ns')
+            samples = []
+            sampler = cocotb.start_soon(self._sample(samples))
+            await release_edge
+            sampler.kill()
+            self._emit(self._decode(start, get_sim_time(units='ns'), samples))
+
+    async def _sample(self, samples):
+        # Collect (value, rising edge) for every edge while chip select is active; values are ints,
+        # or the sampled BinaryValue when some lane is Z/X so the active lanes can be resolved later
+        clk, io = self.clk, self.io
+        edge = Edge(clk) if self.dtr else self.profile.sample_edge
+        append = samples.append
+        while True:
+            await edge
+            value = io.value
+            append((value.integer if value.is_resolvable else value, clk.value == 1))
+
+    def _emit(self, record):
+        self.count += 1
+        if self._file is not None:
+            self._file.write(record.pack())
+        if self.callback is not None:
+            self.callback(record)
+
+    @staticmethod
+    def _lanes(value, lanes):
+        # Active lanes of a sample, or None if one of them is Z/X
+        if isinstance(value, int):
+            return value & ((1 << lanes) - 1)
+        return sample_lanes(value, lanes)
+
+    def _match(self, samples, sdr):
+        # Return (mode, operation, opcode, dtr, beats after the command phase), None for an unknown
+        # command, or an empty tuple for a frame several commands fit
+        first = samples[0][0]
+        if self.dtr and isinstance(first, int) and len(samples) > 1:
+            second = self._lanes(samples[1][0], 8)
+            for mode, operation, opcode in self._commands.get(first, ()):
+                if operation.endswith('_dtr') and second is not None and DECODE_TABLES[mode][second] == opcode ^ 0xFF:
+                    return mode, operation, opcode, True, samples[2:]  # Opcode plus inverted extension
+        first = sdr[0][0]
+        if not isinstance(first, int):
+            return None
+        candidates = [candidate for candidate in self._commands.get(first, ()) if not candidate[1].endswith('_dtr')]
+        if len(candidates) > 1:
+            candidates = [candidate for candidate in candidates if self._fits(*candidate, sdr[1:])]
+            if len(candidates) != 1:
+                return ()  # Ambiguous: the phases after the command do not single out one command
+        if not candidates:
+            return None
+        mode, operation, opcode = candidates[0]
+        return mode, operation, opcode, False, sdr[1:]
+
+    def _fits(self, mode, operation, opcode, beats):
+        # Check the SDR beats after the command phase against the phases the command has
+        count = len(beats)
+        address = 0 if operation in _NO_ADDRESS else self.profile.address_bytes
+        if operation in _NO_DATA:
+            return count == address
+        if operation in _HOST_DATA:
+            return count > address
+        if operation not in _DEVICE_DATA:
+            return count >= address  # Command from a custom table, its phases are not known
+        mode_bits = _MODE_BITS.get(operation, 0)
+        turnaround = max(self.profile.dummy_cycles.get(opcode, 0), mode_bits)
+        if turnaround:
+            # A plain read releases the lanes in its first dummy cycle, a continuous read drives mode bits there
+            if count <= address:
+                return False
+            value = beats[address][0]
+            if (isinstance(value, int) and value == self._mode_bits[mode]) != bool(mode_bits):
+                return False
+        data = count - address - turnaround
+        return data > 0 and data % (8 >> mode) == 0
+
+    def _decode(self, start, end, samples):
+        # Identify the command from the first beat, then split address, dummy and data phases
+        sdr = [sample for sample in samples if sample[1]] if self.dtr else samples
+        if not sdr:
+            return OspiTraceRecord(start, end, 'unknown', None, False, None, None, b'')
+        match = self._match(samples, sdr)
+        if not match:
+            raw = [self._lanes(value, 8) for value, _ in sdr]
+            return OspiTraceRecord(start, end, 'unknown' if match is None else 'ambiguous', None, False, None, None,
+                                   bytes(value or 0 for value in raw), None in raw)
+
+        mode, operation, opcode, dtr, beats = match
+        decode = DECODE_TABLES[mode]
+        invalid = False
+        address = None
+        position = 0
+        if operation not in _NO_ADDRESS:
+            address_bytes = bytearray()
+            for value, _ in beats[:self.profile.address_bytes]:
+                value = self._lanes(value, 8)
+                if value is None:
+                    invalid = True
+                    value = 0
+                address_bytes.append(decode[value])
+            address = int.from_bytes(address_bytes, 'big')
+            position = len(address_bytes)
+        position += _MODE_BITS.get(operation, 0)
+
+        # The dummy phase ends on the rising edge that completes the last dummy cycle
+        dummy = self.profile.dummy_cycles.get(opcode, 0) - _MODE_BITS.get(operation, 0)
+        while dummy > 0 and position < len(beats):
+            dummy -= beats[position][1]
+            position += 1
+
+        data = bytearray()
+        payload = beats[position:]
+        if operation in _DEVICE_DATA:
+            # Serial beats on IO[lanes-1:0], most significant bits first
+            lanes = 1 << mode
+            per_byte = 8 // lanes
+            for index in range(0, len(payload) - per_byte + 1, per_byte):
+                byte = 0
+                for value, _ in payload[index:index + per_byte]:
+                    value = self._lanes(value, lanes)
+                    if value is None:
+                        invalid = True
+                        value = 0
+                    byte = (byte << lanes) | value
+                data.append(byte)
+        else:
+            # One lane-ordered byte per beat
+            for value, _ in payload:
+                value = self._lanes(value, 8)
+                if value is None:
+                    invalid = True
+                    value = 0
+                data.append(decode[value])
+        return OspiTraceRecord(start, end, operation, mode, dtr, opcode, address, bytes(data), invalid)
@@ -0,0 +1,84 @@
+from cocotbext.ospi.ospi_snapshot import DEFAULT_STATE_PATHS
+from cocotbext.ospi.ospi_verify import VERIFY_ALWAYS, VERIFY_POLICIES
+
+
+class OspiFlashOptions:
+    def __init__(self, verify=VERIFY_ALWAYS, verify_every=1, size=None, page_size=256, memory_path='dut.memory',
+                 state_paths=DEFAULT_STATE_PATHS, poll_status=False, poll_ns=100, poll_max_ns=10_000, busy_times=None,
+                 xip_line_size=32, xip_lines=64, xip_prefetch=1, recorder_depth=64):
+        """
+        Initialize the OspiFlashOptions object.
+
+        Groups the OspiFlash driver options, so a new driver feature adds a
+        field here rather than another OspiFlash keyword. OspiFlash also
+        accepts every option as a keyword argument that overrides its options.
+
+        Parameters:
+        verify -- How writes are checked: 'none', 'always', 'sampled' (every verify_every writes)
+                  or 'deferred' (checked in one batch by verify_pending())
+        verify_every -- Write interval of the sampled policy
+        size -- Modelled device size in bytes, None for an unbounded backing store
+        page_size -- Program page size used by program_range()
+        memory_path -- Hierarchical path of the device memory array below dut, used by the backdoor
+        state_paths -- Hierarchical paths below dut of the device state signals captured by snapshot()
+        poll_status -- Wait on the status register after program and erase through wait_ready() instead of
+                       waiting out their busy times
+        poll_ns -- First status polling interval in ns
+        poll_max_ns -- Longest status polling interval in ns
+        busy_times -- Busy times in ns overriding DEFAULT_BUSY_TIMES, keyed by operation; without status
+                      polling they are waited out after every program and erase
+        xip_line_size -- Line size of the prefetch cache used by xip_read()
+        xip_lines -- Number of lines the prefetch cache holds
+        xip_prefetch -- Lines fetched ahead of a miss
+        recorder_depth -- Transactions kept by the flight recorder (0 disables it)
+        """
+        self.verify = verify  # Validated by the property setters
+        self.verify_every = verify_every
+        self.size = size
+        self.page_size = page_size
+        self.memory_path = memory_path
+        self.state_paths = tuple(state_paths)
+        self.poll_status = poll_status
+        self.poll_ns = poll_ns
+        self.poll_max_ns = poll_max_ns
+        self.busy_times = None if busy_times is None else dict(busy_times)
+        self.xip_line_size = xip_line_size
+        self.xip_lines = xip_lines
+        self.xip_prefetch = xip_prefetch
+        self.recorder_depth = recorder_depth
+
+    @property
+    def verify(self):
+        return self._verify
+
+    @verify.setter
+    def verify(self, verify):
+        if verify not in VERIFY_POLICIES:
+            raise ValueError(f"Unsupported verify policy: {verify}")  # Raise error for unsupported policy
+        self._verify = verify
+
+    @property
+    def verify_every(self):
+        return self._verify_every
+
+    @verify_every.setter
+    def verify_every(self, verify_every):
+        if verify_every < 1:
+            raise ValueError(f"Sampled verification interval must be at least 1, got {verify_every}")
+        self._verify_every = verify_every
+
+    def _fields(self):
+        # Option name -> value, with the validated options under their public names
+        return {name.lstrip('_'): value for name, value in vars(self).items()}
+
+    def replace(self, **changes):
+        """
+        Return a copy with some options changed.
+
+        Parameters:
+        changes -- Option names and their new values
+        """
+        return OspiFlashOptions(**dict(self._fields(), **changes))
+
+    def __repr__(self):
+        return f"OspiFlashOptions({', '.join(f'{name}={value!r}' for name, value in self._fields().items())})"
@@ -0,0 +1,229 @@
+import cocotb
+from cocotb.queue import Queue
+from cocotb.triggers import Event, Timer
+
+# Transaction operations accepted by OspiQueue
+OP_READ = 'read'
+OP_PROGRAM = 'program'
+OP_ERASE = 'erase'
+
+
+class OspiTransaction:
+    def __init__(self, operation, address, data=None, length=0, mode=0, dtr=False):
+        """
+        Initialize an OspiTransaction descriptor.
+
+        A submitted transaction is awaitable: `await txn` waits for the bus
+        driver to run it and returns its result, or raises the exception the
+        operation raised.
+
+        Parameters:
+        operation -- OP_READ, OP_PROGRAM or OP_ERASE
+        address -- Start address
+        data -- Data to program (OP_PROGRAM only)
+        length -- Number of bytes to read (OP_READ only)
+        mode -- Mode for the transfer
+        dtr -- Use the double transfer rate path (reads and programs only)
+        """
+        if operation not in (OP_READ, OP_PROGRAM, OP_ERASE):
+            raise ValueError(f"Unsupported transaction operation: {operation}")
+        self.operation = operation
+        self.address = address
+        self.data = data
+        self.length = len(data) if operation == OP_PROGRAM else length
+        self.mode = mode
+        self.dtr = dtr
+        self.result = None      # (bytes, validity bitmap) for reads, None otherwise
+        self.exception = None   # Exception raised while running the transaction
+        self._done = Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def _complete(self, result=None, exception=None):
+        self.result = result
+        self.exception = exception
+        self._done.set()
+
+    async def wait(self):
+        """Wait for the transaction to complete and return its result."""
+        await self._done.wait()
+        if self.exception is not None:
+            raise self.exception
+        return self.result
+
+    def __await__(self):
+        return self.wait().__await__()
+
+    def __repr__(self):
+        return (f"OspiTransaction({self.operation}, address={self.address:#x}, "
+                f"length={self.length}, mode={self.mode}, dtr={self.dtr})")
+
+
+class OspiQueue:
+    def __init__(self, flash, cs_high_ns=10, coalesce_reads=False, max_coalesce=4096):
+        """
+        Initialize the OspiQueue object.
+
+        The queue owns the flash's bus: one driver coroutine runs submitted
+        transactions in order, deasserts chip select after each one and holds
+        it high for the minimum gap before starting the next.
+
+        Parameters:
+        flash -- OspiFlash instance whose bus the queue drives
+        cs_high_ns -- Minimum chip-select-high time between transactions in ns
+        coalesce_reads -- Merge queued reads that continue where the previous one ended
+        max_coalesce -- Upper bound on the length of a merged read in bytes
+        """
+        self.flash = flash  # Store reference to the flash driver
+        self.cs_high_ns = cs_high_ns
+        self.coalesce_reads = coalesce_reads
+        self.max_coalesce = max_coalesce
+
+        self._queue = Queue()
+        self._pending = None  # Transaction taken from the queue but not merged into a read
+        self._batch = ()  # Transactions the driver is running
+        self._outstanding = 0
+        self._idle = Event()
+        self._idle.set()
+        self._driver = None
+
+    def start(self):
+        """Start the bus driver coroutine."""
+        if self._driver is None:
+            self._driver = cocotb.start_soon(self._run())
+
+    def stop(self):
+        """
+        Stop the bus driver coroutine.
+
+        The transactions being run and those still queued fail with
+        RuntimeError, so no waiter is left hanging. A transaction cut off
+        part way is cleaned up by OspiFlash.abort(): the enables are cleared,
+        chip select is deasserted and the shared bus is released, so direct
+        flash calls can follow.
+        """
+        if self._driver is not None:
+            self._driver.kill()
+            self.flash.abort(self._driver)
+            self._driver = None
+        unfinished = [txn for txn in self._batch if not txn.done]
+        if self._pending is not None:
+            unfinished.append(self._pending)
+        while not self._queue.empty():
+            unfinished.append(self._queue.get_nowait())
+        for txn in unfinished:
+            txn._complete(exception=RuntimeError(f"{txn} cancelled: the transaction queue was stopped"))
+        self._batch = ()
+        self._pending = None
+        self._outstanding = 0
+        self._idle.set()
+
+    def submit(self, transaction):
+        """
+        Queue a transaction and return it as an awaitable future.
+
+        Parameters:
+        transaction -- OspiTransaction descriptor
+        """
+        self._outstanding += 1
+        self._idle.clear()
+        self._queue.put_nowait(transaction)
+        return transaction
+
+    def read(self, address, length, mode=0, dtr=False):
+        # Queue a read; the future resolves to (bytes, validity bitmap)
+        return self.submit(OspiTransaction(OP_READ, address, length=length, mode=mode, dtr=dtr))
+
+    def program(self, address, data, mode=0, dtr=False):
+        # Queue a page program; the future resolves to None
+        return self.submit(OspiTransaction(OP_PROGRAM, address, data=data, mode=mode, dtr=dtr))
+
+    def erase(self, address, mode=0):
+        # Queue an erase; the future resolves to None
+        return self.submit(OspiTransaction(OP_ERASE, address, mode=mode))
+
+    async def drain(self):
+        """Wait until every submitted transaction has completed."""
+        await self._idle.wait()
+
+    async def _next(self):
+        if self._pending is not None:
+            transaction, self._pending = self._pending, None
+            return transaction
+        return await self._queue.get()
+
+    def _take_sequential_reads(self, first):
+        # Collect queued reads that continue exactly where `first` ends
+        batch = [first]
+        end = first.address + first.length
+        total = first.length
+        while not self._queue.empty():
+            candidate = self._queue.get_nowait()
+            if (candidate.operation != OP_READ or candidate.mode != first.mode or candidate.dtr != first.dtr
+                    or candidate.address != end or total + candidate.length > self.max_coalesce):
+                self._pending = candidate  # Run it on its own after this batch
+                break
+            batch.append(candidate)
+            end += candidate.length
+            total += candidate.length
+        return batch
+
+    async def _run(self):
+        flash = self.flash
+        while True:
+            transaction = await self._next()
+            if transaction.operation == OP_READ and self.coalesce_reads:
+                batch = self._take_sequential_reads(transaction)
+            else:
+                batch = [transaction]
+            self._batch = batch
+
+            try:
+                result = await self._execute(transaction, sum(txn.length for txn in batch))
+            except Exception as exc:  # Report the failure to every waiter, keep the driver alive
+                for txn in batch:
+                    txn._complete(exception=exc)
+            else:
+                if len(batch) == 1:
+                    transaction._complete(result)
+                else:
+                    data, valid = result
+                    offset = 0
+                    for txn in batch:  # Split the merged read back into per-request results
+                        part = data[offset:offset + txn.length]
+                        txn._complete((part, self._slice_bitmap(valid, offset, txn.length)))
+                        offset += txn.length
+
+            # Serialize chip select: deassert and hold for the minimum gap
+            flash.cs.value = flash.profile.cs_inactive
+            if self.cs_high_ns:
+                await Timer(self.cs_high_ns, units='ns')
+
+            self._batch = ()
+            self._outstanding -= len(batch)
+            if self._outstanding == 0:
+                self._idle.set()
+
+    async def _execute(self, transaction, length):
+        flash = self.flash
+        if transaction.operation == OP_READ:
+            if transaction.dtr:
+                return await flash.read_bytes_dtr(transaction.address, length, transaction.mode)
+            return await flash.read_bytes(transaction.address, length, transaction.mode)
+        if transaction.operation == OP_PROGRAM:
+            if transaction.dtr:
+                await flash.write_dtr(transaction.address, transaction.data, transaction.mode)
+            else:
+                await flash.write(transaction.address, transaction.data, transaction.mode)
+            return None
+        await flash.erase(transaction.address, transaction.mode)
+        return None
+
+    @staticmethod
+    def _slice_bitmap(valid, offset, length):
+        # Extract the validity bits for bytes [offset, offset + length) of a merged read
+        value = int.from_bytes(valid, 'little') >> offset
+        value &= (1 << length) - 1
+        return bytearray(value.to_bytes((length + 7) >> 3, 'little'))
@@ -0,0 +1,231 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, batches are then drawn with the random module
+    np = None
+import random
+from cocotbext.ospi.ospi_codec import invalid_indices
+from cocotbext.ospi.ospi_store import BLOCK_SIZE, SECTOR_SIZE, OspiPageStore
+
+OPERATIONS = ('read', 'program', 'erase')  # Operations the generator mixes
+
+DEFAULT_REGIONS = ((0, 1 << 20, 1),)  # The first 1 MB, uniformly
+DEFAULT_LENGTHS = ((1, 16, 4), (17, 256, 2), (257, 4096, 1))  # Mostly short transfers
+DEFAULT_OPERATIONS = {'read': 6, 'program': 3, 'erase': 1}
+
+
+class OspiTrafficGenerator:
+    def __init__(self, flash, seed=0, regions=DEFAULT_REGIONS, lengths=DEFAULT_LENGTHS, modes=None,
+                 operations=None, erase_modes=None, page_size=256, batch_size=4096, use_numpy=True, check_bus=True):
+        """
+        Initialize the OspiTrafficGenerator object.
+
+        Operations are drawn in batches of batch_size, with NumPy when it is
+        available and use_numpy is set, and with the random module otherwise.
+        A seed reproduces the same traffic for the same backend. Programs never
+        cross a page boundary and every operation stays inside its region.
+
+        Every operation is applied to a reference OspiPageStore as well. On
+        every read the device memory array, seen through flash.backdoor_read,
+        is compared against the reference, and so is the data the read
+        returned on the bus wherever the lanes were driven. Bytes outside the
+        memory array or holding X there are counted as unchecked. When the
+        flash's memory_path does not resolve, the device is checked through
+        bus read-back alone: reads are compared against the reference, and
+        the final check reads every region over the bus.
+
+        Parameters:
+        flash -- OspiFlash to drive
+        seed -- Random seed
+        regions -- Sequence of (start, length, weight) address regions
+        lengths -- Sequence of (minimum, maximum, weight) transfer length ranges, inclusive
+        modes -- Dict of mode -> weight for reads and programs (defaults to modes 0-3 equally)
+        operations -- Dict of 'read', 'program' and 'erase' -> weight (defaults to 6/3/1)
+        erase_modes -- Dict of erase mode -> weight (defaults to sector erases only)
+        page_size -- Program page size
+        batch_size -- Operations drawn per batch
+        use_numpy -- Draw batches with NumPy when it is installed
+        check_bus -- Compare read data from the bus with the device; turn off for benches that do not drive reads,
+                     which then need a backdoor
+        """
+        operations = DEFAULT_OPERATIONS if operations is None else operations
+        unknown = set(operations) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(f"Unsupported operations: {sorted(unknown)}")
+        self.flash = flash
+        self.regions = tuple(regions)
+        self.lengths = tuple(lengths)
+        self.operations = tuple(operations.items())
+        self.modes = tuple((modes if modes is not None else dict.fromkeys(range(4), 1)).items())
+        self.erase_modes = tuple((erase_modes if erase_modes is not None else {0: 1}).items())
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.check_bus = check_bus
+        self.backdoor = flash.find_backdoor()  # None checks the device through bus read-back alone
+        if self.backdoor is None and not check_bus:
+            raise ValueError(f"Without bus checks the device needs a backdoor, {flash.memory_path} does not resolve")
+        for name, table in (('regions', self.regions), ('lengths', self.lengths), ('operations', self.operations),
+                            ('modes', self.modes), ('erase modes', self.erase_modes)):
+            if not table or any(entry[-1] < 0 for entry in table) or not sum(entry[-1] for entry in table):
+                raise ValueError(f"{name} need at least one positive weight")
+        for start, length, _ in self.regions:
+            if length <= 0:
+                raise ValueError(f"Empty address region at {start:#x}")
+
+        self._random = random.Random(seed)
+        self._numpy = np.random.default_rng(seed) if np is not None and use_numpy else None
+
+        # Reference contents, starting from what the driver holds; pages are shared read-only and copied on write
+        store = flash.data_store
+        self.reference = OspiPageStore(store.size, store.page_size)
+        self.reference.pages = {index: bytes(page) for index, page in store.pages.items()}
+
+        self.counts = dict.fromkeys(OPERATIONS, 0)  # Operations run
+        self.checked = 0  # Read bytes whose device contents were compared against the reference
+        self.unchecked = 0  # Read bytes outside the device memory array or holding X there
+
+    def _draw(self, table, count):
+        # Draw count indices into a weighted table
+        weights = [entry[-1] for entry in table]
+        if self._numpy is not None:
+            total = sum(weights)
+            return self._numpy.choice(len(table), size=count, p=[weight / total for weight in weights]).tolist()
+        return self._random.choices(range(len(table)), weights, k=count)
+
+    def _uniform(self, count):
+        # Draw count floats in [0, 1)
+        if self._numpy is not None:
+            return self._numpy.random(count).tolist()
+        draw = self._random.random
+        return [draw() for _ in range(count)]
+
+    def _payload(self, length):
+        # Random bytes that programs take their data from
+        if self._numpy is not None:
+            return self._numpy.integers(0, 256, length, dtype=np.uint8).tobytes()
+        return self._random.getrandbits(8 * length).to_bytes(length, 'little')
+
+    def generate(self, count):
+        """
+        Draw a batch of operations.
+
+        Parameters:
+        count -- Number of operations
+
+        Returns:
+        List of (operation, mode, address, length) tuples; length is 0 and mode is the erase mode for erases
+        """
+        batch = []
+        for operation, mode, erase_mode, region, length_range, length_draw, address_draw in zip(
+                self._draw(self.operations, count), self._draw(self.modes, count), self._draw(self.erase_modes, count),
+                self._draw(self.regions, count), self._draw(self.lengths, count),
+                self._uniform(count), self._uniform(count)):
+            operation = self.operations[operation][0]
+            start, span, _ = self.regions[region]
+            if operation == 'erase':
+                batch.append(('erase', self.erase_modes[erase_mode][0], start + int(address_draw * span), 0))
+                continue
+            low, high, _ = self.lengths[length_range]
+            length = min(low + int(length_draw * (high - low + 1)), span)
+            address = start + int(address_draw * (span - length + 1))
+            if operation == 'program':
+                length = min(length, self.page_size - address % self.page_size)  # Stay inside the page
+            batch.append((operation, self.modes[mode][0], address, length))
+        return batch
+
+    async def run(self, count, check_device=True):
+        """
+        Generate and run count operations against the flash and the reference.
+
+        Parameters:
+        count -- Number of operations
+        check_device -- Compare the device with the reference over every region at the end, through the
+                        backdoor or, without one, by reading each region over the bus
+
+        Returns:
+        Dict of operations run per operation name
+        """
+        flash = self.flash
+        reference = self.reference
+        longest = max(high for _, high, _ in self.lengths)
+        remaining = count
+        while remaining:
+            batch = self.generate(min(self.batch_size, remaining))
+            payload = self._payload(2 * min(longest, self.page_size))
+            for operation, mode, address, length in batch:
+                if operation == 'read':
+                    data, valid = await flash.read_bytes(address, length, mode)
+                    self._check(address, reference.read(address, length), data, valid)
+                elif operation == 'program':
+                    offset = address % (len(payload) - length + 1)
+                    data = payload[offset:offset + length]
+                    await flash.write(address, data, mode)
+                    reference.write(address, data)
+                else:
+                    await flash.erase(address, mode)
+                    if mode == 2:
+                        reference.erase()
+                    else:
+                        size = SECTOR_SIZE if mode == 0 else BLOCK_SIZE
+                        reference.erase(address - address % size, size)
+                self.counts[operation] += 1
+            remaining -= len(batch)
+
+        if check_device:
+            mode = self.modes[0][0]
+            for start, span, _ in self.regions:
+                if self.backdoor is None:
+                    data, valid = await flash.read_bytes(start, span, mode)
+                    self._check_read(start, reference.read(start, span), data, valid)
+                else:
+                    self._check_device(start, reference.read(start, span))
+        return dict(self.counts)
+
+    def _check_device(self, address, expected):
+        # Compare the device memory array with the expected contents; returns the device bytes and their
+        # X offsets, covering only the part of the range inside the array
+        count = max(min(len(expected), self.backdoor.size - address), 0)
+        if not count:
+            return b'', set()
+        device, valid = self.backdoor.read(address, count)
+        skipped = set(invalid_indices(valid, count))
+        if device != expected[:count]:
+            for index in range(count):
+                if index not in skipped and device[index] != expected[index]:
+                    self._fail(f"Device holds {device[index]:#04x} at {address + index:#x}, "
+                               f"expected {expected[index]:#04x}")
+        return device, skipped
+
+    def _check(self, address, expected, data, valid):
+        # Compare a read with the device, and the device with the reference
+        if self.backdoor is None:
+            self._check_read(address, expected, data, valid)
+            return
+        device, skipped = self._check_device(address, expected)
+        count = len(device)
+        self.unchecked += len(data) - count + len(skipped)
+        self.checked += count - len(skipped)
+        if not self.check_bus:
+            return
+        skipped.update(invalid_indices(valid, count))
+        if data[:count] != device:
+            for index in range(count):
+                if index not in skipped and data[index] != device[index]:
+                    self._fail(f"Read at {address + index:#x} returned {data[index]:#04x}, "
+                               f"device holds {device[index]:#04x}")
+
+    def _check_read(self, address, expected, data, valid):
+        # Compare a read straight with the reference, for benches without a backdoor; Z/X bytes are unchecked
+        skipped = set(invalid_indices(valid, len(data)))
+        self.unchecked += len(skipped)
+        self.checked += len(data) - len(skipped)
+        if data != expected:
+            for index in range(len(data)):
+                if index not in skipped and data[index] != expected[index]:
+                    self._fail(f"Read at {address + index:#x} returned {data[index]:#04x}, "
+                               f"expected {expected[index]:#04x}")
+
+    def _fail(self, message):
+        # Dump the flight recorder for context, then fail
+        if self.flash.recorder is not None:
+            self.flash.recorder.dump(reason=message)
+        raise AssertionError(message)
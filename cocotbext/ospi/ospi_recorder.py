@@ -0,0 +1,151 @@
+from array import array
+from contextlib import contextmanager
+from cocotbext.ospi.ospi_monitor import TRACE_MAGIC, OspiTraceRecord
+
+
+class OspiFlightRecorder:
+    def __init__(self, capacity=64, payload_bytes=16, path=None, log=None):
+        """
+        Initialize the OspiFlightRecorder object.
+
+        The recorder is a fixed-capacity ring buffer holding the last
+        `capacity` transactions in preallocated arrays, so recording a
+        transaction only overwrites one slot. Nothing is written out until
+        dump() is called, either on demand or when an assertion fails.
+
+        OspiFlash dumps automatically only when its own write verification or
+        verify_pending() fails; a write whose read-back failed is still open
+        and is named by the dump reason rather than recorded. Other failing
+        assertions in a test do not dump unless they are raised inside
+        capture_failures().
+
+        Parameters:
+        capacity -- Number of transactions kept
+        payload_bytes -- Leading payload bytes kept per transaction
+        path -- Trace file written by dump(), readable with read_trace(); None only logs the records
+        log -- Logger the dumped records are reported to
+        """
+        if capacity <= 0:
+            raise ValueError(f"Flight recorder capacity must be positive: {capacity}")
+        self.capacity = capacity
+        self.payload_bytes = payload_bytes
+        self.path = path
+        self.log = log
+        self.count = 0  # Transactions recorded since the last clear
+        self._next = 0  # Slot the next transaction is written to
+
+        self._start = array('d', bytes(8 * capacity))
+        self._end = array('d', bytes(8 * capacity))
+        self._operation = array('B', bytes(capacity))  # Index into self._names
+        self._command = array('h', bytes(2 * capacity))  # -1 for no command
+        self._mode = array('b', bytes(capacity))  # -1 for no mode
+        self._address = array('q', bytes(8 * capacity))  # -1 for no address
+        self._length = array('L', bytes(array('L').itemsize * capacity))
+        self._captured = array('H', bytes(2 * capacity))  # Payload bytes kept for the slot
+        self._payload = bytearray(capacity * payload_bytes)
+        self._names = []  # Operation names, appended the first time each one is recorded
+        self._name_index = {}
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def clear(self):
+        """Forget every recorded transaction."""
+        self.count = 0
+        self._next = 0
+
+    def record(self, start, end, operation, command, address, mode, length, data=None):
+        """
+        Record a transaction in the next slot, overwriting the oldest one when full.
+
+        Parameters:
+        start -- Start time in ns
+        end -- End time in ns
+        operation -- Operation name
+        command -- Command opcode, or None
+        address -- Start address (int or list/tuple of bytes), or None
+        mode -- Mode the transaction ran in, or None
+        length -- Number of data bytes transferred
+        data -- Transferred data, or None
+        """
+        slot = self._next
+        index = self._name_index.get(operation)
+        if index is None:
+            index = self._name_index[operation] = len(self._names)
+            self._names.append(operation)
+        if isinstance(address, (list, tuple)):
+            address = int.from_bytes(bytes(address), 'big')
+        self._start[slot] = start
+        self._end[slot] = end
+        self._operation[slot] = index
+        self._command[slot] = -1 if command is None else command
+        self._mode[slot] = -1 if mode is None else mode
+        self._address[slot] = -1 if address is None else address
+        self._length[slot] = length
+        captured = 0 if data is None else min(len(data), self.payload_bytes)
+        if captured:
+            offset = slot * self.payload_bytes
+            self._payload[offset:offset + captured] = data[:captured]
+        self._captured[slot] = captured
+        self._next = (slot + 1) % self.capacity
+        self.count += 1
+
+    def records(self):
+        """
+        Iterate over the recorded transactions, oldest first.
+
+        Returns:
+        Iterator of OspiTraceRecord objects; data holds at most payload_bytes leading bytes
+        """
+        first = self._next - len(self) if self.count >= self.capacity else 0
+        for position in range(len(self)):
+            slot = (first + position) % self.capacity
+            operation = self._names[self._operation[slot]]
+            offset = slot * self.payload_bytes
+            yield OspiTraceRecord(
+                self._start[slot], self._end[slot], operation,
+                None if self._mode[slot] < 0 else self._mode[slot], operation.endswith('_dtr'),
+                None if self._command[slot] < 0 else self._command[slot],
+                None if self._address[slot] < 0 else self._address[slot],
+                bytes(self._payload[offset:offset + self._captured[slot]]),
+            )
+
+    def dump(self, path=None, reason=None):
+        """
+        Write out the recorded transactions.
+
+        Parameters:
+        path -- Trace file to write, defaults to self.path; without either the records are only logged
+        reason -- Message logged with the dump, e.g. the failed check
+
+        Returns:
+        List of the dumped OspiTraceRecord objects
+        """
+        records = list(self.records())
+        path = self.path if path is None else path
+        if path is not None:
+            with open(path, 'wb') as trace_file:
+                trace_file.write(TRACE_MAGIC)
+                for record in records:
+                    trace_file.write(record.pack())
+        if self.log is not None:
+            self.log.error("OSPI flight recorder: %s; last %d of %d transactions%s",
+                           reason or "dump requested", len(records), self.count,
+                           f" written to {path}" if path is not None else "")
+            for record in records:
+                self.log.error("  %r", record)
+        return records
+
+    @contextmanager
+    def capture_failures(self, path=None):
+        """
+        Context manager that dumps the recorder when an assertion fails inside it.
+
+        Parameters:
+        path -- Trace file to write, defaults to self.path
+        """
+        try:
+            yield self
+        except AssertionError as exc:
+            self.dump(path, f"assertion failed: {exc}")
+            raise
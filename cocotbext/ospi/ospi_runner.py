@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from cocotbext.ospi.ospi_config import OspiConfig
+
+BUILD_MARKER = 'ospi_build.ok'  # Written into a cached build directory once the build succeeded
+
+
+def _get_runner(simulator):
+    # The runner API moved from cocotb.runner (1.8, 1.9) to cocotb_tools.runner (2.x)
+    try:
+        from cocotb_tools.runner import get_runner
+    except ImportError:
+        from cocotb.runner import get_runner
+    return get_runner(simulator)
+
+
+class OspiJob:
+    __slots__ = ('name', 'parameters', 'env', 'seed', 'testcase')
+
+    def __init__(self, name, parameters=None, env=None, seed=None, testcase=None):
+        """
+        Initialize the OspiJob object.
+
+        Parameters:
+        name -- Unique job name, also the name of its test directory
+        parameters -- HDL parameters; jobs with equal parameters share a simulator build
+        env -- Extra environment variables for the test process
+        seed -- Random seed passed to cocotb
+        testcase -- Test name or list of names to run, None for the whole module
+        """
+        self.name = name
+        self.parameters = dict(parameters or {})
+        self.env = dict(env or {})
+        self.seed = seed
+        self.testcase = testcase
+
+    def __repr__(self):
+        return f"OspiJob({self.name}, parameters={self.parameters}, env={self.env}, seed={self.seed})"
+
+
+def expand_matrix(modes=(0, 1, 2, 3), configs=({},), seeds=(0,), parameters=None, testcase=None):
+    """
+    Expand a mode x configuration x seed matrix into jobs.
+
+    The mode, the OspiConfig keyword arguments and the seed reach the test
+    process as OSPI_MODE, OSPI_CONFIG (JSON) and OSPI_SEED; tests read them
+    back with job_mode(), job_config() and job_seed().
+
+    Parameters:
+    modes -- Modes to run
+    configs -- Sequence of OspiConfig keyword argument dicts
+    seeds -- Random seeds
+    parameters -- HDL parameters shared by every job
+    testcase -- Test name or list of names to run, None for the whole module
+
+    Returns:
+    List of OspiJob objects
+    """
+    jobs = []
+    for index, config in enumerate(configs):
+        OspiConfig(**config)  # Reject bad variants before anything is built
+        for mode in modes:
+            for seed in seeds:
+                env = {'OSPI_MODE': str(mode), 'OSPI_CONFIG': json.dumps(config), 'OSPI_SEED': str(seed)}
+                jobs.append(OspiJob(f"mode{mode}-config{index}-seed{seed}", parameters, env, seed, testcase))
+    return jobs
+
+
+def job_mode(default=0):
+    """Return the mode of the running matrix job."""
+    return int(os.environ.get('OSPI_MODE', default))
+
+
+def job_config():
+    """Return the OspiConfig of the running matrix job (OspiConfig() outside a matrix)."""
+    return OspiConfig(**json.loads(os.environ.get('OSPI_CONFIG', '{}')))
+
+
+def job_seed(default=0):
+    """Return the seed of the running matrix job."""
+    return int(os.environ.get('OSPI_SEED', default))
+
+
+def _run_job(simulator, test_module, hdl_toplevel, hdl_toplevel_lang, build_dir, test_dir, job, python_paths,
+             timescale):
+    # Process pool worker: run one job in its own test directory.
+    # A simulator that dies is reported as an error of this job; anything else is a setup problem and
+    # propagates out of the run.
+    # The runner hands the worker's sys.path to the simulator as PYTHONPATH, so extra paths go there.
+    sys.path[:0] = [path for path in python_paths if path not in sys.path]
+    job_dir = os.path.join(test_dir, job.name)
+    os.makedirs(job_dir, exist_ok=True)
+    results_xml = os.path.join(job_dir, 'results.xml')
+    start = perf_counter()
+    error = None
+    try:
+        _get_runner(simulator).test(
+            test_module=test_module, hdl_toplevel=hdl_toplevel, hdl_toplevel_lang=hdl_toplevel_lang,
+            build_dir=build_dir, test_dir=job_dir, testcase=job.testcase, seed=job.seed, extra_env=job.env,
+            results_xml=results_xml, timescale=timescale,
+        )
+    except SystemExit as exc:  # The runner exits when the simulator process fails
+        error = str(exc)
+    return job.name, results_xml, perf_counter() - start, error
+
+
+def _build(simulator, sources, hdl_toplevel, build_dir, parameters, defines, build_args, timescale, key):
+    # Process pool worker: build one simulator configuration and mark it reusable
+    _get_runner(simulator).build(
+        verilog_sources=sources, hdl_toplevel=hdl_toplevel, build_dir=build_dir, parameters=parameters,
+        defines=defines, build_args=build_args, timescale=timescale, always=True,
+    )
+    with open(os.path.join(build_dir, BUILD_MARKER), 'w') as marker:
+        marker.write(key)
+    return build_dir
+
+
+class OspiMatrixRunner:
+    def __init__(self, sources, hdl_toplevel, test_module, simulator='icarus', test_dir='ospi_matrix', cache_dir=None,
+                 python_paths=(), defines=None, build_args=(), timescale=('1ns', '1ps'), workers=None,
+                 hdl_toplevel_lang='verilog'):
+        """
+        Initialize the OspiMatrixRunner object.
+
+        Jobs run in a process pool on top of the cocotb runner API. Simulator
+        builds are cached in cache_dir under a hash of the HDL source contents,
+        the toplevel, the simulator and the build parameters, so repeated runs
+        and jobs with equal parameters reuse one build.
+
+        Parameters:
+        sources -- Verilog source files
+        hdl_toplevel -- HDL toplevel module
+        test_module -- cocotb test module name or list of names
+        simulator -- Simulator name understood by the cocotb runner
+        test_dir -- Directory for per-job test directories and the aggregated reports
+        cache_dir -- Build cache directory (default: OSPI_BUILD_CACHE or test_dir/build_cache)
+        python_paths -- Directories added to PYTHONPATH so the test module can be imported
+        defines -- Verilog defines shared by every build
+        build_args -- Extra simulator build arguments
+        timescale -- (unit, precision) passed to build and test
+        workers -- Process pool size (default: all local cores)
+        hdl_toplevel_lang -- Language of the HDL toplevel, passed to the test runs
+        """
+        self.sources = [os.path.abspath(source) for source in sources]
+        self.hdl_toplevel = hdl_toplevel
+        self.test_module = test_module
+        self.simulator = simulator
+        self.test_dir = os.path.abspath(test_dir)
+        self.cache_dir = os.path.abspath(cache_dir or os.environ.get('OSPI_BUILD_CACHE')
+                                         or os.path.join(self.test_dir, 'build_cache'))
+        self.python_paths = [os.path.abspath(path) for path in python_paths]
+        self.defines = dict(defines or {})
+        self.build_args = list(build_args)
+        self.timescale = tuple(timescale) if timescale is not None else None
+        self.workers = workers or os.cpu_count()
+        self.hdl_toplevel_lang = hdl_toplevel_lang
+
+    def build_key(self, parameters):
+        """
+        Return the content hash identifying the build for a set of HDL parameters.
+
+        Parameters:
+        parameters -- HDL parameters
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([self.simulator, self.hdl_toplevel, sorted(parameters.items()),
+                                  sorted(self.defines.items()), self.build_args, self.timescale],
+                                 default=str).encode())
+        for source in self.sources:
+            digest.update(source.encode())
+            with open(source, 'rb') as source_file:
+                digest.update(source_file.read())
+        return digest.hexdigest()[:16]
+
+    def build_dir(self, parameters):
+        """Return the cache directory of the build for a set of HDL parameters."""
+        return os.path.join(self.cache_dir, self.build_key(parameters))
+
+    def run(self, jobs):
+        """
+        Build what is missing from the cache, run every job and aggregate the results.
+
+        The per-job JUnit results are merged into test_dir/results.xml, with
+        one testsuite per job, and summarised in test_dir/results.json.
+
+        Parameters:
+        jobs -- Sequence of OspiJob objects with unique names
+
+        Returns:
+        Summary dict, as written to results.json
+        """
+        os.makedirs(self.test_dir, exist_ok=True)
+        builds = {}  # Build directory -> parameters, for the builds missing from the cache
+        job_builds = {}
+        for job in jobs:
+            build_dir = job_builds[job.name] = self.build_dir(job.parameters)
+            if not os.path.exists(os.path.join(build_dir, BUILD_MARKER)):
+                builds[build_dir] = job.parameters
+
+        with ProcessPoolExecutor(self.workers) as pool:
+            for future in [pool.submit(_build, self.simulator, self.sources, self.hdl_toplevel, build_dir, parameters,
+                                       self.defines, self.build_args, self.timescale, os.path.basename(build_dir))
+                           for build_dir, parameters in builds.items()]:
+                future.result()  # A failed build fails the whole run
+            outcomes = list(pool.map(_run_job, *zip(*[
+                (self.simulator, self.test_module, self.hdl_toplevel, self.hdl_toplevel_lang, job_builds[job.name],
+                 self.test_dir, job, self.python_paths, self.timescale) for job in jobs]))) if jobs else []
+
+        summary = self._aggregate(jobs, job_builds, outcomes, len(builds))
+        with open(os.path.join(self.test_dir, 'results.json'), 'w') as summary_file:
+            json.dump(summary, summary_file, indent=2)
+        return summary
+
+    def _aggregate(self, jobs, job_builds, outcomes, built):
+        # Merge the per-job JUnit files into one report and summarise every job
+        suites = ET.Element('testsuites', name='ospi_matrix')
+        summary = {'builds': len(set(job_builds.values())), 'built': built, 'tests': 0, 'failures': 0, 'jobs': []}
+        for job, (name, results_xml, duration, error) in zip(jobs, outcomes):
+            suite = ET.SubElement(suites, 'testsuite', name=name)
+            tests = failures = 0
+            if error is None and os.path.isfile(results_xml):
+                for testcase in ET.parse(results_xml).iter('testcase'):
+                    testcase.set('classname', f"{name}.{testcase.get('classname', '')}")
+                    suite.append(testcase)
+                    tests += 1
+                    failures += any(True for _ in testcase.iter('failure'))
+            else:
+                testcase = ET.SubElement(suite, 'testcase', name='simulation', classname=name)
+                ET.SubElement(testcase, 'error', message=error or f"{results_xml} not written")
+                tests = failures = 1
+            suite.set('tests', str(tests))
+            suite.set('failures', str(failures))
+            summary['tests'] += tests
+            summary['failures'] += failures
+            summary['jobs'].append({
+                'name': name,
+                'parameters': job.parameters,
+                'env': job.env,
+                'seed': job.seed,
+                'build': os.path.basename(job_builds[name]),
+                'tests': tests,
+                'failures': failures,
+                'wall_s': duration,
+                'error': error,
+            })
+        ET.ElementTree(suites).write(os.path.join(self.test_dir, 'results.xml'), encoding='unicode')
+        return summary
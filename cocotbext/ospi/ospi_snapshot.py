@@ -0,0 +1,19 @@
+DEFAULT_STATE_PATHS = ('HOLD_N', 'dut.hold_active', 'dut.mode')  # Hold state and mode of the bundled device
+
+
+class OspiFlashSnapshot:
+    __slots__ = ('pages', 'signals')
+
+    def __init__(self, pages, signals):
+        """
+        Initialize the OspiFlashSnapshot object.
+
+        Parameters:
+        pages -- Page index -> read-only page, shared copy-on-write with the backing store
+        signals -- Device state signal path -> integer value, or None if it was not driven
+        """
+        self.pages = pages
+        self.signals = signals
+
+    def __repr__(self):
+        return f"OspiFlashSnapshot(pages={len(self.pages)}, signals={self.signals})"
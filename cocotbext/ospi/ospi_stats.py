@@ -0,0 +1,115 @@
+import json
+from cocotb.utils import get_sim_time
+
+PHASES = ('command', 'address', 'dummy', 'data', 'busy')  # Phases simulated time is split into
+
+
+class OspiStats:
+    def __init__(self, callback=None, enabled=True):
+        """
+        Initialize the OspiStats object.
+
+        Transactions are counted once per outermost transaction, from the same
+        begin()/end() points as the transaction log. Phases are accounted once
+        per phase, never per byte, so the counters can stay on permanently.
+
+        Parameters:
+        callback -- Optional function called with a dict describing every transaction
+        enabled -- Collect counters; when False mark() returns None and nothing is counted
+        """
+        self.callback = callback
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        """Clear every counter."""
+        self.transactions = {}  # (operation, command) -> [count, bytes, simulated ns, wall-clock s]
+        self.bytes_by_mode = {}  # Mode -> data bytes transferred
+        self.phase_ns = dict.fromkeys(PHASES, 0)  # Phase -> simulated ns
+        self.phase_edges = dict.fromkeys(PHASES, 0)  # Phase -> clock edges awaited
+
+    @property
+    def edges(self):
+        """Clock edges awaited over all phases."""
+        return sum(self.phase_edges.values())
+
+    def mark(self):
+        """
+        Return the simulated time a phase starts at.
+
+        Returns:
+        Time in ns, or None when the counters are disabled
+        """
+        return get_sim_time(units='ns') if self.enabled else None
+
+    def phase(self, phase, mark, edges=0):
+        """
+        Account a finished phase.
+
+        Parameters:
+        phase -- Phase name, one of PHASES
+        mark -- Value returned by mark() when the phase started
+        edges -- Clock edges awaited by the phase
+        """
+        if mark is None:
+            return
+        self.phase_ns[phase] += get_sim_time(units='ns') - mark
+        self.phase_edges[phase] += edges
+
+    def transaction(self, operation, command, mode, length, duration_ns, wall_s):
+        """
+        Account a finished outermost transaction and pass it to the callback.
+
+        Parameters:
+        operation -- Operation name
+        command -- Command opcode, or None
+        mode -- Mode the transaction ran in
+        length -- Number of data bytes transferred
+        duration_ns -- Simulated duration in ns
+        wall_s -- Host wall-clock seconds from begin to end, including the simulator's share
+        """
+        counters = self.transactions.get((operation, command))
+        if counters is None:
+            counters = self.transactions[(operation, command)] = [0, 0, 0, 0.0]
+        counters[0] += 1
+        counters[1] += length
+        counters[2] += duration_ns
+        counters[3] += wall_s
+        self.bytes_by_mode[mode] = self.bytes_by_mode.get(mode, 0) + length
+        if self.callback is not None:
+            self.callback({
+                'operation': operation,
+                'command': command,
+                'mode': mode,
+                'length': length,
+                'duration_ns': duration_ns,
+                'wall_s': wall_s,
+            })
+
+    def as_dict(self):
+        """
+        Return the counters as a JSON-serialisable dict.
+
+        Transactions are keyed by operation and opcode, e.g. 'write 0x02'.
+        """
+        transactions = {}
+        for (operation, command), (count, length, duration_ns, wall_s) in self.transactions.items():
+            key = operation if command is None else f"{operation} {command:#04x}"
+            transactions[key] = {'count': count, 'bytes': length, 'sim_ns': duration_ns, 'wall_s': wall_s}
+        return {
+            'transactions': transactions,
+            'bytes_by_mode': {str(mode): length for mode, length in self.bytes_by_mode.items()},
+            'edges': self.edges,
+            'phases': {phase: {'sim_ns': self.phase_ns[phase], 'edges': self.phase_edges[phase]} for phase in PHASES},
+            'wall_s': sum(counters[3] for counters in self.transactions.values()),
+        }
+
+    def dump_json(self, path):
+        """
+        Write the counters to a JSON file, typically at the end of a test.
+
+        Parameters:
+        path -- File to write
+        """
+        with open(path, 'w') as stats_file:
+            json.dump(self.as_dict(), stats_file, indent=2)
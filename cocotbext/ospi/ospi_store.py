@@ -0,0 +1,223 @@
+import io
+import mmap
+import os
+
+ERASED = 0xFF  # Value of erased flash bytes
+
+# Erase region sizes used by the sector (0x20) and block (0xD8) erase commands
+SECTOR_SIZE = 4096
+BLOCK_SIZE = 65536
+
+
+class OspiPageStore:
+    def __init__(self, size=None, page_size=4096):
+        """
+        Initialize the OspiPageStore object.
+
+        Contents are kept in fixed-size pages that are only allocated when
+        first written; pages that were never written read back as erased (0xFF).
+        Pages loaded from an image stay read-only views of the image until they
+        are written, so an mmap-backed image is never copied as a whole.
+
+        Parameters:
+        size -- Device size in bytes, or None for an unbounded store
+        page_size -- Page size in bytes
+        """
+        self.size = size  # Device size, used for bounds checks and full dumps
+        self.page_size = page_size
+        self.pages = {}  # Page index -> bytearray (owned) or read-only buffer (image / erased)
+        self._erased_page = bytes([ERASED]) * page_size  # Shared read-only erased page
+        self._images = []  # Keeps mmap/file objects alive while pages reference them
+
+    @property
+    def allocated_pages(self):
+        """Number of pages holding their own writable copy."""
+        return sum(1 for page in self.pages.values() if isinstance(page, bytearray))
+
+    def _check(self, address, length):
+        if address < 0 or length < 0 or (self.size is not None and address + length > self.size):
+            raise ValueError(f"Access of {length} bytes at {address:#x} is outside the store")
+
+    def _writable_page(self, index):
+        # Return the page as an owned bytearray, copying it on first write
+        page = self.pages.get(index)
+        if not isinstance(page, bytearray):
+            page = bytearray(self._erased_page if page is None else page)
+            self.pages[index] = page
+        return page
+
+    def _chunks(self, address, length):
+        # Split [address, address + length) into (page index, page offset, buffer offset, count)
+        page_size = self.page_size
+        position = 0
+        while position < length:
+            index, offset = divmod(address + position, page_size)
+            count = min(page_size - offset, length - position)
+            yield index, offset, position, count
+            position += count
+
+    def read(self, address, length):
+        """
+        Read bytes from the store.
+
+        Parameters:
+        address -- Start address
+        length -- Number of bytes to read
+        """
+        self._check(address, length)
+        result = bytearray(length)
+        for index, offset, position, count in self._chunks(address, length):
+            page = self.pages.get(index)
+            if page is None:
+                result[position:position + count] = self._erased_page[:count]
+            else:
+                result[position:position + count] = page[offset:offset + count]
+        return bytes(result)
+
+    def write(self, address, data):
+        """
+        Overwrite bytes in the store.
+
+        Parameters:
+        address -- Start address
+        data -- Data to store (bytes-like or iterable of ints)
+        """
+        view = memoryview(data if isinstance(data, (bytes, bytearray, memoryview)) else bytes(data)).cast('B')
+        self._check(address, len(view))
+        for index, offset, position, count in self._chunks(address, len(view)):
+            self._writable_page(index)[offset:offset + count] = view[position:position + count]
+
+    def program(self, address, data):
+        """
+        Program bytes with NOR flash semantics: bits can only go from 1 to 0.
+
+        Parameters:
+        address -- Start address
+        data -- Data to program (bytes-like or iterable of ints)
+        """
+        view = memoryview(data if isinstance(data, (bytes, bytearray, memoryview)) else bytes(data)).cast('B')
+        self._check(address, len(view))
+        for index, offset, position, count in self._chunks(address, len(view)):
+            page = self._writable_page(index)
+            old = int.from_bytes(page[offset:offset + count], 'little')
+            new = int.from_bytes(view[position:position + count], 'little')
+            page[offset:offset + count] = (old & new).to_bytes(count, 'little')  # AND the whole chunk at once
+
+    def erase(self, address=0, length=None):
+        """
+        Erase a region back to 0xFF; fully covered pages are released.
+
+        Parameters:
+        address -- Start address
+        length -- Number of bytes to erase, or None to erase the whole store
+        """
+        if length is None:
+            self.pages.clear()  # Chip erase
+            return
+        if self.size is not None:
+            length = min(length, self.size - address)  # Erase regions may extend past a small device
+        self._check(address, length)
+        for index, offset, position, count in self._chunks(address, length):
+            if count == self.page_size:
+                self.pages.pop(index, None)
+            elif index in self.pages:
+                self._writable_page(index)[offset:offset + count] = self._erased_page[:count]
+
+    def load_image(self, path_or_buffer, offset=0):
+        """
+        Load an image into the store.
+
+        Files are memory-mapped read-only and bytes-like objects are referenced
+        without copying; whole pages become views of the image and are only
+        copied when written.
+
+        Parameters:
+        path_or_buffer -- File path, open binary file, or bytes-like object
+        offset -- Store address of the first image byte
+
+        Returns:
+        Number of bytes loaded
+        """
+        if isinstance(path_or_buffer, (str, os.PathLike)):
+            with open(path_or_buffer, 'rb') as image_file:
+                image = self._map(image_file)
+        elif hasattr(path_or_buffer, 'read'):
+            try:
+                image = self._map(path_or_buffer)
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                image = path_or_buffer.read()  # File-like object without a file descriptor
+        else:
+            image = path_or_buffer
+
+        view = memoryview(image).cast('B') if len(image) else memoryview(b'')
+        self._check(offset, len(view))
+        self._images.append(image)
+        for index, page_offset, position, count in self._chunks(offset, len(view)):
+            if count == self.page_size:
+                self.pages[index] = view[position:position + count]  # Read-only view, no copy
+            else:
+                self._writable_page(index)[page_offset:page_offset + count] = view[position:position + count]
+        return len(view)
+
+    def snapshot(self):
+        """
+        Capture the contents without copying them as a whole.
+
+        Owned pages are frozen into read-only copies shared by the store and
+        the snapshot, and the next write to a frozen page copies it again. A
+        snapshot therefore costs one copy of each page written since the last
+        snapshot.
+
+        Returns:
+        Dict of page index -> read-only page, to pass to restore()
+        """
+        pages = self.pages
+        for index, page in pages.items():
+            if isinstance(page, bytearray):
+                pages[index] = bytes(page)  # Freeze; _writable_page() copies it on the next write
+        return dict(pages)
+
+    def restore(self, pages):
+        """
+        Return the contents to a snapshot(); its pages stay shared until written.
+
+        Parameters:
+        pages -- Dict returned by snapshot()
+        """
+        self.pages = dict(pages)
+
+    @staticmethod
+    def _map(image_file):
+        if os.fstat(image_file.fileno()).st_size == 0:
+            return b''  # mmap cannot map empty files
+        return mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def dump(self, address_range=None):
+        """
+        Return the contents of a range of the store as bytes.
+
+        Parameters:
+        address_range -- range object or (start, stop) tuple; None dumps the whole device
+        """
+        if address_range is None:
+            if self.size is None:
+                raise ValueError("Dumping an unbounded store needs an address range")
+            start, stop = 0, self.size
+        elif isinstance(address_range, range):
+            if address_range.step != 1:
+                raise ValueError("Dump ranges must be contiguous")
+            start, stop = address_range.start, address_range.stop
+        else:
+            start, stop = address_range
+        return self.read(start, stop - start)
+
+    def dump_to_file(self, path, address_range=None):
+        """
+        Write the contents of a range of the store to a binary file.
+
+        Parameters:
+        path -- Output file path
+        address_range -- range object or (start, stop) tuple; None dumps the whole device
+        """
+        with open(path, 'wb') as dump_file:
+            dump_file.write(self.dump(address_range))
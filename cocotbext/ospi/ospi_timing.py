@@ -0,0 +1,52 @@
+import os
+
+# Busy times of a typical octal NOR device in ns, keyed by the operation that starts them
+DEFAULT_BUSY_TIMES = {
+    'program': 120_000,                # Page program
+    'erase_sector': 30_000_000,        # 4 KB sector erase
+    'erase_block': 150_000_000,        # 64 KB block erase
+    'erase_chip': 20_000_000_000,      # Chip erase
+}
+
+# Multiple of the (scaled) busy time after which a device still reporting busy is given up on
+BUSY_TIMEOUT_FACTOR = 4
+
+# Global factor applied to every modelled latency and poll interval. Regressions can
+# compress erase/program times (e.g. OSPI_TIME_SCALE=0.001) while sign-off runs keep 1.0.
+_time_scale = float(os.environ.get('OSPI_TIME_SCALE', '1'))
+
+
+def get_time_scale():
+    """Return the global time-scale factor."""
+    return _time_scale
+
+
+def set_time_scale(scale):
+    """
+    Set the global time-scale factor.
+
+    Parameters:
+    scale -- Factor applied to modelled latencies; 0 makes every operation complete immediately
+    """
+    global _time_scale
+    if scale < 0:
+        raise ValueError(f"Time scale must not be negative: {scale}")  # Raise error for negative scales
+    _time_scale = float(scale)
+
+
+def scale_ns(ns, scale=None):
+    """
+    Scale a latency and round it to whole ns.
+
+    Parameters:
+    ns -- Unscaled latency in ns
+    scale -- Factor to apply, or None for the global time-scale factor
+
+    Returns:
+    Scaled latency in ns; a nonzero latency never rounds down to 0
+    """
+    factor = _time_scale if scale is None else scale
+    scaled = int(round(ns * factor))
+    if scaled == 0 and ns > 0 and factor > 0:
+        return 1
+    return scaled
@@ -0,0 +1,142 @@
+from bisect import bisect_right
+
+# Write verification policies
+VERIFY_NONE = 'none'          # Never read back programmed data
+VERIFY_ALWAYS = 'always'      # Read back after every write (default)
+VERIFY_SAMPLED = 'sampled'    # Read back every Nth write
+VERIFY_DEFERRED = 'deferred'  # Record writes in a shadow model, check them at a checkpoint
+
+VERIFY_POLICIES = (VERIFY_NONE, VERIFY_ALWAYS, VERIFY_SAMPLED, VERIFY_DEFERRED)
+
+_BLOCK = 64  # Block size used to skip matching data before scanning byte by byte
+
+
+class OspiShadowModel:
+    def __init__(self):
+        """
+        Initialize the OspiShadowModel object.
+
+        The model keeps the expected contents of every address written since
+        the last checkpoint as disjoint, coalesced ranges, so a checkpoint
+        needs one read per contiguous dirty region.
+        """
+        self._starts = []  # Sorted start addresses of the dirty ranges
+        self._ranges = {}  # Start address -> bytearray of expected contents
+
+    def __len__(self):
+        return len(self._starts)
+
+    def clear(self):
+        """Forget every recorded range."""
+        self._starts.clear()
+        self._ranges.clear()
+
+    def ranges(self):
+        """
+        Iterate over the dirty ranges in address order.
+
+        Returns:
+        Iterator of (start address, expected bytes) tuples
+        """
+        for start in self._starts:
+            yield start, self._ranges[start]
+
+    def record(self, address, data):
+        """
+        Record data written at address, merging it with overlapping or adjacent ranges.
+
+        Parameters:
+        address -- Start address of the write
+        data -- Written data (bytes-like or iterable of ints)
+        """
+        data = bytes(data)
+        end = address + len(data)
+        if not data:
+            return
+        starts = self._starts
+        first = bisect_right(starts, address) - 1
+        if first < 0 or starts[first] + len(self._ranges[starts[first]]) < address:
+            first += 1  # Previous range neither overlaps nor touches the new one
+        last = first
+        while last < len(starts) and starts[last] <= end:
+            last += 1
+
+        merged_start = min(address, starts[first]) if first < last else address
+        merged_end = end
+        for start in starts[first:last]:
+            merged_end = max(merged_end, start + len(self._ranges[start]))
+        merged = bytearray(merged_end - merged_start)
+        for start in starts[first:last]:
+            old = self._ranges.pop(start)
+            merged[start - merged_start:start - merged_start + len(old)] = old
+        merged[address - merged_start:end - merged_start] = data  # Newest data wins
+
+        starts[first:last] = [merged_start]
+        self._ranges[merged_start] = merged
+
+    def discard(self, address, length):
+        """
+        Stop tracking [address, address + length), e.g. after an erase.
+
+        Parameters:
+        address -- Start address of the region
+        length -- Number of bytes in the region
+        """
+        end = address + length
+        starts = self._starts
+        index = max(bisect_right(starts, address) - 1, 0)
+        kept = []
+        while index < len(starts) and starts[index] < end:
+            start = starts[index]
+            data = self._ranges[start]
+            if start + len(data) <= address:
+                index += 1
+                continue  # Entirely before the region
+            del starts[index]
+            del self._ranges[start]
+            if start < address:
+                kept.append((start, data[:address - start]))
+            if start + len(data) > end:
+                kept.append((end, data[end - start:]))
+        for start, data in kept:
+            self.record(start, data)
+
+
+def mismatch_ranges(address, expected, actual, invalid=()):
+    """
+    Compare expected and actual data and coalesce the differences into address ranges.
+
+    Parameters:
+    address -- Address of the first byte
+    expected -- Expected bytes
+    actual -- Bytes read back
+    invalid -- Indices of bytes read back as Z/X
+
+    Returns:
+    List of (first address, last address) tuples, inclusive
+    """
+    bad = set(invalid)
+    if expected != actual:
+        for offset in range(0, len(expected), _BLOCK):
+            if expected[offset:offset + _BLOCK] != actual[offset:offset + _BLOCK]:
+                for index in range(offset, min(offset + _BLOCK, len(expected))):
+                    if expected[index] != actual[index]:
+                        bad.add(index)
+
+    result = []
+    for index in sorted(bad):
+        if result and result[-1][1] == address + index - 1:
+            result[-1] = (result[-1][0], address + index)  # Extend the current range
+        else:
+            result.append((address + index, address + index))
+    return result
+
+
+def format_ranges(ranges):
+    """
+    Format address ranges for a mismatch report.
+
+    Parameters:
+    ranges -- List of (first address, last address) tuples
+    """
+    return ', '.join(f"{first:#x}" if first == last else f"{first:#x}-{last:#x}" for first, last in ranges)
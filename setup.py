@@ -11,6 +11,9 @@ setup(
     install_requires=[
         'cocotb>=1.5.0',
     ],
+    extras_require={
+        'numpy': ['numpy'],  # Optional vectorised batch codec
+    },
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
@@ -0,0 +1,44 @@
+"""
+Bench setup shared by the cocotb test modules.
+
+The bench top (verilog/ospi_flash_test.v) has a 10 ns internal clock, a 20 ns
+OSPI_CLK and two dies on one OSPI_IO bus, selected by OSPI_CS and OSPI_CS1.
+"""
+import cocotb
+from cocotb.clock import Clock
+from cocotbext.ospi.ospi_flash import OspiFlash
+
+# Completion waits of the bundled Verilog flash, which finishes every program and erase at once
+BENCH_BUSY_TIMES = {'program': 100, 'erase_sector': 1000, 'erase_block': 1000, 'erase_chip': 1000}
+
+
+def start_clocks(dut, ospi_clk=True):
+    """
+    Start the bench clocks.
+
+    Parameters:
+    dut -- Bench toplevel
+    ospi_clk -- Start OSPI_CLK as well; pass False when the bus drives it (start_clock=True)
+    """
+    cocotb.start_soon(Clock(dut.clk, 10, 'ns').start())
+    if ospi_clk:
+        cocotb.start_soon(Clock(dut.OSPI_CLK, 20, 'ns').start())
+
+
+async def setup_flash(dut, clocks=True, cs_name=None, **kwargs):
+    """
+    Return an initialized OspiFlash on the OSPI_* signals of the bench.
+
+    Parameters:
+    dut -- Bench toplevel
+    clocks -- Start the bench clocks first; pass False for further drivers on a running bench.
+              OSPI_CLK is left to the bus when start_clock=True is given.
+    cs_name -- Chip select of the die to drive, e.g. 'OSPI_CS1' (defaults to OSPI_CS)
+    kwargs -- Passed to OspiFlash; busy_times defaults to BENCH_BUSY_TIMES
+    """
+    if clocks:
+        start_clocks(dut, ospi_clk=not kwargs.get('start_clock'))
+    kwargs.setdefault('busy_times', BENCH_BUSY_TIMES)
+    flash = OspiFlash.from_prefix(dut, 'OSPI', cs_name=cs_name, **kwargs)
+    await flash.initialize()
+    return flash
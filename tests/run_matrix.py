@@ -0,0 +1,27 @@
+"""
+Run test_ospi_matrix_job over every mode, two clock frequencies and two seeds
+on all local cores. Simulator builds are cached by content hash, so a second
+run with unchanged HDL sources does not rebuild. Results are aggregated into
+ospi_matrix/results.xml (JUnit) and ospi_matrix/results.json.
+"""
+import os
+from cocotbext.ospi.ospi_runner import OspiMatrixRunner, expand_matrix
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS)
+
+
+def main():
+    runner = OspiMatrixRunner(
+        [os.path.join(ROOT, 'verilog', 'ospi_flash.v'), os.path.join(ROOT, 'verilog', 'ospi_flash_test.v')],
+        'ospi_flash_test', 'test_ospi_flash', test_dir=os.path.join(TESTS, 'ospi_matrix'), python_paths=[TESTS, ROOT],
+    )
+    jobs = expand_matrix(configs=({'sclk_freq': 50e6}, {'sclk_freq': 100e6}), seeds=(1, 2), testcase='test_ospi_matrix_job')
+    summary = runner.run(jobs)
+    print(f"{len(jobs)} jobs on {summary['builds']} builds ({summary['built']} built): "
+          f"{summary['tests']} tests, {summary['failures']} failures")
+    return 1 if summary['failures'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,151 @@
+"""
+Simulation throughput benchmarks for the OSPI driver.
+
+Run with `make -C tests benchmark`. Every case moves a transfer of a given size
+through the driver and reports the host wall-clock seconds per simulated MB and
+the simulated bandwidth. Busy waits are zeroed, so the erase cases (named
+erase_overhead/<mode>) time only the clocking of the erase commands, not the
+erase itself. Settings come from the environment:
+
+OSPI_BENCH_SIZES -- Comma-separated transfer sizes in bytes (default 1 B to 1 MB)
+OSPI_BENCH_ERASES -- Erase operations timed per erase mode (default 16)
+OSPI_BENCH_DEVICE_SIZE -- Modelled device size in bytes, the region a chip erase clears (default 64 MB)
+OSPI_BENCH_RESULTS -- JSON file the results are written to (default ospi_bench.json)
+OSPI_BENCH_BASELINE -- Results file of an earlier run to compare against (optional)
+OSPI_BENCH_THRESHOLD -- Allowed slowdown against the baseline as a fraction (default 0.25)
+"""
+import cocotb
+import json
+import os
+from time import perf_counter
+from cocotb.utils import get_sim_time
+from cocotbext.ospi.ospi_log import LOG_OFF
+from cocotbext.ospi.ospi_store import BLOCK_SIZE, SECTOR_SIZE
+from cocotbext.ospi.ospi_timing import DEFAULT_BUSY_TIMES
+from cocotbext.ospi.ospi_verify import VERIFY_NONE
+from ospi_bench import setup_flash
+
+SIZES = [int(size) for size in os.environ.get('OSPI_BENCH_SIZES', '1,256,4096,65536,1048576').split(',')]
+ERASES = int(os.environ.get('OSPI_BENCH_ERASES', '16'))
+DEVICE_SIZE = int(os.environ.get('OSPI_BENCH_DEVICE_SIZE', str(64 << 20)))
+RESULTS_PATH = os.environ.get('OSPI_BENCH_RESULTS', 'ospi_bench.json')
+BASELINE_PATH = os.environ.get('OSPI_BENCH_BASELINE')
+THRESHOLD = float(os.environ.get('OSPI_BENCH_THRESHOLD', '0.25'))
+
+MB = 1 << 20
+PAGE_SIZE = 256
+
+# Driver settings of every case: logging, verification and busy waits off
+DRIVER_SETTINGS = dict(log_policy=LOG_OFF, verify=VERIFY_NONE, size=DEVICE_SIZE, busy_times=dict.fromkeys(DEFAULT_BUSY_TIMES, 0))
+
+results = {}  # Case name -> measurements, filled by the benchmarks and written by bench_report
+
+
+async def measure(dut, name, operation, mode, size, run):
+    # Time one case and store it in results under name
+    sim_start = get_sim_time(units='ns')
+    wall_start = perf_counter()
+    await run()
+    wall_s = perf_counter() - wall_start
+    sim_ns = get_sim_time(units='ns') - sim_start
+    results[name] = {
+        'operation': operation,
+        'mode': mode,
+        'size': size,
+        'wall_s': wall_s,
+        'sim_ns': sim_ns,
+        'wall_s_per_mb': wall_s * MB / size,
+        'sim_mb_per_s': size / MB / (sim_ns * 1e-9) if sim_ns else float('inf'),
+    }
+    dut._log.info("%s: %.3f s wall per simulated MB, %.2f MB/s simulated",
+                  name, results[name]['wall_s_per_mb'], results[name]['sim_mb_per_s'])
+
+
+def read_cases(flash):
+    # (operation, mode, coroutine function taking address and size) for every read flavour
+    return [('read', mode, lambda address, size, mode=mode: flash.read_bytes(address, size, mode)) for mode in range(4)] + [
+        ('read_dtr', 3, lambda address, size: flash.read_bytes_dtr(address, size, 3)),
+    ] + [('xip_read', mode, lambda address, size, mode=mode: flash.xip_read(address, size, mode)) for mode in range(4)]
+
+
+@cocotb.test()
+async def bench_read(dut):
+    """Read throughput per mode and size, including DTR and XIP reads."""
+    flash = await setup_flash(dut, **DRIVER_SETTINGS)
+    for operation, mode, read in read_cases(flash):
+        for size in SIZES:
+            flash.xip_exit()
+            flash.xip_cache.invalidate()  # Every XIP case starts cold
+            await measure(dut, f"{operation}/{mode}/{size}", operation, mode, size, lambda: read(0, size))
+    flash.xip_exit()
+
+
+@cocotb.test()
+async def bench_program(dut):
+    """Program throughput per mode and size, one page program per page."""
+    flash = await setup_flash(dut, **DRIVER_SETTINGS)
+    for operation, modes, write in (('write', range(4), flash.write), ('write_dtr', (3,), flash.write_dtr)):
+        for mode in modes:
+            for size in SIZES:
+                data = bytes(index & 0xFF for index in range(size))
+
+                async def program():
+                    for offset in range(0, size, PAGE_SIZE):
+                        await write(offset, data[offset:offset + PAGE_SIZE], mode)
+
+                await measure(dut, f"{operation}/{mode}/{size}", operation, mode, size, program)
+
+
+@cocotb.test()
+async def bench_erase(dut):
+    """Erase command overhead per erase mode; the size is the region erased by each operation."""
+    flash = await setup_flash(dut, **DRIVER_SETTINGS)
+    # With the busy times zeroed the driver neither waits nor polls status, so these cases measure the
+    # command clocking and backing store update alone, not the device erase time. A chip erase clears
+    # the whole device; case names leave out the region so they stay comparable
+    for mode, region in ((0, SECTOR_SIZE), (1, BLOCK_SIZE), (2, flash.data_store.size)):
+        async def erase():
+            for index in range(ERASES):
+                await flash.erase(index * region if mode != 2 else 0, mode)
+
+        await measure(dut, f"erase_overhead/{mode}", 'erase', mode, region * ERASES, erase)
+
+
+def compare(current, baseline, threshold):
+    """
+    Compare results against a baseline.
+
+    A case regresses when it costs more wall-clock time per simulated MB, or
+    achieves less simulated bandwidth, than the baseline by more than threshold.
+    Cases missing from either side are not compared.
+
+    Returns:
+    List of messages describing the regressions
+    """
+    regressions = []
+    for name, result in current.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result['wall_s_per_mb'] > reference['wall_s_per_mb'] * (1 + threshold):
+            regressions.append(f"{name}: {result['wall_s_per_mb']:.3f} s/MB wall, baseline {reference['wall_s_per_mb']:.3f}")
+        if result['sim_mb_per_s'] < reference['sim_mb_per_s'] * (1 - threshold):
+            regressions.append(f"{name}: {result['sim_mb_per_s']:.2f} MB/s simulated, baseline {reference['sim_mb_per_s']:.2f}")
+    return regressions
+
+
+@cocotb.test()
+async def bench_report(dut):
+    """Write the results and compare them against the baseline."""
+    with open(RESULTS_PATH, 'w') as results_file:
+        json.dump({'threshold': THRESHOLD, 'results': results}, results_file, indent=2)
+    dut._log.info(f"Wrote {len(results)} benchmark results to {RESULTS_PATH}")
+
+    if BASELINE_PATH is None:
+        return
+    with open(BASELINE_PATH) as baseline_file:
+        baseline = json.load(baseline_file)['results']
+    regressions = compare(results, baseline, THRESHOLD)
+    for regression in regressions:
+        dut._log.error(f"Regression {regression}")
+    assert not regressions, f"{len(regressions)} benchmark cases regressed by more than {THRESHOLD:.0%} against {BASELINE_PATH}"
@@ -1,9 +1,28 @@
 import cocotb
-from cocotb.triggers import Timer, RisingEdge
+from cocotb.triggers import Edge, FallingEdge, First, ReadOnly, Timer, RisingEdge, with_timeout
+from cocotb.binary import BinaryValue
 from cocotb.result import TestFailure
 from cocotb.log import SimLog
-from cocotbext.ospi.ospi_flash import OspiFlash
-from cocotb.clock import Clock
+from cocotbext.ospi.ospi_arbiter import OspiArbiter
+from cocotbext.ospi.ospi_config import OspiConfig
+from cocotbext.ospi.ospi_coverage import OspiCoverage, merge_coverage
+from cocotbext.ospi.ospi_flash_model import STATUS_WEL, STATUS_WIP, OspiFlashModel
+from cocotbext.ospi.ospi_log import LOG_BYTE, LOG_OFF
+from cocotbext.ospi.ospi_monitor import OspiMonitor, read_trace
+from cocotbext.ospi.ospi_options import OspiFlashOptions
+from cocotbext.ospi.ospi_queue import OspiQueue
+from cocotbext.ospi.ospi_random import OspiTrafficGenerator
+from cocotbext.ospi.ospi_runner import job_config, job_mode, job_seed
+from cocotbext.ospi.ospi_store import OspiPageStore
+from cocotbext.ospi.ospi_timing import BUSY_TIMEOUT_FACTOR
+from cocotbext.ospi.ospi_verify import VERIFY_DEFERRED, VERIFY_NONE, VERIFY_SAMPLED
+from cocotbext.ospi.ospi_codec import invalid_indices, is_valid
+from cocotb.utils import get_sim_time
+from ospi_bench import BENCH_BUSY_TIMES, setup_flash, start_clocks
+import json
+import os
+import random
+import tempfile
 
 @cocotb.test()
 async def print_dut_signals(dut):
@@ -19,21 +38,8 @@ async def test_ospi_flash_fast_read(dut):
     """Test to validate fast read operations in different modes."""
     dut._log.info("Starting test_ospi_flash_fast_read")
     
-    # Create and start the internal clock
-    clk = Clock(dut.clk, 10, 'ns')
-    cocotb.start_soon(clk.start())
-    
-    # Create and start the OSPI clock
-    ospi_clk = Clock(dut.OSPI_CLK, 20, 'ns')  # Adjust period as needed
-    cocotb.start_soon(ospi_clk.start())
-
-    
-    cs = dut.OSPI_CS
-    io = dut.OSPI_IO
-
-    # Initialize the OspiFlash instance
-    ospi = OspiFlash(dut, dut.OSPI_CLK, cs, io)
-    await ospi.initialize()
+    # Start the bench clocks and initialize the driver
+    ospi = await setup_flash(dut)
 
     
     address = 0x01
@@ -79,21 +85,8 @@ async def test_ospi_flash_fast_read(dut):
 async def test_ospi_flash_io_operations(dut):
     """Test to validate read and write operations in different modes."""
     dut._log.info("Starting test_ospi_flash_io_operations")
-    # Create and start the internal clock
-    clk = Clock(dut.clk, 10, 'ns')
-    cocotb.start_soon(clk.start())
-    
-    # Create and start the OSPI clock
-    ospi_clk = Clock(dut.OSPI_CLK, 20, 'ns')  # Adjust period as needed
-    cocotb.start_soon(ospi_clk.start())
-
-    
-    cs = dut.OSPI_CS
-    io = dut.OSPI_IO
-
-    # Initialize the OspiFlash instance
-    ospi = OspiFlash(dut, dut.OSPI_CLK, cs, io)
-    await ospi.initialize()
+    # Start the bench clocks and initialize the driver
+    ospi = await setup_flash(dut)
 
 
     address = 0x02
@@ -135,21 +128,8 @@ async def test_ospi_flash_io_operations(dut):
 async def test_ospi_flash_hold_operations(dut):
     """Test to validate hold operations."""
     dut._log.info("Starting test_ospi_flash_hold_operations")
-    # Create and start the internal clock
-    clk = Clock(dut.clk, 10, 'ns')
-    cocotb.start_soon(clk.start())
-    
-    # Create and start the OSPI clock
-    ospi_clk = Clock(dut.OSPI_CLK, 20, 'ns')  # Adjust period as needed
-    cocotb.start_soon(ospi_clk.start())
-
-    
-    cs = dut.OSPI_CS
-    io = dut.OSPI_IO
-
-    # Initialize the OspiFlash instance
-    ospi = OspiFlash(dut, dut.OSPI_CLK, cs, io)
-    await ospi.initialize()
+    # Start the bench clocks and initialize the driver
+    ospi = await setup_flash(dut)
 
 
     if not hasattr(dut, 'HOLD_N'):
@@ -177,3 +157,880 @@ async def test_ospi_flash_hold_operations(dut):
     read_data = await ospi.read(address, length, mode=1)
     dut._log.info(f"Read data {read_data} after releasing hold")
     assert read_data == [0xC6], f"Read data {read_data} does not match written data [0xC6] after releasing hold"
+
+@cocotb.test()
+async def test_ospi_flash_read_bytes(dut):
+    """Test to validate the bytes-based read path and its validity bitmap."""
+    dut._log.info("Starting test_ospi_flash_read_bytes")
+    # Start the bench clocks and initialize the driver
+    ospi = await setup_flash(dut)
+
+
+    address = 0x04
+    length = 1
+
+    for mode, value in enumerate([0xD5, 0xD6, 0xD7, 0xD8]):
+        dut._log.info(f"Writing to address {address:#04x} data: [{value:#04x}] in mode {mode}")
+        await ospi.write(address, [value], mode=mode)
+        read_data, valid = await ospi.read_bytes(address, length, mode=mode)
+        dut._log.info(f"Read data {read_data.hex()} in mode {mode}")
+        assert read_data == bytes([value]), f"Read data {read_data.hex()} does not match written data {value:#04x} in mode {mode}"
+        assert is_valid(valid, 0), f"Read data flagged as Z/X in mode {mode}"
+
+    # Reading into a caller-supplied buffer must fill it in place
+    buffer = bytearray(length)
+    valid = await ospi.read_into(address, buffer, mode=3)
+    assert buffer == bytearray([0xD8]), f"Read buffer {buffer.hex()} does not match written data 0xd8"
+    assert not invalid_indices(valid, length), "Read buffer flagged as Z/X"
+
+@cocotb.test()
+async def test_ospi_bus_receive_cycles(dut):
+    """Test that the receive engine takes 8 / lanes clock edges per byte."""
+    dut._log.info("Starting test_ospi_bus_receive_cycles")
+    # Start the bench clocks and initialize the driver
+    ospi = await setup_flash(dut)
+
+
+    length = 4
+
+    for mode, lanes in enumerate([1, 2, 4, 8]):
+        await RisingEdge(dut.OSPI_CLK)
+        start = get_sim_time(units='ns')
+        await ospi.ospi.receive_bytes(mode, length)
+        elapsed = get_sim_time(units='ns') - start
+        expected = length * (8 // lanes) * 20
+        dut._log.info(f"Received {length} bytes in mode {mode} in {elapsed} ns")
+        assert elapsed == expected, f"Receiving {length} bytes in mode {mode} took {elapsed} ns, expected {expected} ns"
+
+@cocotb.test()
+async def test_ospi_flash_dtr_operations(dut):
+    """Test to validate octal DTR write/read and the two-bytes-per-cycle DTR timing."""
+    dut._log.info("Starting test_ospi_flash_dtr_operations")
+    # Start the bench clocks and initialize the driver
+    ospi = await setup_flash(dut)
+
+
+    address = 0x05
+    length = 1
+
+    dut._log.info(f"Writing to address {address:#04x} data: [0xE8] in octal DTR mode")
+    await ospi.write_dtr(address, [0xE8])
+    read_data = await ospi.read_dtr(address, length)
+    dut._log.info(f"Read data {read_data} in octal DTR mode")
+    assert read_data == [0xE8], f"Read data {read_data} does not match written data [0xE8] in octal DTR mode"
+
+    # Octal DTR moves one byte per clock edge, i.e. two bytes per OSPI_CLK period
+    length = 8
+    await RisingEdge(dut.OSPI_CLK)
+    start = get_sim_time(units='ns')
+    await ospi.ospi.receive_bytes_dtr(3, length)
+    elapsed = get_sim_time(units='ns') - start
+    dut._log.info(f"Received {length} bytes in octal DTR mode in {elapsed} ns")
+    assert elapsed == length * 10, f"Receiving {length} bytes in octal DTR mode took {elapsed} ns, expected {length * 10} ns"
+
+@cocotb.test()
+async def test_ospi_flash_transaction_queue(dut):
+    """Test that concurrent coroutines can share one bus through the transaction queue."""
+    dut._log.info("Starting test_ospi_flash_transaction_queue")
+    # Start the bench clocks and initialize the driver
+    ospi = await setup_flash(dut)
+
+    queue = OspiQueue(ospi, coalesce_reads=True)
+    queue.start()
+
+    async def producer(base, value, mode):
+        # Each program runs its own read-back verification inside the serialized transaction
+        for offset in range(3):
+            await queue.program(base + offset, [value + offset], mode=mode)
+
+    first = cocotb.start_soon(producer(0x10, 0x20, 0))
+    second = cocotb.start_soon(producer(0x20, 0x30, 3))
+    await first
+    await second
+
+    # Sequential reads queued back to back are merged and split per request
+    reads = [queue.read(0x40 + offset, 2, mode=0) for offset in range(0, 6, 2)]
+    await queue.drain()
+    for read in reads:
+        data, valid = await read
+        assert len(data) == 2, f"Queued read returned {len(data)} bytes, expected 2"
+        assert len(valid) == 1, f"Queued read returned a {len(valid)}-byte validity bitmap, expected 1"
+
+    # Stopping the queue fails the transaction in flight and those still queued
+    reads = [queue.read(0x40, 2, mode=0), queue.read(0x80, 2, mode=0)]
+    await RisingEdge(dut.OSPI_CLK)
+    queue.stop()
+    for read in reads:
+        try:
+            await read
+        except RuntimeError:
+            pass
+        else:
+            assert False, f"{read} completed after the queue was stopped"
+    await queue.drain()
+
+    # Stopping the queue in the middle of a program cleans up after it: the enables are cleared
+    # and the shared bus is released, so a direct read that follows neither hangs nor nests
+    ospi.arbiter = OspiArbiter()
+    queue = OspiQueue(ospi)
+    queue.start()
+    program = queue.program(0x50, [0x55, 0x56], mode=0)
+    await RisingEdge(dut.OSPI_CLK)
+    await RisingEdge(dut.OSPI_CLK)
+    assert ospi.arbiter.owner is ospi, "The program was not running when the queue was stopped"
+    queue.stop()
+    try:
+        await program
+    except RuntimeError:
+        pass
+    else:
+        assert False, "The program completed after the queue was stopped"
+    await ReadOnly()
+    assert dut.write_enable.value == 0, "Stopping the queue left write_enable set"
+    assert dut.OSPI_CS.value == 1, "Stopping the queue left chip select asserted"
+    assert ospi.arbiter.owner is None, "Stopping the queue left the shared bus claimed"
+    await RisingEdge(dut.OSPI_CLK)
+    await with_timeout(ospi.read(0x50, 1, mode=0), 1, 'us')
+    record = list(ospi.recorder.records())[-1]
+    assert record.operation == 'read', f"The read after the stop was logged as part of {record.operation}"
+
+@cocotb.test()
+async def test_ospi_flash_verify_policies(dut):
+    """Test the none and deferred write verification policies."""
+    dut._log.info("Starting test_ospi_flash_verify_policies")
+    # Start the bench clocks and initialize the driver
+    ospi = await setup_flash(dut)
+
+
+    address = 0x06
+
+    # Skipping the read-back must save bus time compared to always verifying.
+    # Both writes start on the same clock phase, so only the read-back separates them.
+    await FallingEdge(dut.OSPI_CLK)
+    start = get_sim_time(units='ns')
+    await ospi.write(address, [0xF5], mode=0)
+    always_time = get_sim_time(units='ns') - start
+
+    ospi.verify = VERIFY_NONE
+    await FallingEdge(dut.OSPI_CLK)
+    start = get_sim_time(units='ns')
+    await ospi.write(address, [0xF5], mode=0)
+    none_time = get_sim_time(units='ns') - start
+    dut._log.info(f"Write took {always_time} ns with verification and {none_time} ns without")
+    assert none_time < always_time, f"Unverified write took {none_time} ns, verified write {always_time} ns"
+
+    # Deferred writes are recorded in the shadow model and checked at the checkpoint
+    ospi.verify = VERIFY_DEFERRED
+    await ospi.write(address, [0xF6], mode=0)
+    assert len(ospi.shadow) == 1, "Deferred write was not recorded in the shadow model"
+    await ospi.verify_pending()
+    assert len(ospi.shadow) == 0, "Shadow model was not cleared by the checkpoint"
+
+    # Policies and sampling intervals are validated on construction and assignment alike
+    for settings in (dict(verify='sometimes'), dict(verify=VERIFY_SAMPLED, verify_every=0)):
+        try:
+            OspiFlashOptions(**settings)
+        except ValueError:
+            pass
+        else:
+            assert False, f"Invalid verification settings {settings} were accepted"
+    for name, value in (('verify', 'sometimes'), ('verify_every', 0)):
+        try:
+            setattr(ospi, name, value)
+        except ValueError:
+            pass
+        else:
+            assert False, f"Invalid {name}={value!r} was accepted by the driver"
+    assert ospi.verify == VERIFY_DEFERRED and ospi.verify_every == 1, "A rejected setting changed the driver"
+
+@cocotb.test()
+async def test_ospi_flash_backing_store(dut):
+    """Test the sparse paged backing store: mirroring, image load and dump."""
+    dut._log.info("Starting test_ospi_flash_backing_store")
+    # Start the bench clocks and initialize the driver with a 64 MB backing store
+    ospi = await setup_flash(dut, size=64 << 20)
+
+
+    store = ospi.data_store
+    assert store.dump(range(0, 16)) == b'\xff' * 16, "Untouched pages must read as erased"
+
+    address = 0x07
+    await ospi.write(address, [0x17], mode=0)
+    assert store.dump((address, address + 1)) == b'\x17', "Write was not mirrored into the backing store"
+    assert store.allocated_pages == 1, f"Expected 1 allocated page, got {store.allocated_pages}"
+
+    # Whole pages of a loaded image are referenced, not copied
+    image = bytes(range(256)) * 64
+    store.load_image(image, offset=1 << 20)
+    assert store.dump(range(1 << 20, (1 << 20) + len(image))) == image, "Loaded image does not read back"
+    assert store.allocated_pages == 1, "Loading an aligned image must not allocate pages"
+
+    # The mirror models a NOR part: a sector erase clears the whole 4 KB sector and nothing else
+    store.write(0x0FFF, b'\x00\x00')
+    await ospi.erase(address, mode=0)
+    assert store.dump((0, 0x1000)) == b'\xff' * 0x1000, "Sector erase was not mirrored over the whole sector"
+    assert store.dump((0x1000, 0x1001)) == b'\x00', "Sector erase was mirrored past the end of the sector"
+
+async def model_transaction(dut, beats, length=0, dummy=0):
+    # Octal (8-8-8) master for the flash model: drive one byte per beat on the falling
+    # edge, release the lanes, skip the dummy cycles and sample `length` bytes on the rising edge
+    await FallingEdge(dut.OSPI_CLK)
+    dut.OSPI_CS.value = 0
+    for beat in beats:
+        dut.OSPI_IO.value = beat
+        await RisingEdge(dut.OSPI_CLK)
+        await FallingEdge(dut.OSPI_CLK)
+    dut.OSPI_IO.value = BinaryValue('z' * 8, n_bits=8, bigEndian=False)
+    for _ in range(dummy):
+        await RisingEdge(dut.OSPI_CLK)
+    data = bytearray()
+    for _ in range(length):
+        await RisingEdge(dut.OSPI_CLK)
+        data.append(dut.OSPI_IO.value.integer)
+    if length:
+        await FallingEdge(dut.OSPI_CLK)
+    dut.OSPI_CS.value = 1
+    await Timer(20, units='ns')  # Chip select high time
+    return bytes(data)
+
+@cocotb.test()
+async def test_ospi_flash_model(dut):
+    """Test the Python flash model: write enable, page program, status, fast read and erase."""
+    dut._log.info("Starting test_ospi_flash_model")
+    # Start the bench clocks
+    start_clocks(dut)
+
+    # Keep the Verilog flash off the bus so the model owns OSPI_IO
+    dut.OSPI_CS.value = 1
+    dut.read_enable.value = 0
+    dut.write_enable.value = 0
+    dut.erase_enable.value = 0
+    await Timer(20, units='ns')
+
+    # A store fixes the model size
+    try:
+        OspiFlashModel(dut.OSPI_CLK, dut.OSPI_CS, dut.OSPI_IO, size=1 << 20, store=OspiPageStore(64 << 20))
+    except ValueError:
+        pass
+    else:
+        assert False, "A model size that differs from its store was accepted"
+
+    # 8-8-8 model with a 64 MB store and busy times compressed 1000x
+    model = OspiFlashModel(dut.OSPI_CLK, dut.OSPI_CS, dut.OSPI_IO, size=64 << 20, command_mode=3, time_scale=0.001)
+    model.start()
+
+    address = 0x0100FE
+    address_beats = list(address.to_bytes(3, 'big'))
+    data = bytes([0x91, 0x92, 0x93, 0x94])
+
+    await model_transaction(dut, [0x06])  # Write enable
+    status = await model_transaction(dut, [0x05], length=1)
+    assert status[0] & STATUS_WEL, f"Write enable latch not set in status {status.hex()}"
+
+    # Page program wraps at the 256-byte page boundary
+    await model_transaction(dut, [0x02] + address_beats + list(data))
+    assert model.store.read(address, 2) == data[:2], "Program did not reach the backing store"
+    assert model.store.read(address & ~0xFF, 2) == data[2:], "Program did not wrap within the page"
+    status = await model_transaction(dut, [0x05], length=1)
+    assert status[0] & STATUS_WIP, f"Program did not set the write-in-progress bit, status {status.hex()}"
+    start = get_sim_time(units='ns')
+    while status[0] & STATUS_WIP:  # Poll until the 120 ns scaled program time has elapsed
+        status = await model_transaction(dut, [0x05], length=1)
+    elapsed = get_sim_time(units='ns') - start
+    dut._log.info(f"Model program completed after {elapsed} ns of polling")
+    assert elapsed <= 200, f"Program stayed busy for {elapsed} ns, expected about 120 ns"
+    assert not status[0] & STATUS_WEL, f"Program did not clear the write enable latch, status {status.hex()}"
+
+    # Octal I/O fast read with 16 dummy cycles
+    read_data = await model_transaction(dut, [0xCB] + address_beats, length=2, dummy=16)
+    dut._log.info(f"Model read data {read_data.hex()}")
+    assert read_data == data[:2], f"Model read data {read_data.hex()} does not match {data[:2].hex()}"
+
+    # A program without data is aborted and leaves the device idle
+    await model_transaction(dut, [0x06])
+    await model_transaction(dut, [0x02] + address_beats)
+    assert not model.busy and model.store.read(address, 2) == data[:2], "Program without data was not aborted"
+    await model_transaction(dut, [0x04])  # Write disable
+
+    # Sector erase without write enable is ignored, with write enable it erases
+    await model_transaction(dut, [0x20] + address_beats)
+    assert model.store.read(address, 1) == data[:1], "Erase without write enable was not ignored"
+    await model_transaction(dut, [0x06])
+    await model_transaction(dut, [0x20] + address_beats)
+    assert model.store.read(address, 2) == b'\xff\xff', "Sector erase did not erase the backing store"
+    assert model.busy, "Sector erase did not set the write-in-progress bit"
+
+    model.stop()
+
+@cocotb.test()
+async def test_ospi_flash_status_polling(dut):
+    """Test that program and erase wait on the status register instead of fixed delays."""
+    dut._log.info("Starting test_ospi_flash_status_polling")
+    # Start the bench clocks and initialize the driver with status polling after program and erase
+    ospi = await setup_flash(dut, verify=VERIFY_NONE, poll_status=True)
+
+
+    address = 0x08
+
+    # The Verilog flash has no status register and completes every operation at once
+    status = await ospi.read_status()
+    assert status is None, f"Expected an undriven status register, got {status}"
+
+    start = get_sim_time(units='ns')
+    await ospi.erase(address, mode=0)
+    elapsed = get_sim_time(units='ns') - start
+    dut._log.info(f"Sector erase took {elapsed} ns")
+    assert elapsed < 1000, f"Sector erase took {elapsed} ns, the status poll should end it sooner"
+
+    # The status read releases OSPI_IO, so this bench only reads back data programmed without polling
+    await ospi.write(address, [0x18], mode=0)
+    ospi.poll_status = False
+    await ospi.write(address, [0x18], mode=0)
+    read_data = await ospi.read(address, 1, mode=0)
+    assert read_data == [0x18], f"Read data {read_data} does not match written data [0x18]"
+
+    # A device that never clears write-in-progress times out instead of hanging the test:
+    # the default limit is BUSY_TIMEOUT_FACTOR program times plus one polling interval
+    async def stuck_status(mode=0):
+        await Timer(20, units='ns')
+        return STATUS_WIP
+    ospi.read_status = stuck_status
+    ospi.poll_max_ns = 100
+    start = get_sim_time(units='ns')
+    try:
+        await ospi.wait_ready('program')
+    except TimeoutError:
+        pass
+    else:
+        assert False, "A device stuck busy did not time out"
+    elapsed = get_sim_time(units='ns') - start
+    limit = BUSY_TIMEOUT_FACTOR * BENCH_BUSY_TIMES['program'] + 100
+    dut._log.info(f"Stuck device timed out after {elapsed} ns")
+    assert limit <= elapsed < 2 * limit, f"Stuck device timed out after {elapsed} ns, expected about {limit} ns"
+
+@cocotb.test()
+async def test_ospi_flash_program_range(dut):
+    """Test page-split multi-page programming with erase-only-when-needed and skipped pages."""
+    dut._log.info("Starting test_ospi_flash_program_range")
+    # Start the bench clocks and initialize the driver with a 1 MB backing store
+    ospi = await setup_flash(dut, verify=VERIFY_NONE, size=1 << 20)
+
+
+    # The mirror holds what a NOR part would contain after the programs and erases program_range plans;
+    # the bundled memory array takes no program data from OSPI_IO, so the plan is checked on the mirror
+    # Three and a bit unaligned pages, one of them entirely erased (0xFF)
+    address = 0x1F0
+    image = bytes(range(256)) + b'\xff' * 256 + bytes(range(255, -1, -1)) + bytes(16)
+    rate = await ospi.program_range(address, image)
+    dut._log.info(f"Programmed {len(image)} bytes at {rate:.2f} bytes/us")
+    assert ospi.data_store.read(address, len(image)) == image, "Mirror of the programmed range does not match the image"
+    assert rate > 0, f"Unexpected program throughput {rate}"
+
+    # Programming the same contents again must not touch the bus
+    start = get_sim_time(units='ns')
+    await ospi.program_range(address, image)
+    assert get_sim_time(units='ns') == start, "Unchanged range was reprogrammed"
+
+    # Turning a 0 bit back into a 1 erases the sector but keeps the rest of its contents
+    await ospi.program_range(address, b'\xff')
+    expected = b'\xff' + image[1:]
+    assert ospi.data_store.read(address, len(image)) == expected, "Sector contents were not reprogrammed after the erase"
+
+    # On a shared bus the erase and the programs of a range run under one grant
+    await ospi.program_range(address, bytes(len(image)))
+    ospi.arbiter = OspiArbiter()
+    await ospi.program_range(address, image)
+    assert ospi.arbiter.grants == {ospi: 1}, f"Range was programmed under {ospi.arbiter.grants} grants"
+
+@cocotb.test()
+async def test_ospi_flash_backdoor(dut):
+    """Test zero-cycle preload and peek of the Verilog memory array."""
+    dut._log.info("Starting test_ospi_flash_backdoor")
+    # Start the bench clocks and initialize the driver; the memory array lives in the ospi_flash instance
+    ospi = await setup_flash(dut, memory_path='dut.memory')
+
+
+    start = get_sim_time(units='ns')
+    image = bytes(range(0x40, 0x60))
+    loaded = ospi.backdoor_load(image, offset=0x20)
+    read_data, valid = ospi.backdoor_read(0x20, len(image))
+    assert loaded == len(image), f"Backdoor loaded {loaded} bytes, expected {len(image)}"
+    assert read_data == image, f"Backdoor read {read_data.hex()} does not match {image.hex()}"
+    assert not invalid_indices(valid, len(image)), "Preloaded bytes flagged as Z/X"
+    assert ospi.data_store.read(0x20, len(image)) == image, "Preload was not mirrored into the backing store"
+
+    # Intel HEX images land at the addresses of their records
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'boot.hex')
+        with open(path, 'w') as hex_file:
+            hex_file.write(":0400800011223344D2\n:00000001FF\n")
+        ospi.backdoor_load(path)
+    read_data, _ = ospi.backdoor_read(0x80, 4)
+    assert read_data == bytes([0x11, 0x22, 0x33, 0x44]), f"Intel HEX preload read back as {read_data.hex()}"
+    assert get_sim_time(units='ns') == start, "Backdoor access must not spend simulation time"
+
+@cocotb.test()
+async def test_ospi_flash_xip_read(dut):
+    """Test continuous XIP reads and the prefetch cache hit/miss accounting."""
+    dut._log.info("Starting test_ospi_flash_xip_read")
+    # Start the bench clocks and initialize the driver with 32-byte lines and one line of prefetch
+    ospi = await setup_flash(dut, xip_line_size=32, xip_prefetch=1)
+
+
+    async def answer_reads():
+        # Stand-in for a device answering the continuous read on every falling edge
+        while True:
+            await FallingEdge(dut.OSPI_CLK)
+            dut.OSPI_IO.value = 0x5A
+
+    responder = cocotb.start_soon(answer_reads())
+
+    # A miss fetches the line and prefetches the next one in the same burst; the window stays open
+    data, valid = await ospi.xip_read(0x00, 32, mode=3, keep_open=True)
+    assert data == b'\x5a' * 32 and not invalid_indices(valid, 32), f"XIP read returned {data.hex()}"
+
+    # Repeated fetches are served from the cache without bus activity
+    start = get_sim_time(units='ns')
+    data, valid = await ospi.xip_read(0x00, 64, mode=3, keep_open=True)
+    assert get_sim_time(units='ns') == start, "Cached XIP read spent bus time"
+
+    # A sequential miss continues the open window: data beats only, no command or address
+    start = get_sim_time(units='ns')
+    await ospi.xip_read(0x40, 32, mode=3)
+    elapsed = get_sim_time(units='ns') - start
+    dut._log.info(f"Sequential XIP fetch of 64 bytes took {elapsed} ns")
+    assert elapsed == 64 * 20, f"Sequential XIP fetch took {elapsed} ns, expected {64 * 20} ns"
+
+    cache = ospi.xip_cache
+    dut._log.info(f"XIP cache hits {cache.hits} misses {cache.misses}")
+    assert (cache.hits, cache.misses) == (2, 2), f"Unexpected XIP cache hits/misses {cache.hits}/{cache.misses}"
+
+    # Without keep_open the read closes its window on return
+    responder.kill()
+    await ReadOnly()
+    assert dut.OSPI_CS.value == 1, "XIP read left its window open"
+
+@cocotb.test()
+async def test_ospi_bus_phase_cycles(dut):
+    """Test that fast read spends exactly its command, address, dummy and data cycles."""
+    dut._log.info("Starting test_ospi_bus_phase_cycles")
+    # Start the bench clocks; a driver is set up per configuration
+    start_clocks(dut)
+
+    # The default configuration uses 3-byte addresses, matching the 24-bit address port
+    for address_bytes in (3, 4):
+        config = OspiConfig(address_bytes=address_bytes)
+        ospi = await setup_flash(dut, clocks=False, config=config)
+
+        await RisingEdge(dut.OSPI_CLK)
+        start = get_sim_time(units='ns')
+        await ospi.fast_read(0x000010, 1, mode=0)
+        elapsed = get_sim_time(units='ns') - start
+        # 1 command cycle, one cycle per address byte, 8 dummy cycles and 8 data cycles in single mode
+        expected = (1 + address_bytes + config.dummy_cycles_for(0x0B) + 8) * 20
+        dut._log.info(f"Fast read with {address_bytes}-byte addresses took {elapsed} ns")
+        assert elapsed == expected, f"Fast read with {address_bytes}-byte addresses took {elapsed} ns, expected {expected} ns"
+
+    # A fast read closes an open continuous read window and selects the device for its own transfer only
+    await ospi.xip_read(0x000040, 4, mode=0, keep_open=True)
+    assert dut.OSPI_CS.value == ospi.profile.cs_active, "XIP read did not leave its window open"
+    await ospi.fast_read(0x000010, 1, mode=1)
+    await ReadOnly()
+    assert dut.OSPI_CS.value == ospi.profile.cs_inactive, "Fast read left chip select asserted"
+    record = list(ospi.recorder.records())[-1]
+    assert (record.operation, record.command) == ('fast_read', 0x3B), f"Fast read was recorded as {record}"
+
+    # Data given as BinaryValue items is sent one byte per cycle, also with per-byte logging
+    ospi.log_policy = LOG_BYTE
+    await RisingEdge(dut.OSPI_CLK)
+    start = get_sim_time(units='ns')
+    await ospi.ospi.send_data([BinaryValue(value, n_bits=8, bigEndian=False) for value in (0xA5, 0x5A)], 0)
+    elapsed = get_sim_time(units='ns') - start
+    assert elapsed == 40, f"Sending 2 BinaryValue bytes took {elapsed} ns, expected 40 ns"
+
+@cocotb.test()
+async def test_ospi_bus_config_sweep(dut):
+    """Test that the bus drives its own clock at the configured frequency across a sweep."""
+    dut._log.info("Starting test_ospi_bus_config_sweep")
+    # Start the internal clock only; every driver below runs OSPI_CLK itself
+    start_clocks(dut, ospi_clk=False)
+
+    length = 4
+
+    for sclk_freq in (25e6, 50e6, 100e6):
+        # The bus owns OSPI_CLK and runs it at sclk_freq
+        config = OspiConfig(sclk_freq=sclk_freq, bus_width='octal')
+        ospi = await setup_flash(dut, clocks=False, config=config, start_clock=True)
+
+        profile = ospi.profile
+        assert profile.command('write', profile.mode) == 0x38, "Octal profile does not select the octal program opcode"
+
+        await RisingEdge(dut.OSPI_CLK)
+        start = get_sim_time(units='ns')
+        await ospi.ospi.receive_bytes(profile.mode, length)
+        elapsed = get_sim_time(units='ns') - start
+        expected = length * profile.period_ps / 1000
+        dut._log.info(f"Received {length} octal bytes at {sclk_freq / 1e6:g} MHz in {elapsed} ns")
+        assert elapsed == expected, f"Receiving at {sclk_freq / 1e6:g} MHz took {elapsed} ns, expected {expected} ns"
+
+        ospi.ospi.stop_clock()
+
+@cocotb.test()
+async def test_ospi_monitor_trace(dut):
+    """Test that the passive monitor reconstructs transactions into a binary trace file."""
+    dut._log.info("Starting test_ospi_monitor_trace")
+    # Start the bench clocks and initialize the driver
+    ospi = await setup_flash(dut)
+
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'ospi.trace')
+        monitor = OspiMonitor(dut.OSPI_CLK, ospi.cs, ospi.io, path=path)
+        monitor.start()
+
+        # Page program straight through the bus in quad mode
+        await FallingEdge(dut.OSPI_CLK)
+        ospi.cs.value = 0
+        await ospi.ospi.write(0x32, 0x000010, [0xAB, 0xCD], mode=2)
+        ospi.cs.value = 1
+        await Timer(40, units='ns')
+
+        # Sector erase; OspiBus.erase drives chip select itself
+        await FallingEdge(dut.OSPI_CLK)
+        await ospi.ospi.erase(0x20, 0x001000, mode=0)
+        await Timer(40, units='ns')
+
+        monitor.stop()
+        records = list(read_trace(path))
+
+    dut._log.info(f"Trace records: {records}")
+    assert monitor.count == 2 and len(records) == 2, f"Expected 2 trace records, got {len(records)}"
+    write, erase = records
+    assert (write.operation, write.command, write.address, write.mode) == ('write', 0x32, 0x10, 2), f"Unexpected write record {write}"
+    assert write.data == bytes([0xAB, 0xCD]), f"Write payload {write.data.hex()} does not match abcd"
+    assert (erase.operation, erase.command, erase.address) == ('erase', 0x20, 0x1000), f"Unexpected erase record {erase}"
+
+    # Frames whose first beat matches several commands are told apart by the phases that follow:
+    # frame length, dummy cycles and the XIP mode bits driven in the first dummy cycle
+    records = []
+    monitor = OspiMonitor(dut.OSPI_CLK, ospi.cs, ospi.io, callback=records.append)
+    monitor.start()
+
+    async def bus_read(command, address, mode):
+        # Plain read straight through the bus, which releases the lanes in its first dummy cycle
+        ospi.cs.value = 0
+        await ospi.ospi.read_bytes(command, address, mode, 2)
+        ospi.cs.value = 1
+
+    frames = [
+        (ospi.ospi.erase(0xC7, 0x000100, mode=2), ('erase', 2, 0xC7, 0x100)),  # Same first beat as octal XIP
+        (ospi.xip_read(0x000200, 16, mode=3), ('xip_read', 3, 0xCB, 0x200)),
+        (bus_read(0xBB, 0x000300, 1), ('read', 1, 0xBB, 0x300)),  # Same opcode as dual XIP
+        (ospi.xip_read(0x000300, 16, mode=1), ('xip_read', 1, 0xBB, 0x300)),
+        (ospi.fast_read(0x000400, 2, mode=0), ('fast_read', 0, 0x0B, 0x400)),  # Same opcode as single XIP
+        (ospi.xip_read(0x000400, 16, mode=0), ('xip_read', 0, 0x0B, 0x400)),
+        (bus_read(0xEB, 0x000500, 2), ('read', 2, 0xEB, 0x500)),  # Same opcode as quad XIP
+        (ospi.xip_read(0x000500, 16, mode=2), ('xip_read', 2, 0xEB, 0x500)),
+        (ospi.read_status(mode=2), ('read_status', 2, 0x05, None)),
+        # Four dual status beats also fit two quad status bytes
+        (ospi.read_status(mode=1), ('ambiguous', None, None, None)),
+    ]
+    for operation, _ in frames:
+        await FallingEdge(dut.OSPI_CLK)  # Select the device away from the sampling edge, as above
+        await operation
+        await Timer(40, units='ns')  # Chip select high between the frames
+    monitor.stop()
+
+    dut._log.info(f"Colliding frames decoded as {records}")
+    assert len(records) == len(frames), f"Expected {len(frames)} records, got {len(records)}"
+    for record, (_, expected) in zip(records, frames):
+        decoded = (record.operation, record.mode, record.command, record.address)
+        assert decoded == expected, f"Frame decoded as {decoded}, expected {expected}"
+
+@cocotb.test()
+async def test_ospi_flight_recorder(dut):
+    """Test that the flight recorder keeps the last transactions and dumps them when verification fails."""
+    dut._log.info("Starting test_ospi_flight_recorder")
+    # Start the bench clocks and initialize the driver with a small recorder; deferred verification checks later
+    ospi = await setup_flash(dut, verify=VERIFY_DEFERRED, recorder_depth=4)
+    recorder = ospi.recorder
+
+    # Six writes through a four-slot recorder keep only the last four, oldest first
+    for index in range(6):
+        await ospi.write(index * 0x10, [index] * 20, mode=0)
+    records = list(recorder.records())
+    dut._log.info(f"Recorded transactions: {records}")
+    assert recorder.count == 6 and len(records) == 4, f"Expected 4 of 6 transactions, got {len(records)} of {recorder.count}"
+    assert [record.address for record in records] == [0x20, 0x30, 0x40, 0x50], "Recorder did not keep the newest transactions"
+    assert records[-1].data == bytes([5] * recorder.payload_bytes), "Recorded payload is not the leading bytes of the write"
+
+    # Corrupt the expected contents of one more write so deferred verification fails and dumps the recorder
+    ospi.shadow.clear()
+    await ospi.write(0x60, [0x5A], mode=0)
+    ospi.shadow.record(0x60, [0xA5])
+    with tempfile.TemporaryDirectory() as directory:
+        recorder.path = os.path.join(directory, 'failure.trace')
+        try:
+            await ospi.verify_pending(mode=0)
+        except AssertionError:
+            pass
+        else:
+            assert False, "Deferred verification of a corrupted shadow entry did not fail"
+        dumped = list(read_trace(recorder.path))
+
+        # The read-back of the corrupted entry is the newest transaction in the dump
+        assert [record.operation for record in dumped] == ['write'] * 3 + ['read'], f"Unexpected dumped operations {dumped}"
+        assert [record.address for record in dumped] == [0x40, 0x50, 0x60, 0x60], f"Unexpected dumped addresses {dumped}"
+
+        # Other assertions only dump inside capture_failures()
+        path = os.path.join(directory, 'assertion.trace')
+        try:
+            with recorder.capture_failures(path):
+                assert False, "deliberate failure"
+        except AssertionError:
+            pass
+        assert len(list(read_trace(path))) == 4, "capture_failures() did not dump the recorder"
+
+@cocotb.test()
+async def test_ospi_stats(dut):
+    """Test the per-command, per-mode and per-phase counters and their JSON export."""
+    dut._log.info("Starting test_ospi_stats")
+    # Start the bench clocks and initialize the driver
+    ospi = await setup_flash(dut)
+    stats = ospi.stats
+    stats.reset()
+    seen = []
+    stats.callback = seen.append
+
+    # Octal page program straight through the bus: 1 command, 3 address and 4 data edges
+    await FallingEdge(dut.OSPI_CLK)
+    ospi.cs.value = 0
+    await ospi.ospi.write(0x38, 0x000100, [1, 2, 3, 4], mode=3)
+    ospi.cs.value = 1
+
+    # Dual read: 1 command, 3 address, 4 dummy and 2 x 4 data edges
+    await FallingEdge(dut.OSPI_CLK)
+    ospi.cs.value = 0
+    await ospi.ospi.read_bytes(0xBB, 0x000100, 1, 2)
+    ospi.cs.value = 1
+
+    summary = stats.as_dict()
+    dut._log.info(f"Counters: {summary}")
+    assert [record['operation'] for record in seen] == ['write', 'read'], f"Unexpected callback records {seen}"
+    assert summary['transactions']['write 0x38']['count'] == 1, "Octal program was not counted"
+    assert summary['bytes_by_mode'] == {'3': 4, '1': 2}, f"Unexpected bytes per mode {summary['bytes_by_mode']}"
+    assert stats.phase_edges == {'command': 2, 'address': 6, 'dummy': 4, 'data': 12, 'busy': 0}, f"Unexpected phase edges {stats.phase_edges}"
+    assert stats.phase_ns['dummy'] == 4 * 20, f"Dummy phase took {stats.phase_ns['dummy']} ns, expected 80 ns"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'stats.json')
+        stats.dump_json(path)
+        with open(path) as stats_file:
+            assert json.load(stats_file) == json.loads(json.dumps(summary)), "JSON export does not match the counters"
+
+@cocotb.test()
+async def test_ospi_random_traffic(dut):
+    """Test seeded constrained-random traffic against the reference model."""
+    dut._log.info("Starting test_ospi_random_traffic")
+    # Reads are checked by the generator, so the driver does not read back its writes
+    ospi = await setup_flash(dut, log_policy=LOG_OFF, verify=VERIFY_NONE)
+
+    settings = dict(regions=[(0x0000, 0x2000, 3), (0x10000, 0x1000, 1)], lengths=[(1, 8, 3), (9, 64, 1)],
+                    modes={0: 1, 3: 2}, erase_modes={0: 1})
+    first = OspiTrafficGenerator(ospi, seed=11, **settings).generate(100)
+    assert first == OspiTrafficGenerator(ospi, seed=11, **settings).generate(100), "Seeded batches are not reproducible"
+    assert all(length <= 64 and operation in ('read', 'program', 'erase') for operation, _, _, length in first), "Batch breaks its constraints"
+    assert any(operation == 'program' for operation, _, _, _ in first), "Batch is missing programs"
+    assert any(operation == 'erase' for operation, _, _, _ in first), "Batch is missing erases"
+
+    # The Verilog flash only holds what the backdoor loads and does not drive read data, so reads of a
+    # loaded image are checked against the device memory array and not against the bus
+    image = bytes(range(0xFF, -1, -1))
+    ospi.backdoor_write(0, image)
+    settings = dict(regions=[(0, len(image), 1)], lengths=[(1, 8, 3), (9, 64, 1)], modes={0: 1, 3: 2},
+                    operations={'read': 1}, check_bus=False)
+    generator = OspiTrafficGenerator(ospi, seed=11, batch_size=64, **settings)
+    counts = await generator.run(200)
+    dut._log.info(f"Ran {counts}, {generator.checked} read bytes checked, {generator.unchecked} unchecked")
+    assert counts['read'] == 200, f"Expected 200 reads, ran {counts}"
+    assert generator.checked > 0 and not generator.unchecked, f"Checked {generator.checked} bytes, {generator.unchecked} unchecked"
+
+    # A device byte that differs from the reference fails the run
+    ospi.backdoor.write(0x42, [image[0x42] ^ 0xFF])
+    generator = OspiTrafficGenerator(ospi, seed=11, **dict(settings, lengths=[(len(image), len(image), 1)]))
+    try:
+        await generator.run(1)
+    except AssertionError as exc:
+        assert '0x42' in str(exc), f"Unexpected failure {exc}"
+    else:
+        assert False, "Corrupted device contents were not detected"
+
+    # Without a backdoor the device is checked through bus read-back alone. The bench keeps the last
+    # byte driven on OSPI_IO, so a one-byte region at 0xFF (the last address byte of its sector erase)
+    # reads back what the reference holds through mixed programs, erases and reads
+    flash = await setup_flash(dut, clocks=False, memory_path='dut.no_such_memory', log_policy=LOG_OFF, verify=VERIFY_NONE)
+    assert flash.find_backdoor() is None, "A memory path that does not resolve gave a backdoor"
+    try:
+        OspiTrafficGenerator(flash, check_bus=False)
+    except ValueError:
+        pass
+    else:
+        assert False, "A generator that can check neither the bus nor the device was accepted"
+    await flash.erase(0xFF, mode=0)
+    generator = OspiTrafficGenerator(flash, seed=5, regions=[(0xFF, 1, 1)], lengths=[(1, 1, 1)], modes={0: 1},
+                                     operations={'read': 2, 'program': 2, 'erase': 1})
+    counts = await generator.run(60)
+    dut._log.info(f"Ran {counts} without a backdoor, {generator.checked} read bytes checked")
+    assert all(counts.values()), f"Traffic without a backdoor is missing operations: {counts}"
+    assert generator.checked == counts['read'] + 1, f"Checked {generator.checked} bytes for {counts['read']} reads"
+
+@cocotb.test()
+async def test_ospi_flash_snapshot(dut):
+    """Test that restore() returns contents and device state to a snapshot without clock cycles."""
+    dut._log.info("Starting test_ospi_flash_snapshot")
+    # Start the bench clocks, initialize the driver and load a golden image through the backdoor
+    ospi = await setup_flash(dut, verify=VERIFY_NONE)
+    golden = bytes(range(256))
+    ospi.backdoor_load(golden)
+    dut.HOLD_N.value = 1
+    await Timer(10, units='ns')
+    golden_snapshot = ospi.snapshot()
+    assert ospi.data_store.allocated_pages == 0, "Snapshot did not freeze the written pages"
+    assert golden_snapshot.signals['HOLD_N'] == 1, f"Hold state not captured: {golden_snapshot}"
+
+    # Dirty the device through the front door and the backdoor, and change the hold state
+    await ospi.write(0x10, [0x00, 0x11], mode=0)
+    ospi.backdoor_write(0x80, b'\x5a' * 4)
+    dut.HOLD_N.value = 0
+    await Timer(10, units='ns')
+    later_snapshot = ospi.snapshot()  # Shares the untouched pages with the golden snapshot
+
+    # Only pages the backing store changed since the snapshot are rewritten
+    backdoor_write = ospi.backdoor.write
+    written = []
+    ospi.backdoor.write = lambda address, data: (written.append((address, len(data))), backdoor_write(address, data))
+    await ospi.restore(later_snapshot)
+    assert written == [], f"Restoring an unchanged snapshot rewrote {written}"
+
+    start = get_sim_time(units='ns')
+    await ospi.restore(golden_snapshot)
+    await Timer(1, units='ns')  # Let the immediate writes settle before sampling
+    assert get_sim_time(units='ns') - start == 1, "Restore consumed simulated time"
+    data, _ = ospi.backdoor_read(0, 256)
+    assert data == golden, "Device memory was not restored to the golden image"
+    assert ospi.data_store.read(0, 256) == golden, "Backing store was not restored to the golden image"
+    assert dut.HOLD_N.value == 1, "Hold state was not restored"
+    assert written == [(0, 256)], f"Restore rewrote {written} instead of the one dirtied page"
+    del ospi.backdoor.write
+
+    # Snapshots stay independent: the later one still holds the dirtied contents
+    await ospi.restore(later_snapshot)
+    await Timer(1, units='ns')
+    data, _ = ospi.backdoor_read(0x80, 4)
+    assert data == b'\x5a' * 4 and ospi.data_store.read(0x10, 2) == bytes([0x00, 0x11]), "Later snapshot lost its contents"
+
+    # Without a backdoor the backing store and the device state are still restored
+    flash = await setup_flash(dut, clocks=False, memory_path='dut.no_such_memory', verify=VERIFY_NONE)
+    flash.data_store.write(0, golden)
+    dut.HOLD_N.value = 1
+    await Timer(10, units='ns')
+    snapshot = flash.snapshot()
+    flash.data_store.write(0, b'\x00')
+    dut.HOLD_N.value = 0
+    await Timer(10, units='ns')
+    await flash.restore(snapshot)
+    await Timer(1, units='ns')
+    assert flash.data_store.read(0, 256) == golden and dut.HOLD_N.value == 1, "Restore without a backdoor failed"
+
+@cocotb.test()
+async def test_ospi_coverage(dut):
+    """Test command x mode x region x length coverage, file merging and the closure report."""
+    dut._log.info("Starting test_ospi_coverage")
+    # Start the bench clocks and initialize the driver with a coverage collector attached
+    ospi = await setup_flash(dut, verify=VERIFY_NONE)
+    coverage = OspiCoverage()
+    ospi.coverage = coverage
+
+    await ospi.write(0x10, [1, 2, 3, 4], mode=0)  # 0x02, first sector, 2-16 bytes
+    await ospi.read_bytes(0x2000, 32, mode=3)  # 0x0B, first block, 17-256 bytes
+    await ospi.erase(0x3000, mode=0)  # 0x20, first block, no data
+    dut._log.info(coverage.report(limit=5))
+
+    missing = coverage.missing()
+    assert len(missing) == sum(coverage.goals) - 3, f"Expected 3 covered goal bins, {len(missing)} missing"
+    for label in ("cmd=0x02 mode=0 region>=0x0 len>=2", "cmd=0x0b mode=3 region>=0x1000 len>=17",
+                  "cmd=0x20 mode=0 region>=0x1000 len>=0"):
+        assert label not in missing, f"Bin {label} was not covered"
+    assert not coverage.closed(), "Coverage closed after three transactions"
+
+    # Coverage files from parallel runs merge by adding hits
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [os.path.join(directory, f"run{index}.cov") for index in range(3)]
+        for path in paths:
+            coverage.save(path)
+        merged = merge_coverage(paths)
+    assert sum(merged.hits) == 3 * sum(coverage.hits), "Merged coverage does not add the hits of every run"
+    assert merged.closure(at_least=3) == coverage.closure(), "Merged closure differs from a single run"
+
+@cocotb.test()
+async def test_ospi_matrix_job(dut):
+    """Run random reads in the mode, configuration and seed of the current matrix job."""
+    # Outside a matrix run (see run_matrix.py) this is mode 0 with the default configuration and seed 0
+    mode, config, seed = job_mode(), job_config(), job_seed()
+    dut._log.info(f"Starting test_ospi_matrix_job: mode {mode}, {config}, seed {seed}")
+    # The bus drives OSPI_CLK itself at the configured frequency
+    ospi = await setup_flash(dut, log_policy=LOG_OFF, verify=VERIFY_NONE, config=config, start_clock=True)
+
+    # Reads of a loaded image, checked against the device memory array
+    ospi.backdoor_write(0, random.Random(seed).getrandbits(8 * 0x100).to_bytes(0x100, 'little'))
+    generator = OspiTrafficGenerator(ospi, seed=seed, regions=[(0, 0x100, 1)], lengths=[(1, 16, 1)],
+                                     modes={mode: 1}, operations={'read': 1}, check_bus=False)
+    counts = await generator.run(20)
+    assert counts['read'] == 20 and generator.checked > 0, f"Expected 20 checked reads, ran {counts}"
+    ospi.ospi.stop_clock()
+
+@cocotb.test()
+async def test_ospi_shared_bus_arbiter(dut):
+    """Test that devices on one shared bus are time-multiplexed and keep their state apart."""
+    dut._log.info("Starting test_ospi_shared_bus_arbiter")
+    # Two dies built from the OSPI_* signals, the second one selected by OSPI_CS1
+    arbiter = OspiArbiter()
+    die0 = await setup_flash(dut, verify=VERIFY_NONE, arbiter=arbiter)
+    die1 = await setup_flash(dut, clocks=False, cs_name='OSPI_CS1', verify=VERIFY_NONE, arbiter=arbiter)
+    assert die0.io is dut.OSPI_IO and die0.cs is dut.OSPI_CS and die0.clk is dut.OSPI_CLK, "from_prefix resolved the wrong signals"
+    assert die1.io is dut.OSPI_IO and die1.cs is dut.OSPI_CS1, "from_prefix resolved the wrong chip select"
+
+    overlaps = []  # Times at which both chip selects were active
+
+    async def watch_selects():
+        while True:
+            await First(Edge(dut.OSPI_CS), Edge(dut.OSPI_CS1))
+            await ReadOnly()
+            if dut.OSPI_CS.value == die0.profile.cs_active and dut.OSPI_CS1.value == die1.profile.cs_active:
+                overlaps.append(get_sim_time(units='ns'))
+
+    watcher = cocotb.start_soon(watch_selects())
+
+    async def traffic(flash, base):
+        for index in range(4):
+            await flash.write(base + index * 0x10, [base >> 8, index], mode=3)
+            await flash.read_bytes(base + index * 0x10, 2, mode=3)
+
+    first = cocotb.start_soon(traffic(die0, 0x100))
+    second = cocotb.start_soon(traffic(die1, 0x200))
+    await first
+    await second
+    watcher.kill()
+    assert not overlaps, f"Both chip selects were active at {overlaps} ns"
+
+    # Operations of the two devices never overlap on the shared bus
+    intervals = sorted((record.start_ns, record.end_ns) for flash in (die0, die1) for record in flash.recorder.records())
+    assert len(intervals) == 16, f"Expected 16 recorded operations, got {len(intervals)}"
+    for (_, end), (start, _) in zip(intervals, intervals[1:]):
+        assert start >= end, f"Operations overlap on the shared bus: one ends at {end} ns, the next starts at {start} ns"
+    assert arbiter.grants[die0] > 1 and arbiter.grants[die1] > 1, f"Bus was not shared: {arbiter.grants}"
+    assert arbiter.wait_ns[die0] + arbiter.wait_ns[die1] > 0, "No device ever waited for the shared bus"
+
+    # Backing stores and counters stay per device
+    assert die0.data_store.read(0x100, 2) == bytes([0x01, 0]) and die1.data_store.read(0x100, 2) == b'\xff\xff', "Backing stores are not isolated"
+    assert die0.stats.bytes_by_mode == {3: 16} and die1.stats.bytes_by_mode == {3: 16}, "Counters are not isolated"
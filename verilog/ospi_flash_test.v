@@ -16,6 +16,7 @@ module ospi_flash_test;
   // Signals
   reg OSPI_CLK;
   reg OSPI_CS;
+  reg OSPI_CS1;
   reg reset_n;
   reg write_enable;
   reg read_enable;
@@ -24,6 +25,7 @@ module ospi_flash_test;
   reg [7:0] data_in;
   reg [23:0] address;
   wire [7:0] data_out;
+  wire [7:0] data_out1;
   wire clk; 
   reg HOLD_N;
   
@@ -49,9 +51,26 @@ module ospi_flash_test;
     .HOLD_N(HOLD_N) 
   );
 
+  // Second die on the same IO bus, selected by its own chip select
+  ospi_flash dut1 (
+    .clk(clk),
+    .OSPI_CLK(OSPI_CLK),
+    .OSPI_IO(OSPI_IO),
+    .OSPI_CS(OSPI_CS1),
+    .reset_n(reset_n),
+    .write_enable(write_enable),
+    .read_enable(read_enable),
+    .erase_enable(erase_enable),
+    .data_in(data_in[7:0]),
+    .address(address),
+    .data_out(data_out1[7:0]),
+    .HOLD_N(HOLD_N)
+  );
+
   initial begin
     // Initialize signals
     OSPI_CS = 1;
+    OSPI_CS1 = 1;
     reset_n = 0;
     write_enable = 0;
     read_enable = 0;